@@ -1,90 +1,163 @@
 """Chat API endpoints."""
 
+import json
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 
 from app.models.chat import ChatRequest, ChatResponse, ConversationHistory, Message
+from app.api.pagination import page_result, paginate
+from app.services.container import ServiceContainer, get_services
 from app.services.rag_engine import RAGEngine
 from app.db import get_db
 from app.db.postgres import Conversation, Message as DBMessage
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
-rag = RAGEngine()
+
+
+async def _save_exchange(
+    request: ChatRequest,
+    conversation_id: str,
+    result: dict[str, Any]
+) -> None:
+    """Persist the user message, assistant answer and new conversation."""
+    db = get_db()
+
+    async with db.session() as session:
+        # Save conversation if new
+        if not request.conversation_id:
+            new_conv = Conversation(
+                id=conversation_id,
+                title=request.message[:100],  # Use first 100 chars as title
+                created_at=datetime.utcnow()
+            )
+            session.add(new_conv)
+
+        # Save user message
+        user_msg = DBMessage(
+            conversation_id=conversation_id,
+            role="user",
+            content=request.message,
+            created_at=datetime.utcnow()
+        )
+        session.add(user_msg)
+
+        # Save assistant message
+        assistant_msg = DBMessage(
+            conversation_id=conversation_id,
+            role="assistant",
+            content=result["answer"],
+            sources=result["sources"],
+            tokens_used=result.get("tokens_used"),
+            processing_time_ms=result.get("processing_time_ms"),
+            msg_metadata=result.get("metadata", {}),
+            created_at=datetime.utcnow()
+        )
+        session.add(assistant_msg)
+
+        await session.commit()
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_chat(
+    rag: RAGEngine,
+    request: ChatRequest,
+    conversation_id: str,
+    history: list[dict[str, str]]
+) -> AsyncIterator[str]:
+    """
+    Run the RAG pipeline and emit SSE events.
+
+    Events: `sources` after retrieval, `token` for each piece of answer
+    text, then `done` with the full ChatResponse once the exchange is
+    saved, or `error` if anything fails mid-stream.
+    """
+    try:
+        result: dict[str, Any] | None = None
+
+        async for event in rag.query_stream(
+            user_query=request.message,
+            conversation_history=history,
+            filters=request.filters,
+            top_k=request.top_k,
+            lexical_weight=request.lexical_weight
+        ):
+            if event["type"] == "sources":
+                yield _sse("sources", {
+                    "conversation_id": conversation_id,
+                    "sources": event["sources"]
+                })
+            elif event["type"] == "token":
+                yield _sse("token", {"text": event["text"]})
+            elif event["type"] == "done":
+                result = event["result"]
+
+        await _save_exchange(request, conversation_id, result)
+
+        response = ChatResponse(
+            answer=result["answer"],
+            sources=result["sources"],
+            conversation_id=conversation_id,
+            model_used=result["model_used"],
+            tokens_used=result.get("tokens_used"),
+            processing_time_ms=result.get("processing_time_ms")
+        )
+        yield _sse("done", response.model_dump(mode="json"))
+
+    except Exception as e:
+        yield _sse("error", {"detail": f"Error processing chat request: {str(e)}"})
 
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    services: ServiceContainer = Depends(get_services)
+):
     """
     Chat endpoint with RAG.
 
     Process user message, retrieve relevant context, and generate response.
+    When `stream` is true, the response is a Server-Sent Events stream
+    (see `_stream_chat`) instead of a single JSON body.
     """
     try:
         # Get or create conversation
         conversation_id = request.conversation_id or f"conv_{uuid.uuid4().hex[:16]}"
 
-        # Get conversation history if exists
+        # Get recent conversation history (cached per conversation)
         history = []
-        db = get_db()
-
-        async with db.session() as session:
-            if request.conversation_id:
-                # Fetch existing conversation
-                stmt = select(DBMessage).where(
-                    DBMessage.conversation_id == request.conversation_id
-                ).order_by(DBMessage.created_at)
-
-                result = await session.execute(stmt)
-                messages = result.scalars().all()
-
-                # Convert to history format
-                history = [
-                    {"role": msg.role, "content": msg.content}
-                    for msg in messages
-                ]
-
-            # Perform RAG query
-            result = await rag.query(
-                user_query=request.message,
-                conversation_history=history,
-                filters=request.filters,
-                top_k=request.top_k
+        if request.conversation_id:
+            history = await services.conversation_cache.load(request.conversation_id)
+
+        if request.stream:
+            return StreamingResponse(
+                _stream_chat(services.rag, request, conversation_id, history),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "X-Accel-Buffering": "no"
+                }
             )
 
-            # Save conversation if new
-            if not request.conversation_id:
-                new_conv = Conversation(
-                    id=conversation_id,
-                    title=request.message[:100],  # Use first 100 chars as title
-                    created_at=datetime.utcnow()
-                )
-                session.add(new_conv)
-
-            # Save user message
-            user_msg = DBMessage(
-                conversation_id=conversation_id,
-                role="user",
-                content=request.message,
-                created_at=datetime.utcnow()
-            )
-            session.add(user_msg)
-
-            # Save assistant message
-            assistant_msg = DBMessage(
-                conversation_id=conversation_id,
-                role="assistant",
-                content=result["answer"],
-                sources=result["sources"],
-                tokens_used=result.get("tokens_used"),
-                processing_time_ms=result.get("processing_time_ms"),
-                created_at=datetime.utcnow()
-            )
-            session.add(assistant_msg)
+        # Perform RAG query
+        result = await services.rag.query(
+            user_query=request.message,
+            conversation_history=history,
+            filters=request.filters,
+            top_k=request.top_k,
+            lexical_weight=request.lexical_weight
+        )
 
-            await session.commit()
+        await _save_exchange(request, conversation_id, result)
 
         # Return response
         return ChatResponse(
@@ -165,7 +238,10 @@ async def get_conversation_history(conversation_id: str):
 
 
 @router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_conversation(conversation_id: str):
+async def delete_conversation(
+    conversation_id: str,
+    services: ServiceContainer = Depends(get_services)
+):
     """
     Delete a conversation and all its messages.
 
@@ -191,6 +267,8 @@ async def delete_conversation(conversation_id: str):
             await session.delete(conversation)
             await session.commit()
 
+        services.conversation_cache.invalidate(conversation_id)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -201,27 +279,36 @@ async def delete_conversation(conversation_id: str):
 
 
 @router.get("/conversations")
-async def list_conversations(limit: int = 50, offset: int = 0):
+async def list_conversations(limit: int = 50, offset: int = 0, cursor: str | None = None):
     """
-    List all conversations.
+    List conversations, most recently updated first.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    `offset` is still accepted when no cursor is given.
 
     Args:
         limit: Maximum number of conversations to return
-        offset: Number of conversations to skip
+        offset: Number of conversations to skip (ignored with a cursor)
+        cursor: Cursor from the previous page
 
     Returns:
-        List of conversations with metadata
+        List of conversations with metadata and the next page's cursor
     """
     try:
         db = get_db()
 
         async with db.session() as session:
-            stmt = select(Conversation).order_by(
-                Conversation.updated_at.desc()
-            ).limit(limit).offset(offset)
+            stmt = select(
+                Conversation.id,
+                Conversation.title,
+                Conversation.conv_metadata,
+                Conversation.created_at,
+                Conversation.updated_at
+            )
+            stmt = paginate(stmt, Conversation.updated_at, Conversation.id, limit, cursor, offset)
 
             result = await session.execute(stmt)
-            conversations = result.scalars().all()
+            conversations, next_cursor = page_result(result.all(), limit, "updated_at")
 
             return {
                 "conversations": [
@@ -230,14 +317,17 @@ async def list_conversations(limit: int = 50, offset: int = 0):
                         "title": conv.title,
                         "created_at": conv.created_at.isoformat(),
                         "updated_at": conv.updated_at.isoformat(),
-                        "metadata": conv.metadata
+                        "metadata": conv.conv_metadata
                     }
                     for conv in conversations
                 ],
                 "count": len(conversations),
-                "offset": offset
+                "offset": offset,
+                "next_cursor": next_cursor
             }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
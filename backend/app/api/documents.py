@@ -1,47 +1,108 @@
 """Documents API endpoints."""
 
+import hashlib
 import os
 import uuid
 from pathlib import Path
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, status
+import aiofiles
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, status
 from sqlalchemy import select
 
 from app.models.document import (
     DocumentMetadata,
     DocumentUploadResponse,
     DocumentStatus,
+    IngestionStatusResponse,
     DocumentType,
     WebCrawlRequest,
     WebCrawlResponse
 )
-from app.services.document_processor import DocumentProcessor
-from app.services.rag_engine import RAGEngine
+from app.api.pagination import page_result, paginate
+from app.services.container import ServiceContainer, get_services
+from app.services.ingestion import IngestionJob, IngestionQueueFull
 from app.db import get_db
 from app.db.postgres import Document as DBDocument
 from app.config import get_settings
+from app.metrics import track_stage
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
-doc_processor = DocumentProcessor()
-rag = RAGEngine()
 settings = get_settings()
 
+# Source type recorded for each accepted file extension
+FILE_TYPES = {
+    ".pdf": DocumentType.PDF,
+    ".txt": DocumentType.TEXT,
+    ".md": DocumentType.MARKDOWN,
+    ".docx": DocumentType.WORD,
+}
 
-@router.post("/upload", response_model=DocumentUploadResponse)
+
+async def save_upload(file: UploadFile, file_path: Path, max_size: int) -> tuple[int, str]:
+    """
+    Stream an upload to disk in fixed-size chunks.
+
+    Memory use is bounded by `settings.upload_chunk_size` regardless of
+    the file size; the SHA-256 is computed while copying.
+
+    Args:
+        file: Uploaded file
+        file_path: Destination path
+        max_size: Maximum accepted size in bytes
+
+    Returns:
+        Tuple of (size in bytes, hex SHA-256 digest)
+
+    Raises:
+        HTTPException: 413 if the file exceeds `max_size`
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(file_path, "wb") as out:
+            while chunk := await file.read(settings.upload_chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds maximum size of {max_size} bytes"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        file_path.unlink(missing_ok=True)
+        raise
+
+    return size, digest.hexdigest()
+
+
+@router.post("/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
+    response: Response,
     file: UploadFile = File(...),
     title: str = Form(None),
-    metadata: str = Form("{}")  # JSON string
+    metadata: str = Form("{}"),  # JSON string
+    document_id: str | None = Form(None),
+    services: ServiceContainer = Depends(get_services)
 ):
     """
-    Upload and process a document (PDF, TXT, etc.).
+    Upload a document (PDF, TXT, etc.) and queue it for processing.
+
+    The file is saved to disk and a `pending` document row is created;
+    the response returns immediately with the document ID. A background
+    worker then:
+    1. Processes and chunks the document
+    2. Embeds and indexes it in Pinecone
+    3. Records each state transition on the document row
 
-    The document will be:
-    1. Saved to disk
-    2. Processed and chunked
-    3. Embedded and indexed in Pinecone
-    4. Metadata saved to PostgreSQL
+    Poll `GET /api/documents/{document_id}/status` for progress.
+
+    Files are deduplicated by SHA-256: uploading content that is already
+    stored returns the existing document (200) without re-processing.
+    Passing `document_id` uploads a new revision of that document; only
+    chunks whose text changed are re-embedded.
     """
     try:
         # Validate file type
@@ -52,85 +113,180 @@ async def upload_document(
                 detail=f"File type {file_ext} not allowed. Allowed types: {settings.allowed_file_types}"
             )
 
-        # Generate document ID
-        document_id = doc_processor.generate_document_id(
-            title=title or file.filename,
-            content_hash=None
-        )
+        if services.ingestion_queue.is_full():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingestion queue is full. Retry later."
+            )
 
         # Create upload directory if it doesn't exist
         upload_dir = Path(settings.upload_dir)
         upload_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save file
-        file_path = upload_dir / f"{document_id}{file_ext}"
-        content = await file.read()
+        # Stream to a temporary name, then move into place once the ID is known
+        temp_path = upload_dir / f".{uuid.uuid4().hex}{file_ext}.part"
+        with track_stage("upload_save", errors=OSError):
+            file_size, content_hash = await save_upload(file, temp_path, settings.max_file_size)
+
+        try:
+            db = get_db()
+            async with db.session() as session:
+                # Identical content is served by the document that already has it
+                stmt = select(DBDocument).where(
+                    DBDocument.content_hash == content_hash
+                ).order_by(DBDocument.created_at).limit(1)
+                result = await session.execute(stmt)
+                duplicate = result.scalar_one_or_none()
+
+                if duplicate and duplicate.status != DocumentStatus.FAILED.value:
+                    response.status_code = status.HTTP_200_OK
+                    return DocumentUploadResponse(
+                        document_id=duplicate.id,
+                        title=duplicate.title,
+                        status=DocumentStatus(duplicate.status),
+                        file_size_bytes=file_size,
+                        message="Identical document already uploaded. Existing document reused."
+                    )
+
+                if document_id:
+                    # New revision of an existing document
+                    existing = await session.get(DBDocument, document_id)
+                    if not existing:
+                        raise HTTPException(
+                            status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Document {document_id} not found"
+                        )
+                    if existing.status in (DocumentStatus.PENDING.value, DocumentStatus.PROCESSING.value):
+                        raise HTTPException(
+                            status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Document {document_id} is still being processed"
+                        )
+                else:
+                    # A failed copy of the same content is retried in place
+                    existing = duplicate
+
+                if existing:
+                    document_id = existing.id
+                else:
+                    document_id = services.doc_processor.generate_document_id(
+                        title=title or file.filename,
+                        content_hash=content_hash
+                    )
+
+                file_path = upload_dir / f"{document_id}{file_ext}"
+                os.replace(temp_path, file_path)
+
+                if existing:
+                    if existing.file_path and existing.file_path != str(file_path):
+                        Path(existing.file_path).unlink(missing_ok=True)
+
+                    # Existing chunk rows stay so the worker only re-embeds changed chunks
+                    existing.title = title or existing.title
+                    existing.source_type = FILE_TYPES.get(file_ext, DocumentType.TEXT).value
+                    existing.file_path = str(file_path)
+                    existing.content_hash = content_hash
+                    existing.status = DocumentStatus.PENDING.value
+                    existing.processed_at = None
+                    existing.doc_metadata = {
+                        **(existing.doc_metadata or {}),
+                        "ingestion": {"stage": "queued", "progress": 0.0}
+                    }
+                    doc_title = existing.title
+                else:
+                    # Record the pending document before handing it to a worker
+                    doc_title = title or Path(file.filename).stem
+                    session.add(DBDocument(
+                        id=document_id,
+                        title=doc_title,
+                        source_type=FILE_TYPES.get(file_ext, DocumentType.TEXT).value,
+                        file_path=str(file_path),
+                        content_hash=content_hash,
+                        status=DocumentStatus.PENDING.value,
+                        doc_metadata={"ingestion": {"stage": "queued", "progress": 0.0}},
+                        created_at=datetime.utcnow()
+                    ))
+
+                await session.commit()
+        finally:
+            temp_path.unlink(missing_ok=True)
+
+        try:
+            services.ingestion_queue.enqueue(
+                IngestionJob(document_id=document_id, file_path=str(file_path), title=title)
+            )
+        except IngestionQueueFull as e:
+            # The queue filled up after the check above; a pending row with no
+            # job would never be processed and would absorb identical re-uploads
+            await services.ingestion_queue.mark_failed(document_id, str(e))
+            raise
 
-        with open(file_path, "wb") as f:
-            f.write(content)
+        return DocumentUploadResponse(
+            document_id=document_id,
+            title=doc_title,
+            status=DocumentStatus.PENDING,
+            file_size_bytes=file_size,
+            message="Document queued for processing."
+        )
 
-        file_size = len(content)
+    except HTTPException:
+        raise
+    except IngestionQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing document: {str(e)}"
+        )
 
-        # Process document based on type
-        if file_ext == ".pdf":
-            chunks, doc_metadata = await doc_processor.chunk_pdf_by_pages(
-                file_path=file_path,
-                document_id=document_id
-            )
-        else:
-            chunks, doc_metadata = await doc_processor.process_text_file(
-                file_path=file_path,
-                document_id=document_id
-            )
 
-        # Update title if provided
-        if title:
-            doc_metadata.title = title
-
-        # Prepare chunks for embedding
-        chunk_dicts = [
-            {
-                "chunk_id": chunk.chunk_id,
-                "document_id": chunk.document_id,
-                "text": chunk.text,
-                "chunk_index": chunk.chunk_index,
-                "metadata": {
-                    "source": doc_metadata.title,
-                    "page": chunk.page_number,
-                    "document_id": document_id,
-                    **chunk.metadata
-                }
-            }
-            for chunk in chunks
-        ]
+@router.get("/{document_id}/status", response_model=IngestionStatusResponse)
+async def get_document_status(
+    document_id: str,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Get processing status and progress of a document.
 
-        # Embed and upsert to Pinecone
-        upsert_stats = await rag.upsert_chunks(chunk_dicts)
+    Args:
+        document_id: Document identifier returned by the upload
 
-        # Save to PostgreSQL
+    Returns:
+        Current status, stage and progress
+    """
+    try:
         db = get_db()
+
         async with db.session() as session:
-            db_doc = DBDocument(
-                id=document_id,
-                title=doc_metadata.title,
-                source_type=doc_metadata.source_type.value,
-                file_path=str(file_path),
-                total_pages=doc_metadata.total_pages,
-                total_tokens=doc_metadata.total_tokens,
-                chunk_count=doc_metadata.chunk_count,
-                status=DocumentStatus.COMPLETED.value,
-                processed_at=datetime.utcnow(),
-                created_at=datetime.utcnow()
+            stmt = select(
+                DBDocument.status,
+                DBDocument.chunk_count,
+                DBDocument.doc_metadata
+            ).where(DBDocument.id == document_id)
+            result = await session.execute(stmt)
+            row = result.one_or_none()
+
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document {document_id} not found"
             )
-            session.add(db_doc)
-            await session.commit()
 
-        return DocumentUploadResponse(
+        # Prefer live progress from this process over the last persisted stage
+        ingestion = (
+            services.ingestion_queue.progress(document_id)
+            or (row.doc_metadata or {}).get("ingestion", {})
+        )
+
+        return IngestionStatusResponse(
             document_id=document_id,
-            title=doc_metadata.title,
-            status=DocumentStatus.COMPLETED,
-            file_size_bytes=file_size,
-            message=f"Document processed successfully. {upsert_stats['upserted']} chunks indexed."
+            status=DocumentStatus(row.status),
+            stage=ingestion.get("stage"),
+            progress=ingestion.get("progress", 0.0),
+            chunk_count=row.chunk_count or 0,
+            error=ingestion.get("error")
         )
 
     except HTTPException:
@@ -138,22 +294,99 @@ async def upload_document(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing document: {str(e)}"
+            detail=f"Error fetching document status: {str(e)}"
         )
 
 
-@router.post("/crawl", response_model=WebCrawlResponse)
-async def crawl_website(request: WebCrawlRequest):
+@router.post("/crawl", response_model=WebCrawlResponse, status_code=status.HTTP_202_ACCEPTED)
+async def crawl_website(
+    request: WebCrawlRequest,
+    services: ServiceContainer = Depends(get_services)
+):
     """
-    Crawl a website and index its content.
+    Crawl a website with Firecrawl and index its content.
+
+    A `pending` web page document is created and the response returns
+    immediately. In the background the crawl job is polled and each page
+    is chunked, embedded and indexed as soon as Firecrawl returns it, so
+    pages become searchable while the crawl is still running.
+
+    Only pages on the same host and below the URL's path are indexed,
+    at most `max_depth - 1` levels deeper (1 = just the URL). Include and
+    exclude patterns are regular expressions matched against URL paths.
 
-    Note: This is a placeholder for MCP Firecrawl integration.
-    For now, it returns a not implemented error.
+    Crawling a URL again refreshes its existing document: pages whose
+    content is unchanged are not re-chunked or re-embedded.
+
+    Poll `GET /api/documents/{document_id}/status` for progress.
     """
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Web crawling not yet implemented. Use MCP Firecrawl integration."
-    )
+    if not settings.firecrawl_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Firecrawl API key not configured"
+        )
+
+    try:
+        url = str(request.url)
+
+        db = get_db()
+        async with db.session() as session:
+            # A previous crawl of the same URL is refreshed in place
+            stmt = select(DBDocument).where(
+                DBDocument.source_url == url,
+                DBDocument.source_type == DocumentType.WEB_PAGE.value
+            ).order_by(DBDocument.created_at).limit(1)
+            result = await session.execute(stmt)
+            existing = result.scalar_one_or_none()
+
+            if existing:
+                if existing.status in (DocumentStatus.PENDING.value, DocumentStatus.PROCESSING.value):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"{url} is already being crawled"
+                    )
+                document_id = existing.id
+                existing.title = request.title or existing.title
+                existing.status = DocumentStatus.PENDING.value
+                existing.processed_at = None
+                existing.doc_metadata = {
+                    **(existing.doc_metadata or {}),
+                    **request.metadata,
+                    "ingestion": {"stage": "queued", "progress": 0.0}
+                }
+            else:
+                document_id = services.doc_processor.generate_document_id(title=request.title or url)
+                session.add(DBDocument(
+                    id=document_id,
+                    title=request.title or url,
+                    source_type=DocumentType.WEB_PAGE.value,
+                    source_url=url,
+                    status=DocumentStatus.PENDING.value,
+                    doc_metadata={
+                        **request.metadata,
+                        "ingestion": {"stage": "queued", "progress": 0.0}
+                    },
+                    created_at=datetime.utcnow()
+                ))
+            await session.commit()
+
+        services.crawler.submit(document_id, request)
+
+        return WebCrawlResponse(
+            document_id=document_id,
+            url=url,
+            pages_crawled=0,
+            status=DocumentStatus.PENDING,
+            message="Crawl started. Pages are indexed as they are crawled."
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error starting crawl: {str(e)}"
+        )
 
 
 @router.get("/{document_id}", response_model=DocumentMetadata)
@@ -206,7 +439,10 @@ async def get_document(document_id: str):
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_document(document_id: str):
+async def delete_document(
+    document_id: str,
+    services: ServiceContainer = Depends(get_services)
+):
     """
     Delete a document and all its chunks.
 
@@ -231,7 +467,7 @@ async def delete_document(document_id: str):
                 )
 
             # Delete from Pinecone
-            await rag.delete_document(document_id)
+            await services.rag.delete_document(document_id)
 
             # Delete physical file
             if doc.file_path and os.path.exists(doc.file_path):
@@ -254,34 +490,48 @@ async def delete_document(document_id: str):
 async def list_documents(
     limit: int = 50,
     offset: int = 0,
-    source_type: str | None = None
+    source_type: str | None = None,
+    cursor: str | None = None
 ):
     """
-    List all documents.
+    List documents, newest first.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page;
+    cursor pages cost the same however deep they are. `offset` is still
+    accepted when no cursor is given.
 
     Args:
         limit: Maximum number of documents to return
-        offset: Number of documents to skip
+        offset: Number of documents to skip (ignored with a cursor)
         source_type: Optional filter by source type
+        cursor: Cursor from the previous page
 
     Returns:
-        List of documents with metadata
+        List of documents with metadata and the next page's cursor
     """
     try:
         db = get_db()
 
         async with db.session() as session:
-            stmt = select(DBDocument).order_by(
-                DBDocument.created_at.desc()
+            # Only the listed columns: the JSON metadata is never loaded
+            stmt = select(
+                DBDocument.id,
+                DBDocument.title,
+                DBDocument.source_type,
+                DBDocument.total_pages,
+                DBDocument.chunk_count,
+                DBDocument.status,
+                DBDocument.created_at,
+                DBDocument.processed_at
             )
 
             if source_type:
                 stmt = stmt.where(DBDocument.source_type == source_type)
 
-            stmt = stmt.limit(limit).offset(offset)
+            stmt = paginate(stmt, DBDocument.created_at, DBDocument.id, limit, cursor, offset)
 
             result = await session.execute(stmt)
-            documents = result.scalars().all()
+            documents, next_cursor = page_result(result.all(), limit, "created_at")
 
             return {
                 "documents": [
@@ -298,9 +548,12 @@ async def list_documents(
                     for doc in documents
                 ],
                 "count": len(documents),
-                "offset": offset
+                "offset": offset,
+                "next_cursor": next_cursor
             }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
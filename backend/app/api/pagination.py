@@ -0,0 +1,94 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = json.dumps([timestamp.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def paginate(
+    stmt: Select,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0
+) -> Select:
+    """
+    Order a select newest first and restrict it to one page.
+
+    With a cursor the page starts strictly after the cursor's row, which
+    an index on `(sort_column DESC, id_column DESC)` serves without
+    scanning skipped rows. `offset` is only applied when no cursor is
+    given. One extra row is requested so `page_result` can tell whether
+    another page follows.
+
+    Args:
+        stmt: Select of the columns to return
+        sort_column: Timestamp column to sort by (descending)
+        id_column: Unique tie-breaker column
+        limit: Page size
+        cursor: Cursor from the previous page's `next_cursor`
+        offset: Rows to skip (legacy offset pagination)
+
+    Returns:
+        The paginated select
+    """
+    stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(sort_column, id_column) < tuple_(timestamp, row_id))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    return stmt.limit(limit + 1)
+
+
+def page_result(rows: list[Any], limit: int, sort_key: str, id_key: str = "id") -> tuple[list[Any], str | None]:
+    """
+    Trim the extra row fetched by `paginate` and build the next cursor.
+
+    Args:
+        rows: Rows returned by the paginated select
+        limit: Page size
+        sort_key: Attribute holding the sort timestamp
+        id_key: Attribute holding the row ID
+
+    Returns:
+        Tuple of (rows on this page, cursor for the next page or None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_key), getattr(last, id_key))
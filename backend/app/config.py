@@ -21,31 +21,124 @@ class Settings(BaseSettings):
     pinecone_environment: str = "us-east-1"
     pinecone_index_name: str = "market-intelligence"
     pinecone_dimension: int = 3072  # text-embedding-3-large dimension
+    pinecone_pool_threads: int = 8  # Concurrent requests / HTTP connections
+    pinecone_timeout_seconds: float = 10.0
+
+    # Vector Store Configuration
+    vector_store_backend: str = "pinecone"  # "pinecone" or "local"
+    local_vector_store_path: str = "./cache/vectors"
+    local_vector_ann_enabled: bool = True  # HNSW search when hnswlib is installed
+    local_vector_hnsw_ef_search: int = 64  # Higher = better recall, slower queries
+    local_vector_exact_scan_max_rows: int = 20000  # Smaller candidate sets are scanned exactly
 
     # Database Configuration
     database_url: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Replace connections older than this (seconds)
+    db_pool_pre_ping: bool = True  # Detect connections dropped by a failover
+    db_statement_cache_size: int = 100  # Prepared statements per connection (0 for PgBouncer)
 
     # Claude Configuration
     claude_model: str = "claude-sonnet-4-20250514"
     claude_max_tokens: int = 4000
+    prompt_cache_enabled: bool = True  # cache_control on instructions and history
 
     # OpenAI Configuration
     openai_embedding_model: str = "text-embedding-3-large"
 
+    # Embedding Cache Configuration
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./cache/embeddings.sqlite3"
+    embedding_cache_max_memory_items: int = 10000
+
+    # Embedding Rate Limits
+    embedding_max_concurrency: int = 4
+    embedding_max_tokens_per_request: int = 300000
+    embedding_tokens_per_minute: int = 1000000
+    embedding_max_retries: int = 5
+    embedding_retry_base_delay: float = 1.0
+    embedding_retry_max_delay: float = 30.0
+
+    # HTTP Connection Pools (per provider: Anthropic, OpenAI)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+
     # RAG Configuration
     chunk_size: int = 1000
     chunk_overlap: int = 200
+
+    # Document Processing Configuration
+    document_worker_processes: int = 0  # 0 = one per CPU
+    document_min_pages_per_task: int = 8
+    document_max_pages_per_task: int = 32  # Bounds the pages held in memory while streaming
+    ingestion_workers: int = 2
+    ingestion_queue_size: int = 100
     retrieval_top_k: int = 5
     similarity_threshold: float = 0.7
 
+    # Hybrid Retrieval Configuration
+    lexical_index_enabled: bool = True
+    hybrid_lexical_weight: float = 0.3
+    hybrid_rrf_k: int = 60
+    hybrid_lexical_min_relevance: float = 0.5  # Floor for BM25 matches missing from the dense results
+
+    # Conversation History Cache
+    conversation_cache_max_conversations: int = 1000
+    conversation_history_window: int = 50  # Most recent messages loaded per conversation
+
+    # Context Packing Configuration (tiktoken estimates)
+    context_max_input_tokens: int = 16000  # Prompt, question, history and chunks
+    context_history_max_tokens: int = 4000
+    context_history_block_messages: int = 8  # Old history is dropped this many messages at a time
+    context_duplicate_threshold: float = 0.85  # Shingle overlap marking near-duplicate chunks
+
+    # Reranking Configuration (requires sentence-transformers)
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_candidates: int = 50  # Retrieved before reranking down to top_k
+    rerank_batch_size: int = 16
+    rerank_timeout_ms: float = 300.0  # Fall back to retrieval order after this
+    rerank_workers: int = 2  # Scoring threads; a batch that overruns the budget holds only one
+
+    # Answer Cache Configuration
+    answer_cache_enabled: bool = True
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_max_entries: int = 1000
+
     # File Upload Configuration
     max_file_size: int = 10 * 1024 * 1024  # 10MB
+    upload_chunk_size: int = 1024 * 1024  # 1MB read/write buffer
     allowed_file_types: list[str] = [".pdf", ".txt", ".md", ".docx"]
     upload_dir: str = "./uploads"
 
     # MCP Configuration (optional for now)
     firecrawl_api_key: str | None = None
+    firecrawl_api_url: str = "https://api.firecrawl.dev"
     brave_api_key: str | None = None
+    mcp_cache_enabled: bool = True
+    mcp_cache_path: str = "./cache/mcp_responses.sqlite3"
+    mcp_cache_scrape_ttl_seconds: float = 86400.0  # Scraped pages
+    mcp_cache_search_ttl_seconds: float = 3600.0  # Search results
+    firecrawl_requests_per_second: float = 1.0
+    firecrawl_max_concurrency: int = 5  # Firecrawl requests in flight
+    brave_requests_per_second: float = 1.0
+    brave_max_concurrency: int = 5  # Brave Search requests in flight
+    mcp_max_connections: int = 20  # HTTP connection pool size
+    mcp_max_keepalive_connections: int = 10
+    mcp_http2_enabled: bool = True  # Used when the `http2` extra is installed
+    mcp_max_retries: int = 3  # Retries on 429/5xx and connection errors
+    mcp_retry_base_delay: float = 1.0  # Seconds; doubles per retry unless Retry-After is given
+    mcp_retry_max_delay: float = 30.0
+
+    # Web Crawl Configuration
+    crawl_page_limit: int = 50  # Pages per crawl
+    crawl_concurrency: int = 4  # Pages chunked and embedded at once
+    crawl_poll_initial_delay: float = 1.0  # Seconds; doubles while no new pages arrive
+    crawl_poll_max_delay: float = 15.0
+    crawl_timeout: float = 900.0  # Seconds before an unfinished crawl is failed
 
     # CORS Configuration
     cors_origins: list[str] = [
@@ -1,11 +1,17 @@
 """Pinecone client initialization and utilities."""
 
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
 from pinecone import Pinecone, ServerlessSpec
 from app.config import get_settings
 
 
 _pinecone_client: Pinecone | None = None
 _pinecone_index = None
+_async_index: "AsyncPineconeIndex | None" = None
 
 
 def get_pinecone_client() -> Pinecone:
@@ -43,11 +49,121 @@ def get_pinecone_index():
                 )
             )
 
-        _pinecone_index = pc.Index(settings.pinecone_index_name)
+        _pinecone_index = pc.Index(
+            settings.pinecone_index_name,
+            pool_threads=settings.pinecone_pool_threads
+        )
 
     return _pinecone_index
 
 
+class AsyncPineconeIndex:
+    """
+    Async facade over the synchronous Pinecone index.
+
+    Calls run on a bounded thread pool, so the event loop is never blocked
+    on a network round trip, and reuse the index's HTTP connection pool.
+    Every call has a timeout, and upserts send their batches in parallel.
+    """
+
+    def __init__(self, index: Any, max_workers: int = 8, timeout: float = 10.0) -> None:
+        """
+        Initialize async index.
+
+        Args:
+            index: Synchronous Pinecone index
+            max_workers: Maximum concurrent Pinecone requests
+            timeout: Per-call timeout in seconds
+        """
+        self.index = index
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="pinecone"
+        )
+
+    async def _call(self, method: Callable[..., Any], **kwargs: Any) -> Any:
+        """Run an index method on the thread pool with a timeout."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(method, _request_timeout=self.timeout, **kwargs)
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, call),
+            timeout=self.timeout
+        )
+
+    async def query(self, **kwargs: Any) -> Any:
+        """Query the index (same arguments as `Index.query`)."""
+        return await self._call(self.index.query, **kwargs)
+
+    async def upsert(self, vectors: list[dict[str, Any]], batch_size: int = 100) -> int:
+        """
+        Upsert vectors, sending batches concurrently.
+
+        Args:
+            vectors: Vectors with `id`, `values` and `metadata`
+            batch_size: Vectors per request
+
+        Returns:
+            Number of vectors upserted
+        """
+        await asyncio.gather(*(
+            self._call(self.index.upsert, vectors=vectors[i:i + batch_size])
+            for i in range(0, len(vectors), batch_size)
+        ))
+        return len(vectors)
+
+    async def delete(
+        self,
+        ids: list[str] | None = None,
+        filter: dict[str, Any] | None = None,
+        batch_size: int = 1000
+    ) -> None:
+        """
+        Delete vectors by ID (in concurrent batches) or by metadata filter.
+
+        Args:
+            ids: Vector IDs to delete
+            filter: Metadata filter selecting vectors to delete
+            batch_size: IDs per request
+        """
+        if filter is not None:
+            await self._call(self.index.delete, filter=filter)
+            return
+
+        await asyncio.gather(*(
+            self._call(self.index.delete, ids=ids[i:i + batch_size])
+            for i in range(0, len(ids or []), batch_size)
+        ))
+
+    def close(self) -> None:
+        """Release the thread pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_async_index() -> AsyncPineconeIndex:
+    """Get async Pinecone index instance."""
+    global _async_index
+
+    if _async_index is None:
+        settings = get_settings()
+        _async_index = AsyncPineconeIndex(
+            get_pinecone_index(),
+            max_workers=settings.pinecone_pool_threads,
+            timeout=settings.pinecone_timeout_seconds
+        )
+
+    return _async_index
+
+
 async def init_pinecone() -> None:
     """Initialize Pinecone index."""
-    get_pinecone_index()
+    get_async_index()
+
+
+def close_pinecone() -> None:
+    """Release Pinecone resources."""
+    global _async_index
+
+    if _async_index is not None:
+        _async_index.close()
+        _async_index = None
@@ -1,28 +1,64 @@
 """PostgreSQL database client and models."""
 
+import json
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Float, ForeignKey, create_engine
+from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Float, ForeignKey, Index, create_engine, event, insert, text
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base, relationship
 
 from app.config import get_settings
+from app.metrics import observe_stage, track_stage
 
 Base = declarative_base()
 
+# Schema changes for databases created before the models gained them.
+# `create_all` only creates missing tables, so columns and indexes added to
+# existing tables are applied at startup. Every statement is idempotent, and
+# indexes are built CONCURRENTLY so writes are not blocked meanwhile.
+SCHEMA_UPGRADES = [
+    # Duplicate upload detection
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_content_hash "
+    "ON documents (content_hash)",
+    # Keyset pagination of document and conversation listings
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_created_at_id "
+    "ON documents (created_at DESC, id DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_source_type_created_at_id "
+    "ON documents (source_type, created_at DESC, id DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_updated_at_id "
+    "ON conversations (updated_at DESC, id DESC)",
+    # Conversation history loads and re-crawl lookups
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation_id_created_at "
+    "ON messages (conversation_id, created_at)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_source_url "
+    "ON documents (source_url)",
+]
+
 
 class Document(Base):
     """Document metadata table."""
 
     __tablename__ = "documents"
+    __table_args__ = (
+        # Keyset pagination of document listings, with and without a type filter
+        Index("ix_documents_created_at_id", text("created_at DESC"), text("id DESC")),
+        Index(
+            "ix_documents_source_type_created_at_id",
+            "source_type", text("created_at DESC"), text("id DESC")
+        ),
+    )
 
     id = Column(String, primary_key=True)
     title = Column(String, nullable=False)
     source_type = Column(String, nullable=False)
-    source_url = Column(String, nullable=True)
+    source_url = Column(String, nullable=True, index=True)  # Re-crawls reuse the document
     file_path = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)  # SHA-256 of the uploaded file
     total_pages = Column(Integer, nullable=True)
     total_tokens = Column(Integer, nullable=True)
     chunk_count = Column(Integer, default=0)
@@ -32,7 +68,14 @@ class Document(Base):
     processed_at = Column(DateTime, nullable=True)
 
     # Relationships
-    chunks = relationship("Chunk", back_populates="document", cascade="all, delete-orphan")
+    # Chunk rows are removed by the ON DELETE CASCADE foreign key rather than
+    # loaded and deleted one by one
+    chunks = relationship(
+        "Chunk",
+        back_populates="document",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
 
 class Chunk(Base):
@@ -53,10 +96,74 @@ class Chunk(Base):
     document = relationship("Document", back_populates="chunks")
 
 
+# Column order used when copying chunk rows
+CHUNK_COPY_COLUMNS = [
+    "id",
+    "document_id",
+    "text",
+    "chunk_index",
+    "page_number",
+    "token_count",
+    "metadata",
+    "created_at",
+]
+
+
+async def bulk_insert_chunks(session: AsyncSession, rows: list[dict[str, Any]]) -> int:
+    """
+    Insert chunk rows in bulk inside the session's current transaction.
+
+    Uses PostgreSQL COPY (asyncpg `copy_records_to_table`) when running on
+    asyncpg, and an executemany INSERT on other drivers.
+
+    Args:
+        session: Active database session
+        rows: Chunk rows keyed by `Chunk` attribute names
+
+    Returns:
+        Number of rows inserted
+    """
+    if not rows:
+        return 0
+
+    connection = await session.connection()
+
+    if connection.dialect.driver == "asyncpg":
+        raw_connection = await connection.get_raw_connection()
+        records = [
+            (
+                row["id"],
+                row["document_id"],
+                row["text"],
+                row["chunk_index"],
+                row.get("page_number"),
+                row.get("token_count"),
+                json.dumps(row.get("chunk_metadata") or {}),
+                row.get("created_at") or datetime.utcnow(),
+            )
+            for row in rows
+        ]
+        # COPY bypasses SQLAlchemy's statement events, so time it here
+        with track_stage("db"):
+            await raw_connection.driver_connection.copy_records_to_table(
+                Chunk.__tablename__,
+                records=records,
+                columns=CHUNK_COPY_COLUMNS
+            )
+    else:
+        await session.execute(insert(Chunk), rows)
+
+    return len(rows)
+
+
 class Conversation(Base):
     """Conversation table."""
 
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Keyset pagination of conversation listings
+        Index("ix_conversations_updated_at_id", text("updated_at DESC"), text("id DESC")),
+    )
 
     id = Column(String, primary_key=True)
     title = Column(String, nullable=True)
@@ -72,6 +179,10 @@ class Message(Base):
     """Message table."""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # History loads filter by conversation and order by time
+        Index("ix_messages_conversation_id_created_at", "conversation_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
@@ -87,8 +198,34 @@ class Message(Base):
     conversation = relationship("Conversation", back_populates="messages")
 
 
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Note when a statement is sent (`before_cursor_execute` event)."""
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Record a statement's execution as the `db` stage (`after_cursor_execute` event)."""
+    observe_stage("db", time.perf_counter() - conn.info["statement_start"].pop())
+
+
+def _record_statement_error(exception_context) -> None:
+    """Record a failed statement as a `db` stage failure (`handle_error` event)."""
+    conn = exception_context.connection
+    starts = conn.info.get("statement_start") if conn is not None else None
+    if starts:
+        observe_stage("db", time.perf_counter() - starts.pop(), failed=True)
+
+
 class DatabaseSession:
-    """Database session manager."""
+    """
+    Database session manager.
+
+    Owns the connection pool. Sessions check out their connection as soon
+    as they open, so the time spent waiting for the pool is measured and
+    reported by `pool_stats` and the `db_checkout` stage. The `db` stage
+    times statements and commits only, not the work done while a session
+    is open.
+    """
 
     def __init__(self) -> None:
         """Initialize database session."""
@@ -99,22 +236,88 @@ class DatabaseSession:
         if db_url.startswith("postgresql://"):
             db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+        connect_args: dict[str, Any] = {}
+        if db_url.startswith("postgresql+asyncpg://"):
+            # SQLAlchemy's prepared-statement cache and asyncpg's own (0 disables
+            # both, as required behind PgBouncer in transaction mode)
+            connect_args = {
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+                "statement_cache_size": settings.db_statement_cache_size,
+            }
+
         self.engine = create_async_engine(
             db_url,
             echo=settings.debug,
-            future=True
+            future=True,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            connect_args=connect_args
         )
+        event.listen(self.engine.sync_engine, "before_cursor_execute", _start_statement_timer)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", _record_statement)
+        event.listen(self.engine.sync_engine, "handle_error", _record_statement_error)
         self.async_session = async_sessionmaker(
             self.engine,
             class_=AsyncSession,
             expire_on_commit=False
         )
 
+        self.max_overflow = settings.db_max_overflow
+        self.acquisitions = 0
+        self.acquire_timeouts = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+
+    def pool_stats(self) -> dict[str, Any]:
+        """
+        Live connection pool statistics.
+
+        Returns:
+            Pool size and usage, plus checkout counts and wait times
+            (in milliseconds) since startup
+        """
+        pool = self.engine.pool
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": self.max_overflow,
+            "acquisitions": self.acquisitions,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_wait_ms_avg": (
+                self.acquire_wait_total / self.acquisitions * 1000 if self.acquisitions else 0.0
+            ),
+            "acquire_wait_ms_max": self.acquire_wait_max * 1000,
+        }
+
+    async def _acquire(self, session: AsyncSession) -> None:
+        """Check out the session's connection, recording the wait."""
+        start = time.perf_counter()
+        try:
+            await session.connection()
+        except PoolTimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        wait = time.perf_counter() - start
+        self.acquisitions += 1
+        self.acquire_wait_total += wait
+        self.acquire_wait_max = max(self.acquire_wait_max, wait)
+
     async def init_db(self) -> None:
-        """Initialize database tables."""
+        """Initialize database tables and apply schema upgrades."""
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        async with self.engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
+
     async def close(self) -> None:
         """Close database connection."""
         await self.engine.dispose()
@@ -123,9 +326,12 @@ class DatabaseSession:
     async def session(self) -> AsyncGenerator[AsyncSession, None]:
         """Get database session context manager."""
         async with self.async_session() as session:
+            with track_stage("db_checkout", errors=SQLAlchemyError):
+                await self._acquire(session)
             try:
                 yield session
-                await session.commit()
+                with track_stage("db", errors=SQLAlchemyError):
+                    await session.commit()
             except Exception:
                 await session.rollback()
                 raise
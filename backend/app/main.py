@@ -1,17 +1,32 @@
 """FastAPI main application."""
 
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.routing import Match
 
 from app.config import get_settings
-from app.db import init_db
-from app.db.pinecone_client import init_pinecone
+from app.db import get_db, init_db
+from app.metrics import (
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+    current_endpoint,
+    register_gauges,
+    render,
+)
+from app.services.vector_store import init_vector_store
+from app.services.container import ServiceContainer
+from app.services.document_processor import shutdown_process_pool
+from app.services.lexical_index import init_lexical_index
 from app.api import chat, documents
 
 settings = get_settings()
 
+# Allowance for multipart boundaries and form fields sent alongside the file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -23,9 +38,31 @@ async def lifespan(app: FastAPI):
     print("📊 Initializing PostgreSQL...")
     await init_db()
 
-    # Initialize Pinecone
-    print("🔍 Initializing Pinecone...")
-    await init_pinecone()
+    # Initialize vector store (Pinecone or local)
+    print(f"🔍 Initializing vector store ({settings.vector_store_backend})...")
+    await init_vector_store()
+
+    # Build the keyword index from stored chunks
+    if settings.lexical_index_enabled:
+        print("🔤 Loading lexical index...")
+        await init_lexical_index()
+
+    # Shared clients and services for every request
+    services = ServiceContainer(settings)
+    app.state.services = services
+
+    # Connection pool usage, read at scrape time
+    register_gauges("db_pool", "Database connection pool statistic.", get_db().pool_stats)
+
+    # Start ingestion workers and pick up jobs interrupted by a restart
+    print("📥 Starting ingestion workers...")
+    services.ingestion_queue.start()
+    resumed = await services.ingestion_queue.resume()
+    if resumed:
+        print(f"📥 Resumed {resumed} unfinished ingestion jobs")
+    interrupted = await services.crawler.fail_interrupted()
+    if interrupted:
+        print(f"🕸️  Marked {interrupted} interrupted crawls as failed")
 
     print("✅ API Ready!")
 
@@ -33,6 +70,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     print("👋 Shutting down...")
+    await services.aclose()
+    shutdown_process_pool()
 
 
 app = FastAPI(
@@ -52,6 +91,58 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Reject uploads whose declared size exceeds `max_file_size`.
+
+    Runs before the multipart body is parsed, so oversized files are
+    refused without being received. Uploads without a Content-Length are
+    still capped while being written to disk.
+    """
+    if request.method == "POST" and request.url.path == "/api/documents/upload":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            if int(content_length) > settings.max_file_size + UPLOAD_FORM_OVERHEAD:
+                return JSONResponse(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    content={"detail": f"File exceeds maximum size of {settings.max_file_size} bytes"}
+                )
+
+    return await call_next(request)
+
+
+def route_template(request: Request) -> str:
+    """Path template of the route serving a request (bounded label values)."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Count requests and time them per route.
+
+    The route template is also made available to pipeline stage metrics
+    through `current_endpoint` for the duration of the request.
+    """
+    endpoint = route_template(request)
+    token = current_endpoint.set(endpoint)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS.labels(endpoint=endpoint, method=request.method, status=str(status_code)).inc()
+        HTTP_REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+        current_endpoint.reset(token)
+
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(documents.router)
@@ -74,6 +165,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request, pipeline stage, token and cache metrics for Prometheus."""
+    try:
+        body, content_type = render()
+    except ImportError as e:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": str(e)})
+    return Response(body, media_type=content_type)
+
+
+@app.get("/metrics/db")
+async def database_metrics():
+    """Connection pool usage and checkout wait times."""
+    return get_db().pool_stats()
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
@@ -0,0 +1,193 @@
+"""Prometheus metrics for the API and the RAG pipeline (requires prometheus-client)."""
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - optional dependency
+    CONTENT_TYPE_LATEST = REGISTRY = Counter = Histogram = generate_latest = GaugeMetricFamily = None
+
+# Route template of the request being served ("background" for workers)
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="background")
+
+# Latency buckets in seconds, from cache hits to slow LLM answers
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NoopMetric:
+    """Stand-in for metrics when prometheus-client is not installed."""
+
+    def labels(self, **labels: str) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _counter(name: str, documentation: str, labelnames: tuple[str, ...]) -> Any:
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def _histogram(name: str, documentation: str, labelnames: tuple[str, ...]) -> Any:
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, buckets=DEFAULT_BUCKETS)
+
+
+HTTP_REQUESTS = _counter(
+    "http_requests_total", "HTTP requests by route, method and status.",
+    ("endpoint", "method", "status")
+)
+HTTP_REQUEST_SECONDS = _histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("endpoint",)
+)
+STAGE_SECONDS = _histogram(
+    "rag_stage_duration_seconds",
+    "Latency of pipeline stages (embed, vector_query, rerank, synthesize, db, ...).",
+    ("stage", "endpoint")
+)
+STAGE_ERRORS = _counter(
+    "rag_errors_total", "Pipeline stage failures.", ("stage", "endpoint")
+)
+TOKENS = _counter(
+    "rag_tokens_total", "Claude tokens by kind (input, output, cache_read, cache_creation).",
+    ("kind", "endpoint")
+)
+CACHE_REQUESTS = _counter(
+    "rag_cache_requests_total", "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result", "endpoint")
+)
+
+
+class _GaugeCollector:
+    """Exports the numeric values returned by a callback as gauges at scrape time."""
+
+    def __init__(
+        self,
+        prefix: str,
+        documentation: str,
+        callback: Callable[[], dict[str, float]]
+    ) -> None:
+        self.prefix = prefix
+        self.documentation = documentation
+        self.callback = callback
+
+    def describe(self) -> list[Any]:
+        # Values are only known at scrape time; skip the registration-time collect
+        return []
+
+    def collect(self) -> Iterator[Any]:
+        try:
+            values = self.callback()
+        except Exception:
+            return
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            yield GaugeMetricFamily(f"{self.prefix}_{key}", self.documentation, value=value)
+
+
+_gauge_collectors: dict[str, _GaugeCollector] = {}
+
+
+def register_gauges(
+    prefix: str,
+    documentation: str,
+    callback: Callable[[], dict[str, float]]
+) -> None:
+    """
+    Export values read at scrape time, one gauge per key.
+
+    Registering a prefix again replaces its callback.
+
+    Args:
+        prefix: Gauge name prefix (`{prefix}_{key}`)
+        documentation: Help text shared by the gauges
+        callback: Returns the current values
+    """
+    if REGISTRY is None:
+        return
+
+    previous = _gauge_collectors.pop(prefix, None)
+    if previous is not None:
+        REGISTRY.unregister(previous)
+
+    collector = _GaugeCollector(prefix, documentation, callback)
+    REGISTRY.register(collector)
+    _gauge_collectors[prefix] = collector
+
+
+def render() -> tuple[bytes, str]:
+    """
+    Render all metrics for scraping.
+
+    Returns:
+        Exposition body and its content type
+
+    Raises:
+        ImportError: If prometheus-client is not installed
+    """
+    if generate_latest is None:
+        raise ImportError("Metrics require prometheus-client (install the `metrics` extra)")
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def observe_stage(stage: str, seconds: float, failed: bool = False) -> None:
+    """Record one run of a pipeline stage for the current endpoint."""
+    endpoint = current_endpoint.get()
+    if failed:
+        STAGE_ERRORS.labels(stage=stage, endpoint=endpoint).inc()
+    STAGE_SECONDS.labels(stage=stage, endpoint=endpoint).observe(seconds)
+
+
+@contextmanager
+def track_stage(
+    stage: str,
+    errors: type[BaseException] | tuple[type[BaseException], ...] = Exception
+) -> Iterator[None]:
+    """
+    Time a pipeline stage and count its failures.
+
+    Observations are labelled with the current request's endpoint.
+
+    Args:
+        stage: Stage name
+        errors: Exception types counted as failures of this stage
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except errors:
+        failed = True
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start, failed)
+
+
+def record_cache(cache: str, hits: int, misses: int) -> None:
+    """Count cache hits and misses for the current endpoint."""
+    endpoint = current_endpoint.get()
+    if hits:
+        CACHE_REQUESTS.labels(cache=cache, result="hit", endpoint=endpoint).inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache=cache, result="miss", endpoint=endpoint).inc(misses)
+
+
+def record_tokens(metadata: dict[str, Any]) -> None:
+    """Count Claude token usage from generation metadata."""
+    endpoint = current_endpoint.get()
+    for kind in ("input", "output", "cache_read", "cache_creation"):
+        amount = metadata.get(f"{kind}_input_tokens" if kind.startswith("cache") else f"{kind}_tokens")
+        if amount:
+            TOKENS.labels(kind=kind, endpoint=endpoint).inc(amount)
@@ -32,6 +32,12 @@ class ChatRequest(BaseModel):
         description="Metadata filters for retrieval (e.g., {'source_type': 'competitor_report'})"
     )
     top_k: int = Field(5, ge=1, le=20, description="Number of documents to retrieve")
+    lexical_weight: float | None = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Weight of keyword (BM25) matches in hybrid retrieval; 0 = vector only"
+    )
     stream: bool = Field(False, description="Enable streaming response")
 
 
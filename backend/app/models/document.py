@@ -1,8 +1,10 @@
 """Document-related Pydantic models."""
 
+import re
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field, HttpUrl
+from typing import Any
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
 
 class DocumentType(str, Enum):
@@ -50,7 +52,7 @@ class DocumentChunk(BaseModel):
     chunk_index: int = Field(..., description="Position in document")
     page_number: int | None = Field(None, description="Page number if available")
     token_count: int | None = Field(None, description="Token count for this chunk")
-    metadata: dict[str, str] = Field(default_factory=dict, description="Chunk-level metadata")
+    metadata: dict[str, Any] = Field(default_factory=dict, description="Chunk-level metadata")
 
 
 class DocumentUploadRequest(BaseModel):
@@ -71,6 +73,17 @@ class DocumentUploadResponse(BaseModel):
     message: str = Field(..., description="Status message")
 
 
+class IngestionStatusResponse(BaseModel):
+    """Processing progress of an uploaded document."""
+
+    document_id: str = Field(..., description="Document identifier (also the job ID)")
+    status: DocumentStatus = Field(..., description="Processing status")
+    stage: str | None = Field(None, description="Current ingestion stage")
+    progress: float = Field(0.0, ge=0.0, le=1.0, description="Completion fraction")
+    chunk_count: int = Field(0, description="Number of chunks created")
+    error: str | None = Field(None, description="Failure reason if processing failed")
+
+
 class WebCrawlRequest(BaseModel):
     """Request to crawl a website."""
 
@@ -79,14 +92,25 @@ class WebCrawlRequest(BaseModel):
     max_depth: int = Field(1, ge=1, le=3, description="Crawl depth (1 = single page)")
     include_patterns: list[str] = Field(
         default_factory=list,
-        description="URL patterns to include"
+        description="Regex patterns; only URL paths matching one are indexed"
     )
     exclude_patterns: list[str] = Field(
         default_factory=list,
-        description="URL patterns to exclude"
+        description="Regex patterns; URL paths matching any are skipped"
     )
     metadata: dict[str, str] = Field(default_factory=dict, description="Additional metadata")
 
+    @field_validator("include_patterns", "exclude_patterns")
+    @classmethod
+    def validate_patterns(cls, patterns: list[str]) -> list[str]:
+        """Reject patterns that are not valid regular expressions."""
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid URL pattern {pattern!r}: {e}") from None
+        return patterns
+
 
 class WebCrawlResponse(BaseModel):
     """Response after web crawl."""
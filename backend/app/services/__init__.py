@@ -1,11 +1,20 @@
 """Business logic services."""
 
-from .rag_engine import RAGEngine
-from .embedding import EmbeddingService
-from .document_processor import DocumentProcessor
-
-__all__ = [
-    "RAGEngine",
-    "EmbeddingService",
-    "DocumentProcessor",
-]
+import importlib
+from typing import Any
+
+# Imported on first access, so importing one service module (as document
+# pool workers do) does not load every client library
+_EXPORTS = {
+    "RAGEngine": ".rag_engine",
+    "EmbeddingService": ".embedding",
+    "DocumentProcessor": ".document_processor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
@@ -0,0 +1,304 @@
+"""Semantic cache for RAG answers."""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from app.config import get_settings
+
+
+def _normalize(vector: list[float]) -> np.ndarray:
+    """Scale a vector to unit length so dot product equals cosine."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    if norm == 0:
+        return array
+    return array / norm
+
+
+def _scope_key(
+    filters: dict[str, Any] | None,
+    top_k: int,
+    lexical_weight: float | None = None
+) -> str:
+    """Build the exact-match part of the cache key."""
+    return json.dumps(
+        {"filters": filters or {}, "top_k": top_k, "lexical_weight": lexical_weight},
+        sort_keys=True
+    )
+
+
+@dataclass
+class CachedAnswer:
+    """Single cached RAG answer."""
+
+    query: str
+    result: dict[str, Any]
+    document_ids: set[str]
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class _Partition:
+    """
+    Normalized embeddings of one scope and dimension, one row per entry.
+
+    Rows are scored with a single matrix product; removed rows are reused
+    by later entries.
+    """
+
+    def __init__(self, dimension: int) -> None:
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        # Entry ID per row, -1 for free rows
+        self.entry_ids = np.zeros(0, dtype=np.int64)
+        self.created_at = np.zeros(0, dtype=np.float64)
+        self.rows: dict[int, int] = {}
+        self.free: list[int] = []
+        self.size = 0
+
+    def add(self, entry_id: int, vector: np.ndarray, created_at: float) -> None:
+        """Store an entry's embedding in a free row."""
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == len(self.entry_ids):
+                self._grow(max(16, 2 * self.size))
+            row = self.size
+            self.size += 1
+
+        self.vectors[row] = vector
+        self.entry_ids[row] = entry_id
+        self.created_at[row] = created_at
+        self.rows[entry_id] = row
+
+    def remove(self, entry_id: int) -> None:
+        """Free an entry's row."""
+        row = self.rows.pop(entry_id)
+        self.entry_ids[row] = -1
+        self.free.append(row)
+
+    def best(self, query: np.ndarray, created_after: float) -> tuple[int, float, list[int]]:
+        """
+        Score every live row against a normalized query.
+
+        Args:
+            query: Normalized query embedding
+            created_after: Rows created at or before this time are expired
+
+        Returns:
+            Best entry ID (-1 if none) and its score, and the expired entry IDs
+        """
+        entry_ids = self.entry_ids[:self.size]
+        live = entry_ids >= 0
+        expired = live & (self.created_at[:self.size] < created_after)
+
+        scores = self.vectors[:self.size] @ query
+        scores[~live | expired] = -np.inf
+        row = int(np.argmax(scores))
+
+        best_id = int(entry_ids[row]) if np.isfinite(scores[row]) else -1
+        return best_id, float(scores[row]), entry_ids[expired].tolist()
+
+    def _grow(self, capacity: int) -> None:
+        vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        self.vectors = vectors
+        self.entry_ids = np.concatenate(
+            [self.entry_ids, np.full(capacity - len(self.entry_ids), -1, dtype=np.int64)]
+        )
+        self.created_at = np.concatenate(
+            [self.created_at, np.zeros(capacity - len(self.created_at))]
+        )
+
+
+class SemanticAnswerCache:
+    """
+    Cache of RAG answers keyed on query embedding similarity.
+
+    Entries are partitioned by retrieval options (filters, top_k, hybrid
+    weight) and matched by cosine similarity of the query embedding; each
+    partition keeps its embeddings in one matrix, so a lookup is a single
+    matrix-vector product. Entries expire after a TTL and are dropped when
+    any document they cite is deleted or re-indexed.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1000
+    ) -> None:
+        """
+        Initialize answer cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime in seconds
+            max_entries: Maximum number of cached answers (LRU eviction)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Entries in LRU order, with the (scope, dimension) partition holding their embedding
+        self._entries: OrderedDict[int, tuple[tuple[str, int], CachedAnswer]] = OrderedDict()
+        self._partitions: dict[tuple[str, int], _Partition] = {}
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop an entry and free its embedding row."""
+        key, _ = self._entries.pop(entry_id)
+        partition = self._partitions[key]
+        partition.remove(entry_id)
+        if not partition.rows:
+            del self._partitions[key]
+
+    def lookup(
+        self,
+        query_embedding: list[float],
+        filters: dict[str, Any] | None,
+        top_k: int,
+        lexical_weight: float | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query_embedding: Embedding of the incoming query
+            filters: Retrieval filters of the incoming query
+            top_k: Number of documents requested
+            lexical_weight: Hybrid retrieval weight of the incoming query
+
+        Returns:
+            Copy of the cached result with cache provenance, or None
+        """
+        now = time.time()
+        key = (_scope_key(filters, top_k, lexical_weight), len(query_embedding))
+        partition = self._partitions.get(key)
+
+        best_id: int | None = None
+        best_score = self.similarity_threshold
+
+        if partition is not None:
+            entry_id, score, expired = partition.best(
+                _normalize(query_embedding), now - self.ttl_seconds
+            )
+            for expired_id in expired:
+                self._remove(expired_id)
+            if entry_id >= 0 and score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        entry = self._entries[best_id][1]
+        entry.hits += 1
+
+        result = copy.deepcopy(entry.result)
+        result.setdefault("metadata", {})["cache"] = {
+            "hit": True,
+            "similarity": best_score,
+            "cached_query": entry.query,
+            "cached_at": entry.created_at,
+            "age_seconds": now - entry.created_at,
+            "entry_hits": entry.hits,
+        }
+        return result
+
+    def store(
+        self,
+        query: str,
+        query_embedding: list[float],
+        filters: dict[str, Any] | None,
+        top_k: int,
+        result: dict[str, Any],
+        document_ids: set[str],
+        lexical_weight: float | None = None
+    ) -> None:
+        """
+        Cache an answer.
+
+        Args:
+            query: Original user query
+            query_embedding: Embedding of the query
+            filters: Retrieval filters used
+            top_k: Number of documents requested
+            result: RAG result to cache
+            document_ids: IDs of documents cited by the answer
+            lexical_weight: Hybrid retrieval weight used
+        """
+        entry = CachedAnswer(
+            query=query,
+            result=copy.deepcopy(result),
+            document_ids=set(document_ids)
+        )
+        key = (_scope_key(filters, top_k, lexical_weight), len(query_embedding))
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(len(query_embedding))
+
+        partition.add(self._next_id, _normalize(query_embedding), entry.created_at)
+        self._entries[self._next_id] = (key, entry)
+        self._next_id += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_document(self, document_id: str) -> int:
+        """
+        Drop every cached answer citing a document.
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            Number of entries removed
+        """
+        stale = [
+            entry_id
+            for entry_id, (_, entry) in self._entries.items()
+            if document_id in entry.document_ids
+        ]
+        for entry_id in stale:
+            self._remove(entry_id)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._partitions.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+# Singleton instance
+_answer_cache: SemanticAnswerCache | None = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get answer cache instance."""
+    global _answer_cache
+    if _answer_cache is None:
+        settings = get_settings()
+        _answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+            max_entries=settings.answer_cache_max_entries
+        )
+    return _answer_cache
@@ -0,0 +1,84 @@
+"""Process-wide service container and FastAPI dependencies."""
+
+import anthropic
+import httpx
+import openai
+from fastapi import Request
+
+from app.config import Settings, get_settings
+from app.services.vector_store import close_vector_store, get_vector_store
+from app.services.conversation_cache import ConversationHistoryCache
+from app.services.crawler import WebCrawler
+from app.services.document_processor import DocumentProcessor
+from app.services.embedding import EmbeddingService
+from app.services.ingestion import IngestionQueue
+from app.services.mcp_client import MCPClient
+from app.services.rag_engine import RAGEngine
+from app.services.reranker import close_reranker
+
+
+class ServiceContainer:
+    """
+    Long-lived clients and services shared by every request.
+
+    Created once in the application lifespan. It owns one HTTP connection
+    pool per provider (Anthropic, OpenAI, Firecrawl), the configured vector store and
+    the services built on them, and closes them all on shutdown.
+    """
+
+    def __init__(self, settings: Settings | None = None) -> None:
+        """
+        Initialize service container.
+
+        Args:
+            settings: Application settings (defaults to the cached settings)
+        """
+        self.settings = settings or get_settings()
+
+        limits = httpx.Limits(
+            max_connections=self.settings.http_max_connections,
+            max_keepalive_connections=self.settings.http_max_keepalive_connections
+        )
+        self.anthropic = anthropic.AsyncAnthropic(
+            api_key=self.settings.anthropic_api_key,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=limits)
+        )
+        # EmbeddingService retries with its own backoff
+        self.openai = openai.AsyncOpenAI(
+            api_key=self.settings.openai_api_key,
+            http_client=openai.DefaultAsyncHttpxClient(limits=limits),
+            max_retries=0
+        )
+
+        self.embedding_service = EmbeddingService(client=self.openai)
+        self.rag = RAGEngine(
+            vector_store=get_vector_store(),
+            claude=self.anthropic,
+            embedding_service=self.embedding_service
+        )
+        self.doc_processor = DocumentProcessor()
+        self.ingestion_queue = IngestionQueue(self.doc_processor, self.rag)
+        self.mcp = MCPClient()
+        self.crawler = WebCrawler(self.mcp, self.doc_processor, self.rag)
+        self.conversation_cache = ConversationHistoryCache(
+            max_conversations=self.settings.conversation_cache_max_conversations,
+            window_size=self.settings.conversation_history_window,
+            trim_step=self.settings.context_history_block_messages
+        )
+
+    async def aclose(self) -> None:
+        """Stop background workers and close shared clients."""
+        await self.ingestion_queue.stop()
+        await self.crawler.stop()
+        await self.mcp.close()
+        await self.anthropic.close()
+        await self.openai.close()
+        if self.embedding_service.cache is not None:
+            self.embedding_service.cache.close()
+        close_vector_store()
+        close_reranker()
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """FastAPI dependency returning the application's service container."""
+    return request.app.state.services
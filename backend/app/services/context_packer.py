@@ -0,0 +1,234 @@
+"""Token-budgeted packing of retrieved context and conversation history."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import tiktoken
+
+from app.services.lexical_index import tokenize
+
+# Approximate per-message framing added by the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " [...]"
+
+
+def format_context_doc(index: int, doc: dict[str, Any]) -> str:
+    """Render a retrieved document as a numbered, citable context block."""
+    source_info = f"Source: {doc['source']}"
+    if doc.get("page"):
+        page_end = (doc.get("metadata") or {}).get("page_end")
+        if page_end and page_end != doc["page"]:
+            source_info += f", Pages: {doc['page']}-{page_end}"
+        else:
+            source_info += f", Page: {doc['page']}"
+    return f"[Document {index}] {source_info}\n{doc['text']}\n"
+
+
+def _shingles(text: str, size: int = 3) -> set[tuple[str, ...]]:
+    """Word n-grams used for near-duplicate detection."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {tuple(tokens)}
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    """Jaccard similarity of two sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class PackedContext:
+    """Result of packing context and history into a token budget."""
+
+    docs: list[dict[str, Any]]
+    history: list[dict[str, str]]
+    tokens: dict[str, int] = field(default_factory=dict)
+    dropped: dict[str, int] = field(default_factory=dict)
+
+    def stats(self) -> dict[str, Any]:
+        """Per-section token accounting for response metadata."""
+        return {
+            "tokens": self.tokens,
+            "dropped": self.dropped,
+            "chunk_ids": [doc.get("chunk_id") for doc in self.docs],
+        }
+
+
+class ContextPacker:
+    """
+    Fits retrieved chunks and conversation history into an input budget.
+
+    History is kept up to its own cap, dropping the oldest messages in
+    fixed blocks counted from the start of the history, so consecutive
+    turns of a long conversation send the same history prefix and it stays
+    prompt-cacheable. Only if the newest block alone is over the cap are
+    the newest messages kept one by one, truncating the oldest kept turn.
+    Chunks then fill the rest of the
+    budget in relevance (input) order, skipping near-duplicates of chunks
+    already selected. Token counts use the same tiktoken encoding as
+    document chunking, so they are close to, not exactly, Claude's counts.
+    """
+
+    def __init__(
+        self,
+        max_input_tokens: int = 16000,
+        history_max_tokens: int = 4000,
+        duplicate_threshold: float = 0.85,
+        encoding: Any | None = None,
+        history_block_messages: int = 8
+    ) -> None:
+        """
+        Initialize context packer.
+
+        Args:
+            max_input_tokens: Budget for prompt, question, history and context
+            history_max_tokens: Cap on tokens spent on conversation history
+            duplicate_threshold: Shingle Jaccard similarity above which a
+                chunk counts as a near-duplicate
+            encoding: tiktoken encoding (defaults to the chunking encoding)
+            history_block_messages: Messages dropped at a time from old history
+        """
+        self.max_input_tokens = max_input_tokens
+        self.history_max_tokens = history_max_tokens
+        self.history_block_messages = max(history_block_messages, 1)
+        self.duplicate_threshold = duplicate_threshold
+        self.encoding = encoding or tiktoken.encoding_for_model("gpt-4")
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.encoding.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most `max_tokens` tokens, marking the cut."""
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        keep = max(max_tokens - self.count_tokens(TRUNCATION_MARKER), 0)
+        return self.encoding.decode(tokens[:keep]) + TRUNCATION_MARKER
+
+    def _pack_history(
+        self,
+        history: list[dict[str, str]],
+        budget: int
+    ) -> tuple[list[dict[str, str]], int, int]:
+        """Keep the newest turns within budget; return (turns, tokens, dropped)."""
+        costs = [
+            self.count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            for message in history
+        ]
+
+        # Oldest block boundary whose tail fits: the kept prefix only changes
+        # when the history grows past another block
+        kept: list[dict[str, str]] | None = None
+        used = sum(costs)
+        for start in range(0, len(history), self.history_block_messages):
+            if used <= budget:
+                kept = history[start:]
+                break
+            used -= sum(costs[start:start + self.history_block_messages])
+
+        if kept is None:
+            kept, used = self._pack_newest(history, costs, budget)
+
+        # Claude expects the conversation to open with a user turn
+        while kept and kept[0]["role"] != "user":
+            used -= self.count_tokens(kept[0]["content"]) + MESSAGE_OVERHEAD_TOKENS
+            kept = kept[1:]
+
+        return kept, used, len(history) - len(kept)
+
+    def _pack_newest(
+        self,
+        history: list[dict[str, str]],
+        costs: list[int],
+        budget: int
+    ) -> tuple[list[dict[str, str]], int]:
+        """Keep the newest messages one by one, truncating the oldest kept turn."""
+        kept: list[dict[str, str]] = []
+        used = 0
+
+        for message, cost in zip(reversed(history), reversed(costs)):
+            if used + cost <= budget:
+                kept.append(message)
+                used += cost
+                continue
+
+            room = budget - used - MESSAGE_OVERHEAD_TOKENS
+            if room > self.count_tokens(TRUNCATION_MARKER):
+                content = self.truncate(message["content"], room)
+                kept.append({**message, "content": content})
+                used += self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            break
+
+        kept.reverse()
+        return kept, used
+
+    def pack(
+        self,
+        docs: list[dict[str, Any]],
+        history: list[dict[str, str]] | None,
+        reserved_tokens: int = 0
+    ) -> PackedContext:
+        """
+        Select the context and history to send.
+
+        Args:
+            docs: Retrieved documents, most relevant first
+            history: Conversation history, oldest first
+            reserved_tokens: Tokens already taken by instructions and question
+
+        Returns:
+            Packed documents and history with token accounting
+        """
+        remaining = max(self.max_input_tokens - reserved_tokens, 0)
+
+        packed_history, history_tokens, history_dropped = self._pack_history(
+            history or [], min(self.history_max_tokens, remaining)
+        )
+        remaining -= history_tokens
+
+        selected: list[dict[str, Any]] = []
+        selected_shingles: list[set] = []
+        context_tokens = 0
+        duplicates = 0
+        over_budget = 0
+
+        for doc in docs:
+            shingles = _shingles(doc["text"])
+            if any(_jaccard(shingles, s) >= self.duplicate_threshold for s in selected_shingles):
+                duplicates += 1
+                continue
+
+            cost = self.count_tokens(format_context_doc(len(selected) + 1, doc))
+            if cost > remaining - context_tokens:
+                if selected or remaining - context_tokens <= 0:
+                    over_budget += 1
+                    continue
+                # Always send something: trim the most relevant chunk to fit
+                header = cost - self.count_tokens(doc["text"])
+                doc = {**doc, "text": self.truncate(doc["text"], remaining - header)}
+                cost = self.count_tokens(format_context_doc(1, doc))
+
+            selected.append(doc)
+            selected_shingles.append(shingles)
+            context_tokens += cost
+
+        return PackedContext(
+            docs=selected,
+            history=packed_history,
+            tokens={
+                "budget": self.max_input_tokens,
+                "prompt": reserved_tokens,
+                "history": history_tokens,
+                "context": context_tokens,
+                "total": reserved_tokens + history_tokens + context_tokens,
+            },
+            dropped={
+                "duplicate_chunks": duplicates,
+                "over_budget_chunks": over_budget,
+                "history_messages": history_dropped,
+            }
+        )
@@ -0,0 +1,158 @@
+"""In-process cache of recent conversation history."""
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+
+from app.db import get_db
+from app.db.postgres import Message as DBMessage
+
+# (message id, role, content) in chronological order
+MessageRow = tuple[int, str, str]
+FetchMessages = Callable[[str, int | None, int], Awaitable[list[MessageRow]]]
+
+
+async def fetch_messages(
+    conversation_id: str,
+    after_id: int | None,
+    limit: int
+) -> list[MessageRow]:
+    """
+    Load conversation messages from PostgreSQL.
+
+    Both queries are served by the `(conversation_id, created_at)` index.
+
+    Args:
+        conversation_id: Conversation identifier
+        after_id: Only return messages with a larger ID (None = latest window)
+        limit: Maximum number of messages
+
+    Returns:
+        Messages in chronological order
+    """
+    db = get_db()
+    columns = (DBMessage.id, DBMessage.role, DBMessage.content)
+
+    async with db.session() as session:
+        if after_id is None:
+            stmt = select(*columns).where(
+                DBMessage.conversation_id == conversation_id
+            ).order_by(DBMessage.created_at.desc(), DBMessage.id.desc()).limit(limit)
+            rows = list((await session.execute(stmt)).all())
+            rows.reverse()
+        else:
+            stmt = select(*columns).where(
+                DBMessage.conversation_id == conversation_id,
+                DBMessage.id > after_id
+            ).order_by(DBMessage.created_at, DBMessage.id).limit(limit)
+            rows = list((await session.execute(stmt)).all())
+
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+@dataclass
+class _Window:
+    """Cached tail of one conversation."""
+
+    messages: list[dict[str, str]] = field(default_factory=list)
+    last_id: int = 0
+
+
+class ConversationHistoryCache:
+    """
+    LRU of the most recent messages of active conversations.
+
+    The first load of a conversation reads its latest `window_size`
+    messages; later loads only fetch messages newer than the last one
+    seen and append them, so a chat turn normally costs one small
+    indexed query however long the thread is. Messages written by other
+    processes are picked up the same way. A full window drops its oldest
+    messages `trim_step` at a time, so the history handed to the context
+    packer keeps the same start (and prompt-cache prefix) between trims.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = 1000,
+        window_size: int = 50,
+        fetch: FetchMessages | None = None,
+        trim_step: int = 1
+    ) -> None:
+        """
+        Initialize conversation history cache.
+
+        Args:
+            max_conversations: Conversations kept in memory
+            window_size: Most recent messages kept per conversation
+            fetch: Message loader (defaults to the PostgreSQL query)
+            trim_step: Messages dropped at a time from a full window
+        """
+        self.max_conversations = max_conversations
+        self.window_size = window_size
+        self.trim_step = max(trim_step, 1)
+        self.fetch = fetch or fetch_messages
+        self._windows: OrderedDict[str, _Window] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Number of cached conversations."""
+        return len(self._windows)
+
+    async def load(self, conversation_id: str) -> list[dict[str, str]]:
+        """
+        Get a conversation's recent history in Claude message format.
+
+        Args:
+            conversation_id: Conversation identifier
+
+        Returns:
+            Up to `window_size` most recent messages, oldest first
+        """
+        window = self._windows.get(conversation_id)
+        if window is None:
+            self.misses += 1
+            rows = await self.fetch(conversation_id, None, self.window_size)
+            # A concurrent load may have cached the conversation meanwhile
+            window = self._windows.setdefault(conversation_id, _Window())
+        else:
+            self.hits += 1
+            rows = await self.fetch(conversation_id, window.last_id, self.window_size)
+            if len(rows) >= self.window_size:
+                # Too far behind to append: start over from the latest window
+                rows = await self.fetch(conversation_id, None, self.window_size)
+                window = _Window()
+                self._windows[conversation_id] = window
+
+        for message_id, role, content in rows:
+            if message_id > window.last_id:
+                window.messages.append({"role": role, "content": content})
+                window.last_id = message_id
+
+        excess = len(window.messages) - self.window_size
+        if excess > 0:
+            # Round up to whole steps
+            steps = (excess + self.trim_step - 1) // self.trim_step
+            del window.messages[:steps * self.trim_step]
+
+        self._windows[conversation_id] = window
+        self._windows.move_to_end(conversation_id)
+        while len(self._windows) > self.max_conversations:
+            self._windows.popitem(last=False)
+
+        return list(window.messages)
+
+    def invalidate(self, conversation_id: str) -> None:
+        """Forget a conversation (e.g. after it is deleted)."""
+        self._windows.pop(conversation_id, None)
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "conversations": len(self._windows),
+        }
@@ -0,0 +1,582 @@
+"""Web crawl ingestion through Firecrawl."""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+from urllib.parse import urlsplit
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.db import get_db
+from app.db.postgres import Document as DBDocument
+from app.metrics import track_stage
+from app.models.document import DocumentStatus, DocumentType, WebCrawlRequest
+from app.services.document_processor import text_chunk_id
+from app.services.ingestion import update_document_row
+from app.services.response_cache import content_hash
+
+# Firecrawl crawl job states that will not produce more pages
+FAILED_STATES = {"failed", "cancelled"}
+
+
+class CrawlError(Exception):
+    """Raised when a Firecrawl crawl job fails or times out."""
+
+
+@dataclass
+class CrawledPage:
+    """One page returned by Firecrawl."""
+
+    url: str
+    title: str
+    markdown: str
+
+
+def parse_page(item: dict[str, Any]) -> CrawledPage | None:
+    """
+    Convert a Firecrawl page record to a CrawledPage.
+
+    Returns:
+        The page, or None for error pages and pages without text
+    """
+    metadata = item.get("metadata") or {}
+    url = metadata.get("sourceURL") or metadata.get("url")
+    markdown = item.get("markdown") or ""
+    status_code = metadata.get("statusCode")
+
+    if not url or not markdown.strip():
+        return None
+    if isinstance(status_code, int) and status_code >= 400:
+        return None
+
+    return CrawledPage(url=url, title=metadata.get("title") or url, markdown=markdown)
+
+
+def _path_segments(path: str) -> list[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+@dataclass
+class CrawlScope:
+    """
+    Which crawled URLs belong to a crawl request.
+
+    Pages must be on the base URL's host and below its path, at most
+    `max_depth - 1` path segments deeper (1 = the base page only). Include
+    and exclude patterns are regular expressions searched in the URL path.
+    Firecrawl is given the same limits; they are re-checked here so the
+    request is honoured whatever the crawler returns.
+    """
+
+    base_url: str
+    max_depth: int = 1
+    include_patterns: list[str] = field(default_factory=list)
+    exclude_patterns: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        base = urlsplit(self.base_url)
+        self._host = base.netloc.lower()
+        self._base_segments = _path_segments(base.path)
+        self._include = [re.compile(pattern) for pattern in self.include_patterns]
+        self._exclude = [re.compile(pattern) for pattern in self.exclude_patterns]
+
+    @classmethod
+    def from_request(cls, request: WebCrawlRequest) -> "CrawlScope":
+        """Build the scope of a crawl request."""
+        return cls(
+            base_url=str(request.url),
+            max_depth=request.max_depth,
+            include_patterns=request.include_patterns,
+            exclude_patterns=request.exclude_patterns
+        )
+
+    def allows(self, url: str) -> bool:
+        """Whether a page URL is within the scope."""
+        parts = urlsplit(url)
+        if parts.netloc.lower() != self._host:
+            return False
+
+        segments = _path_segments(parts.path)
+        base_depth = len(self._base_segments)
+        if segments[:base_depth] != self._base_segments:
+            return False
+        if len(segments) - base_depth > self.max_depth - 1:
+            return False
+
+        path = parts.path or "/"
+        if self._include and not any(pattern.search(path) for pattern in self._include):
+            return False
+        return not any(pattern.search(path) for pattern in self._exclude)
+
+
+class WebCrawler:
+    """
+    Crawls a site with Firecrawl and indexes pages while the crawl runs.
+
+    A producer polls the crawl job and puts new pages on a bounded queue;
+    `concurrency` workers chunk, embed and index them as they arrive, so
+    the first pages are searchable long before a large crawl finishes. A
+    full queue holds polling back when indexing falls behind. Polling
+    backs off exponentially while no new pages arrive and returns to the
+    initial delay as soon as some do.
+
+    All pages are stored under one document; progress is written to the
+    document row like upload ingestion, so the status endpoint serves both.
+    The content hash of every indexed page is kept on the document, so a
+    re-crawl skips chunking and embedding for pages that did not change.
+    """
+
+    def __init__(
+        self,
+        mcp: Any,
+        processor: Any,
+        rag: Any,
+        concurrency: int | None = None,
+        page_limit: int | None = None,
+        poll_initial_delay: float | None = None,
+        poll_max_delay: float | None = None,
+        timeout: float | None = None
+    ) -> None:
+        """
+        Initialize web crawler.
+
+        Args:
+            mcp: MCPClient used to call Firecrawl
+            processor: DocumentProcessor used to chunk page text
+            rag: RAGEngine used to embed and index chunks
+            concurrency: Pages indexed at once (defaults to settings)
+            page_limit: Maximum pages per crawl (defaults to settings)
+            poll_initial_delay: First polling interval in seconds
+            poll_max_delay: Longest polling interval in seconds
+            timeout: Seconds before an unfinished crawl fails
+        """
+        settings = get_settings()
+        self.mcp = mcp
+        self.processor = processor
+        self.rag = rag
+        self.concurrency = concurrency or settings.crawl_concurrency
+        self.page_limit = page_limit or settings.crawl_page_limit
+        self.poll_initial_delay = (
+            settings.crawl_poll_initial_delay if poll_initial_delay is None else poll_initial_delay
+        )
+        self.poll_max_delay = settings.crawl_poll_max_delay if poll_max_delay is None else poll_max_delay
+        self.timeout = timeout or settings.crawl_timeout
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(self, document_id: str, request: WebCrawlRequest) -> asyncio.Task:
+        """
+        Run a crawl in the background.
+
+        Args:
+            document_id: Document row (already created) the pages are stored under
+            request: Crawl request
+
+        Returns:
+            The crawl task
+        """
+        task = asyncio.create_task(self.run(document_id, request), name=f"crawl-{document_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def stop(self) -> None:
+        """Cancel running crawls."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def pages(self, request: WebCrawlRequest) -> AsyncIterator[CrawledPage]:
+        """
+        Yield in-scope pages of a crawl as Firecrawl scrapes them.
+
+        A depth of 1 is a single page and is scraped directly without
+        starting a crawl job.
+
+        Args:
+            request: Crawl request
+
+        Raises:
+            CrawlError: If the crawl job fails or exceeds the timeout
+        """
+        scope = CrawlScope.from_request(request)
+        url = str(request.url)
+
+        if request.max_depth == 1:
+            with track_stage("crawl_fetch"):
+                result = await self.mcp.firecrawl_scrape(url)
+            page = parse_page(result.get("data") or {})
+            if page is not None and scope.allows(page.url):
+                yield page
+            return
+
+        with track_stage("crawl_fetch"):
+            job = await self.mcp.firecrawl_crawl(
+                url,
+                max_depth=request.max_depth - 1,
+                limit=self.page_limit,
+                include_paths=request.include_patterns or None,
+                exclude_paths=request.exclude_patterns or None
+            )
+        job_id = job.get("id")
+        if not job_id:
+            raise CrawlError(f"Firecrawl did not start a crawl: {job.get('error', 'no job ID')}")
+
+        received = 0
+        yielded = 0
+        seen: set[str] = set()
+        delay = self.poll_initial_delay
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            status, items = await self._poll(job_id, received)
+            received += len(items)
+
+            for item in items:
+                page = parse_page(item)
+                if page is None or page.url in seen or not scope.allows(page.url):
+                    continue
+                seen.add(page.url)
+                yield page
+                yielded += 1
+                if yielded >= self.page_limit:
+                    return
+
+            if status == "completed":
+                return
+            if status in FAILED_STATES:
+                raise CrawlError(f"Firecrawl crawl {job_id} {status}")
+            if time.monotonic() >= deadline:
+                raise CrawlError(f"Firecrawl crawl {job_id} timed out after {self.timeout:.0f}s")
+
+            delay = self.poll_initial_delay if items else min(delay * 2, self.poll_max_delay)
+            await asyncio.sleep(delay)
+
+    async def _poll(self, job_id: str, received: int) -> tuple[str, list[dict[str, Any]]]:
+        """Fetch the job status and every page after the first `received`."""
+        with track_stage("crawl_fetch"):
+            response = await self.mcp.firecrawl_crawl_status(job_id, skip=received)
+            status = response.get("status", "")
+            items = list(response.get("data") or [])
+
+            # Large results are split into batches linked by `next`
+            while response.get("next") and response.get("data"):
+                response = await self.mcp.firecrawl_crawl_status(job_id, next_url=response["next"])
+                items.extend(response.get("data") or [])
+
+        return status, items
+
+    async def run(self, document_id: str, request: WebCrawlRequest) -> dict[str, int]:
+        """
+        Crawl a site and index every in-scope page under one document.
+
+        Re-crawling a document only re-indexes pages whose content hash
+        changed since the last crawl; pages that disappeared from the site
+        are removed once the crawl completes. Failures are recorded on the
+        document row rather than raised. Pages indexed before a failure
+        stay searchable.
+
+        Args:
+            document_id: Document row the pages are stored under
+            request: Crawl request
+
+        Returns:
+            Statistics: pages_crawled, pages_unchanged, chunk_count, total_tokens
+        """
+        state = _CrawlState(previous=await self._load_pages(document_id))
+        state.pages.update(state.previous)
+        queue: asyncio.Queue[tuple[int, CrawledPage] | None] = asyncio.Queue(maxsize=self.concurrency)
+
+        async def produce() -> None:
+            page_number = 0
+            async for page in self.pages(request):
+                page_number += 1
+                await queue.put((page_number, page))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def consume() -> None:
+            while (item := await queue.get()) is not None:
+                await self._index_page(document_id, *item, state)
+
+        await self._update(document_id, {"stage": "crawling", "progress": 0.0}, {
+            "status": DocumentStatus.PROCESSING.value
+        })
+
+        error: Exception | None = None
+        try:
+            try:
+                async with asyncio.TaskGroup() as group:
+                    group.create_task(produce())
+                    for _ in range(self.concurrency):
+                        group.create_task(consume())
+            except* Exception as errors:
+                error = errors.exceptions[0]
+        except asyncio.CancelledError:
+            # Shutdown: leave the row re-crawlable rather than stuck processing
+            await self._fail(document_id, "Crawl cancelled", state)
+            raise
+
+        if error is not None:
+            await self._fail(document_id, str(error), state)
+            return state.stats
+
+        # Pages indexed by an earlier crawl that this one did not return
+        removed_urls = [url for url in state.previous if url not in state.seen]
+        removed_ids = [
+            chunk_id
+            for url in removed_urls
+            for chunk_id in indexed_chunk_ids(document_id, url, state.previous[url])
+        ]
+        if removed_ids:
+            await self.rag.delete_chunks(document_id, removed_ids)
+        for url in removed_urls:
+            del state.pages[url]
+
+        async with state.lock:
+            await self._update(
+                document_id,
+                {"stage": "completed", "progress": 1.0},
+                {
+                    "status": DocumentStatus.COMPLETED.value,
+                    "processed_at": datetime.utcnow(),
+                    "total_pages": state.stats["pages_crawled"],
+                    "chunk_count": state.stats["chunk_count"],
+                    "total_tokens": state.stats["total_tokens"],
+                },
+                metadata_updates=state.metadata(),
+                removed_chunk_ids=removed_ids
+            )
+        return state.stats
+
+    async def _index_page(
+        self,
+        document_id: str,
+        page_number: int,
+        page: CrawledPage,
+        state: "_CrawlState"
+    ) -> None:
+        """Chunk, embed and index one page, then record it on the document."""
+        digest = content_hash(page.markdown)
+        previous = state.previous.get(page.url)
+        state.seen.add(page.url)
+
+        if previous is not None and previous["hash"] == digest:
+            # Unchanged since the last crawl: its chunks are already indexed
+            async with state.lock:
+                state.stats["pages_unchanged"] += 1
+                await self._record_page(document_id, state, previous)
+            return
+
+        with track_stage("parse"):
+            chunks = await self.processor.chunk_text(
+                text=page.markdown,
+                document_id=document_id,
+                metadata={"source": page.title, "url": page.url, "page": page_number}
+            )
+
+        # IDs derive from the URL and chunk text, so unchanged chunks of a
+        # revised page keep their IDs
+        chunk_ids = page_chunk_ids(document_id, page.url, [chunk.text for chunk in chunks])
+        chunk_dicts = [
+            {
+                "chunk_id": chunk_id,
+                "document_id": document_id,
+                "text": chunk.text,
+                "chunk_index": chunk.chunk_index,
+                "metadata": chunk.metadata,
+            }
+            for chunk, chunk_id in zip(chunks, chunk_ids)
+        ]
+        if chunk_dicts:
+            await self.rag.upsert_chunks(chunk_dicts)
+
+        previous_ids = indexed_chunk_ids(document_id, page.url, previous) if previous else []
+        current = set(chunk_ids)
+        stale_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in current]
+        if stale_ids:
+            await self.rag.delete_chunks(document_id, stale_ids)
+
+        chunk_rows = [
+            {
+                "id": chunk_id,
+                "document_id": document_id,
+                "text": chunk.text,
+                "chunk_index": chunk.chunk_index,
+                "page_number": page_number,
+                "token_count": chunk.token_count,
+                "chunk_metadata": {**chunk.metadata, "chunk_index": chunk.chunk_index},
+            }
+            for chunk, chunk_id in zip(chunks, chunk_ids)
+        ]
+        entry = {
+            "hash": digest,
+            "chunks": len(chunks),
+            "chunk_ids": chunk_ids,
+            "tokens": sum(chunk.token_count or 0 for chunk in chunks),
+        }
+
+        async with state.lock:
+            await self._record_page(
+                document_id, state, entry, chunk_rows=chunk_rows, removed_chunk_ids=previous_ids
+            )
+            state.pages[page.url] = entry
+
+    async def _record_page(
+        self,
+        document_id: str,
+        state: "_CrawlState",
+        entry: dict[str, Any],
+        chunk_rows: list[dict[str, Any]] | None = None,
+        removed_chunk_ids: list[str] | None = None
+    ) -> None:
+        """Count a crawled page and persist progress (caller holds the lock)."""
+        stats = state.stats
+        stats["pages_crawled"] += 1
+        stats["chunk_count"] += entry["chunks"]
+        stats["total_tokens"] += entry.get("tokens", 0)
+        await self._update(
+            document_id,
+            {
+                "stage": "crawling",
+                "progress": min(0.95, stats["pages_crawled"] / self.page_limit),
+            },
+            {"chunk_count": stats["chunk_count"], "total_tokens": stats["total_tokens"]},
+            metadata_updates=state.metadata(),
+            chunk_rows=chunk_rows,
+            removed_chunk_ids=removed_chunk_ids
+        )
+
+    async def fail_interrupted(self) -> int:
+        """
+        Mark crawls left pending or processing by a previous run as failed.
+
+        Crawls are not resumed after a restart; failing their rows lets the
+        same URL be crawled again instead of being reported as in progress.
+
+        Returns:
+            Number of crawls marked failed
+        """
+        db = get_db()
+
+        async with db.session() as session:
+            result = await session.execute(
+                select(DBDocument.id).where(
+                    DBDocument.source_type == DocumentType.WEB_PAGE.value,
+                    DBDocument.file_path.is_(None),
+                    DBDocument.status.in_([
+                        DocumentStatus.PENDING.value,
+                        DocumentStatus.PROCESSING.value
+                    ])
+                )
+            )
+            document_ids = list(result.scalars())
+
+        for document_id in document_ids:
+            await self._update(
+                document_id,
+                {"stage": "failed", "progress": 1.0, "error": "Crawl interrupted by a restart"},
+                {"status": DocumentStatus.FAILED.value}
+            )
+
+        return len(document_ids)
+
+    async def _fail(self, document_id: str, error: str, state: "_CrawlState") -> None:
+        """Record a failed crawl, keeping the pages indexed so far."""
+        await self._update(
+            document_id,
+            {"stage": "failed", "progress": 1.0, "error": error},
+            {"status": DocumentStatus.FAILED.value},
+            metadata_updates=state.metadata()
+        )
+
+    async def _load_pages(self, document_id: str) -> dict[str, dict[str, Any]]:
+        """Pages indexed by the document's previous crawl, by URL."""
+        db = get_db()
+
+        async with db.session() as session:
+            result = await session.execute(
+                select(DBDocument.doc_metadata).where(DBDocument.id == document_id)
+            )
+            metadata = result.scalar_one_or_none() or {}
+
+        return dict((metadata.get("crawl") or {}).get("pages") or {})
+
+    async def _update(
+        self,
+        document_id: str,
+        progress: dict[str, Any],
+        fields: dict[str, Any],
+        metadata_updates: dict[str, Any] | None = None,
+        chunk_rows: list[dict[str, Any]] | None = None,
+        removed_chunk_ids: list[str] | None = None
+    ) -> None:
+        """Persist crawl progress and chunk rows on the document row."""
+        await update_document_row(
+            document_id,
+            progress,
+            fields,
+            metadata_updates,
+            chunk_rows=chunk_rows,
+            removed_chunk_ids=removed_chunk_ids
+        )
+
+
+def page_chunk_ids(document_id: str, url: str, texts: list[str]) -> list[str]:
+    """
+    Chunk IDs of a crawled page, derived from its URL and each chunk's text.
+
+    Like uploaded documents' chunk IDs they do not depend on position, so
+    a chunk keeps its ID when text elsewhere on the page changes.
+
+    Args:
+        document_id: Document the page is stored under
+        url: Page URL
+        texts: Chunk texts in page order
+
+    Returns:
+        One ID per chunk
+    """
+    prefix = f"{document_id}_{_url_key(url)}"
+    seen: Counter[str] = Counter()
+    return [text_chunk_id(prefix, text, seen) for text in texts]
+
+
+def indexed_chunk_ids(document_id: str, url: str, entry: dict[str, Any]) -> list[str]:
+    """Chunk IDs recorded for a page by a previous crawl."""
+    if "chunk_ids" in entry:
+        return list(entry["chunk_ids"])
+    # Pages crawled before IDs were content-derived used positional IDs
+    url_key = _url_key(url)
+    return [f"{document_id}_{url_key}_chunk_{index}" for index in range(entry["chunks"])]
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class _CrawlState:
+    """Progress of one crawl run."""
+
+    # Pages of the previous crawl: url -> {"hash", "chunks", "chunk_ids", "tokens"}
+    previous: dict[str, dict[str, Any]]
+    # Pages currently indexed under the document
+    pages: dict[str, dict[str, Any]] = field(default_factory=dict)
+    seen: set[str] = field(default_factory=set)
+    stats: dict[str, int] = field(default_factory=lambda: {
+        "pages_crawled": 0, "pages_unchanged": 0, "chunk_count": 0, "total_tokens": 0
+    })
+    # Serializes document row updates so counters never go backwards
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def metadata(self) -> dict[str, Any]:
+        """`crawl` entry of the document metadata."""
+        return {"crawl": {**self.stats, "pages": dict(self.pages)}}
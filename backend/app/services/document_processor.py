@@ -1,31 +1,148 @@
 """Document processing service for chunking and extracting text."""
 
+import asyncio
 import hashlib
+import math
+import multiprocessing
+import os
 import uuid
+from collections import Counter, deque
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from pypdf import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import tiktoken
 
 from app.config import get_settings
 from app.models.document import DocumentChunk, DocumentMetadata, DocumentType, DocumentStatus
+from app.services.document_workers import (
+    PageText,
+    chunk_page_stream,
+    extract_pdf_page_range,
+    read_pdf_info,
+    read_pdf_text,
+    split_text,
+)
+
+
+def text_chunk_id(prefix: str, text: str, seen: Counter[str]) -> str:
+    """
+    Chunk ID derived from the chunk's text rather than its position.
+
+    Args:
+        prefix: ID prefix (the document ID, plus the page URL for crawls)
+        text: Chunk text
+        seen: Occurrences of each text digest so far under this prefix;
+            repeats get a `_{n}` suffix
+
+    Returns:
+        Chunk ID
+    """
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    occurrence = seen[digest]
+    seen[digest] += 1
+    chunk_id = f"{prefix}_{digest}"
+    return f"{chunk_id}_{occurrence}" if occurrence else chunk_id
+
+
+def split_page_ranges(
+    total_pages: int,
+    workers: int,
+    min_pages: int,
+    max_pages: int | None = None
+) -> list[tuple[int, int]]:
+    """
+    Split pages into contiguous [start, stop) ranges, one per worker.
+
+    Args:
+        total_pages: Number of pages in the document
+        workers: Number of worker processes
+        min_pages: Minimum pages per range (avoids tiny tasks)
+        max_pages: Maximum pages per range; large documents then get more
+            ranges than workers
+
+    Returns:
+        List of page index ranges
+    """
+    if total_pages == 0:
+        return []
+
+    pages_per_task = math.ceil(total_pages / max(workers, 1))
+    if max_pages:
+        pages_per_task = min(pages_per_task, max_pages)
+    pages_per_task = max(min_pages, pages_per_task)
+    return [
+        (start, min(start + pages_per_task, total_pages))
+        for start in range(0, total_pages, pages_per_task)
+    ]
+
+
+# Shared process pool for CPU-bound document processing
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def get_worker_count() -> int:
+    """Number of document processing worker processes."""
+    return get_settings().document_worker_processes or os.cpu_count() or 1
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get document processing pool instance."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn avoids forking a process that holds event loop and client state
+        _process_pool = ProcessPoolExecutor(
+            max_workers=get_worker_count(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the document processing pool."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+@dataclass
+class ChunkBatch:
+    """Chunks from one window of a streamed document."""
+
+    chunks: list[DocumentChunk]
+    pages_done: int
+    total_pages: int | None = None
 
 
 class DocumentProcessor:
     """Service for processing documents into chunks."""
 
-    def __init__(self) -> None:
-        """Initialize document processor."""
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_workers: int | None = None
+    ) -> None:
+        """
+        Initialize document processor.
+
+        Args:
+            executor: Executor for CPU-bound work (shared process pool if omitted)
+            max_workers: Number of workers to split PDF pages across
+        """
         self.settings = get_settings()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.settings.chunk_size,
-            chunk_overlap=self.settings.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
         self.encoding = tiktoken.encoding_for_model("gpt-4")
+        self._executor = executor
+        self.max_workers = max_workers
+
+    @property
+    def executor(self) -> Executor:
+        """Executor for CPU-bound extraction and chunking."""
+        if self._executor is None:
+            self._executor = get_process_pool()
+        return self._executor
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
@@ -42,36 +159,18 @@ class DocumentProcessor:
             Tuple of (full_text, metadata)
         """
         file_path = Path(file_path)
-        reader = PdfReader(str(file_path))
+        loop = asyncio.get_running_loop()
 
-        # Extract metadata
+        full_text, info = await loop.run_in_executor(
+            self.executor, read_pdf_text, str(file_path)
+        )
         metadata = {
-            "total_pages": len(reader.pages),
+            "total_pages": info.pop("total_pages"),
             "file_name": file_path.name,
-            "file_size_bytes": file_path.stat().st_size
+            "file_size_bytes": file_path.stat().st_size,
+            **info
         }
 
-        # Extract PDF metadata if available
-        if reader.metadata:
-            if reader.metadata.title:
-                metadata["pdf_title"] = reader.metadata.title
-            if reader.metadata.author:
-                metadata["pdf_author"] = reader.metadata.author
-            if reader.metadata.subject:
-                metadata["pdf_subject"] = reader.metadata.subject
-
-        # Extract text from all pages
-        pages_text = []
-        for page_num, page in enumerate(reader.pages, start=1):
-            text = page.extract_text()
-            pages_text.append({
-                "page": page_num,
-                "text": text
-            })
-
-        # Combine all text
-        full_text = "\n\n".join([p["text"] for p in pages_text])
-
         return full_text, metadata
 
     async def chunk_text(
@@ -94,14 +193,21 @@ class DocumentProcessor:
         if metadata is None:
             metadata = {}
 
-        # Split text
-        text_chunks = self.text_splitter.split_text(text)
+        # Splitting and token counting are CPU-bound: keep them off the event loop
+        loop = asyncio.get_running_loop()
+        text_chunks = await loop.run_in_executor(
+            self.executor,
+            split_text,
+            text,
+            self.settings.chunk_size,
+            self.settings.chunk_overlap
+        )
 
         # Create chunk objects
         chunks: list[DocumentChunk] = []
-        for idx, chunk_text in enumerate(text_chunks):
-            chunk_id = self._generate_chunk_id(document_id, idx)
-            token_count = self.count_tokens(chunk_text)
+        seen: Counter[str] = Counter()
+        for idx, (chunk_text, token_count) in enumerate(text_chunks):
+            chunk_id = self._generate_chunk_id(document_id, chunk_text, seen)
 
             chunk = DocumentChunk(
                 chunk_id=chunk_id,
@@ -115,6 +221,95 @@ class DocumentProcessor:
 
         return chunks
 
+    async def stream_pdf_chunks(
+        self,
+        file_path: str | Path,
+        document_id: str
+    ) -> AsyncIterator[ChunkBatch]:
+        """
+        Chunk a PDF window by window as one continuous text.
+
+        Pages are extracted in ranges of at most `document_max_pages_per_task`
+        pages, one range per worker at a time. Each range is then appended
+        to the text left over from the previous one and split, so chunks
+        run across page breaks and record the pages they start and end on
+        (`page_number`/`page` and `page_end`). Batches are yielded in page
+        order; memory is bounded by the ranges in flight, not by the
+        document, so a consumer can embed each batch before later pages
+        are read.
+
+        Args:
+            file_path: Path to PDF file
+            document_id: Document identifier
+
+        Yields:
+            ChunkBatch per page range, with chunk indexes continuing across batches
+        """
+        file_path = Path(file_path)
+        loop = asyncio.get_running_loop()
+        workers = self.max_workers or get_worker_count()
+
+        # pypdf, the splitter and tiktoken are CPU-bound: keep them off the
+        # event loop and spread page extraction across worker processes
+        info = await loop.run_in_executor(self.executor, read_pdf_info, str(file_path))
+        total_pages = info["total_pages"]
+        page_ranges = deque(split_page_ranges(
+            total_pages,
+            workers,
+            self.settings.document_min_pages_per_task,
+            self.settings.document_max_pages_per_task
+        ))
+
+        in_flight: deque[tuple[int, asyncio.Future]] = deque()
+        carry = PageText()
+        chunk_counter = 0
+        seen: Counter[str] = Counter()
+
+        try:
+            while page_ranges or in_flight:
+                while page_ranges and len(in_flight) < workers:
+                    start, stop = page_ranges.popleft()
+                    in_flight.append((stop, loop.run_in_executor(
+                        self.executor, extract_pdf_page_range, str(file_path), start, stop
+                    )))
+
+                stop, future = in_flight.popleft()
+                pages = await future
+                # Chunking is sequential (each range continues the previous
+                # one's text) but overlaps extraction of the next ranges
+                page_chunks, carry = await loop.run_in_executor(
+                    self.executor,
+                    chunk_page_stream,
+                    carry,
+                    pages,
+                    self.settings.chunk_size,
+                    self.settings.chunk_overlap,
+                    stop == total_pages
+                )
+
+                chunks: list[DocumentChunk] = []
+                for chunk_text, start_page, end_page, token_count in page_chunks:
+                    chunks.append(DocumentChunk(
+                        chunk_id=self._generate_chunk_id(document_id, chunk_text, seen),
+                        document_id=document_id,
+                        text=chunk_text,
+                        chunk_index=chunk_counter,
+                        page_number=start_page,
+                        token_count=token_count,
+                        metadata={
+                            "page": start_page,
+                            "page_end": end_page,
+                            "source": file_path.name
+                        }
+                    ))
+                    chunk_counter += 1
+
+                yield ChunkBatch(chunks=chunks, pages_done=stop, total_pages=total_pages)
+        finally:
+            # Consumer stopped early or failed: drop ranges not yet started
+            for _, future in in_flight:
+                future.cancel()
+
     async def chunk_pdf_by_pages(
         self,
         file_path: str | Path,
@@ -123,6 +318,9 @@ class DocumentProcessor:
         """
         Process PDF and create chunks, preserving page information.
 
+        Collects `stream_pdf_chunks`; use that directly to avoid holding
+        every chunk of a large document.
+
         Args:
             file_path: Path to PDF file
             document_id: Document identifier
@@ -131,36 +329,12 @@ class DocumentProcessor:
             Tuple of (chunks list, document metadata)
         """
         file_path = Path(file_path)
-        reader = PdfReader(str(file_path))
-
         all_chunks: list[DocumentChunk] = []
-        chunk_counter = 0
+        total_pages = 0
 
-        # Process each page
-        for page_num, page in enumerate(reader.pages, start=1):
-            page_text = page.extract_text()
-
-            # Split page text into chunks
-            page_chunks = self.text_splitter.split_text(page_text)
-
-            for chunk_text in page_chunks:
-                chunk_id = self._generate_chunk_id(document_id, chunk_counter)
-                token_count = self.count_tokens(chunk_text)
-
-                chunk = DocumentChunk(
-                    chunk_id=chunk_id,
-                    document_id=document_id,
-                    text=chunk_text,
-                    chunk_index=chunk_counter,
-                    page_number=page_num,
-                    token_count=token_count,
-                    metadata={
-                        "page": page_num,
-                        "source": file_path.name
-                    }
-                )
-                all_chunks.append(chunk)
-                chunk_counter += 1
+        async for batch in self.stream_pdf_chunks(file_path, document_id):
+            all_chunks.extend(batch.chunks)
+            total_pages = batch.total_pages or 0
 
         # Calculate total tokens
         total_tokens = sum(chunk.token_count or 0 for chunk in all_chunks)
@@ -171,7 +345,7 @@ class DocumentProcessor:
             title=file_path.stem,
             source_type=DocumentType.PDF,
             file_path=str(file_path),
-            total_pages=len(reader.pages),
+            total_pages=total_pages,
             total_tokens=total_tokens,
             chunk_count=len(all_chunks),
             status=DocumentStatus.PROCESSING
@@ -223,9 +397,23 @@ class DocumentProcessor:
 
         return chunks, doc_metadata
 
-    def _generate_chunk_id(self, document_id: str, chunk_index: int) -> str:
-        """Generate unique chunk ID."""
-        return f"{document_id}_chunk_{chunk_index}"
+    def _generate_chunk_id(self, document_id: str, text: str, seen: Counter[str]) -> str:
+        """
+        Generate a chunk ID from the chunk's text.
+
+        The ID does not depend on the chunk's position, so chunks keep their
+        IDs when a revision adds or removes text elsewhere in the document.
+        Repeats of the same text within a document get a `_{n}` suffix.
+
+        Args:
+            document_id: Parent document ID
+            text: Chunk text
+            seen: Occurrences of each text digest so far in this document
+
+        Returns:
+            Chunk ID
+        """
+        return text_chunk_id(document_id, text, seen)
 
     def generate_document_id(self, title: str, content_hash: str | None = None) -> str:
         """
@@ -0,0 +1,226 @@
+"""
+Document extraction and chunking functions run in pool worker processes.
+
+Spawned workers import this module to unpickle the tasks they run, so it
+depends only on pypdf, tiktoken and the text splitter, not on the
+application's services, clients or settings.
+"""
+
+import bisect
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pypdf import PdfReader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import tiktoken
+
+
+def build_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Create the text splitter used for all documents."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
+
+
+# Per-process splitter and tokenizer, built once in each pool worker
+_worker_tools: tuple[tuple[int, int], RecursiveCharacterTextSplitter, Any] | None = None
+
+
+def _get_worker_tools(chunk_size: int, chunk_overlap: int) -> tuple[RecursiveCharacterTextSplitter, Any]:
+    """Return this process's splitter and encoding, creating them on first use."""
+    global _worker_tools
+    if _worker_tools is None or _worker_tools[0] != (chunk_size, chunk_overlap):
+        _worker_tools = (
+            (chunk_size, chunk_overlap),
+            build_text_splitter(chunk_size, chunk_overlap),
+            tiktoken.encoding_for_model("gpt-4")
+        )
+    return _worker_tools[1], _worker_tools[2]
+
+
+def iter_pdf_pages(
+    pdf: PdfReader | str | Path,
+    start: int = 0,
+    stop: int | None = None
+) -> Iterator[tuple[int, str]]:
+    """
+    Lazily extract the text of pages [start, stop) of a PDF.
+
+    Only the page being extracted is held by the generator, so callers
+    that consume pages as they arrive keep memory bounded by their own
+    window rather than by the document.
+
+    Args:
+        pdf: Open reader or path to the PDF
+        start: First page index
+        stop: Page index to stop before (defaults to the last page)
+
+    Yields:
+        Tuples of (page_number, page_text), page numbers starting at 1
+    """
+    reader = pdf if isinstance(pdf, PdfReader) else PdfReader(str(pdf))
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+
+    for page_index in range(start, stop):
+        yield page_index + 1, reader.pages[page_index].extract_text()
+
+
+def _pdf_info(reader: PdfReader) -> dict[str, Any]:
+    """Page count and document information of an open PDF."""
+    info: dict[str, Any] = {"total_pages": len(reader.pages)}
+
+    if reader.metadata:
+        if reader.metadata.title:
+            info["pdf_title"] = reader.metadata.title
+        if reader.metadata.author:
+            info["pdf_author"] = reader.metadata.author
+        if reader.metadata.subject:
+            info["pdf_subject"] = reader.metadata.subject
+
+    return info
+
+
+def read_pdf_info(file_path: str) -> dict[str, Any]:
+    """Read page count and document information. Runs in a pool worker."""
+    return _pdf_info(PdfReader(file_path))
+
+
+def read_pdf_text(file_path: str) -> tuple[str, dict[str, Any]]:
+    """Extract the full text and information of a PDF with one reader. Runs in a pool worker."""
+    reader = PdfReader(file_path)
+    text = "\n\n".join(page_text for _, page_text in iter_pdf_pages(reader))
+    return text, _pdf_info(reader)
+
+
+def extract_pdf_page_range(file_path: str, start: int, stop: int) -> list[tuple[int, str]]:
+    """Extract the text of pages [start, stop) of a PDF. Runs in a pool worker."""
+    return list(iter_pdf_pages(file_path, start, stop))
+
+
+# Joins consecutive pages in the continuous text stream. A line break
+# would be a preferred split point, cutting sentences at page breaks.
+PAGE_SEPARATOR = " "
+
+
+@dataclass
+class PageText:
+    """
+    Text spanning one or more pages, with a page-offset map.
+
+    `page_starts` holds (offset, page_number) for each page in the text,
+    in order, so the page containing any character can be looked up.
+    """
+
+    text: str = ""
+    page_starts: list[tuple[int, int]] = field(default_factory=list)
+
+    def append_page(self, page_number: int, page_text: str) -> None:
+        """Append a page to the end of the text."""
+        if self.text and not self.text[-1].isspace():
+            self.text += PAGE_SEPARATOR
+        self.page_starts.append((len(self.text), page_number))
+        self.text += page_text
+
+    def page_at(self, offset: int) -> int | None:
+        """Page number containing the character at `offset`."""
+        index = bisect.bisect_right([start for start, _ in self.page_starts], offset) - 1
+        return self.page_starts[max(index, 0)][1] if self.page_starts else None
+
+    def tail(self, offset: int) -> "PageText":
+        """Text from `offset` on, with its page map rebased."""
+        page_starts = [(0, self.page_at(offset))] if self.page_starts else []
+        page_starts += [
+            (start - offset, page_number)
+            for start, page_number in self.page_starts
+            if start > offset
+        ]
+        return PageText(self.text[offset:], page_starts)
+
+
+def split_with_offsets(
+    splitter: RecursiveCharacterTextSplitter,
+    text: str,
+    chunk_overlap: int
+) -> list[tuple[str, int]]:
+    """
+    Split text and locate each chunk in it.
+
+    Args:
+        splitter: Text splitter
+        text: Text to split
+        chunk_overlap: The splitter's chunk overlap
+
+    Returns:
+        List of (chunk_text, start_offset)
+    """
+    spans = []
+    index = 0
+    previous_length = 0
+    for chunk_text in splitter.split_text(text):
+        # Chunks appear in order, each starting at most `chunk_overlap`
+        # characters before the end of the previous one
+        found = text.find(chunk_text, max(0, index + previous_length - chunk_overlap))
+        index = found if found >= 0 else text.find(chunk_text)
+        previous_length = len(chunk_text)
+        spans.append((chunk_text, max(index, 0)))
+    return spans
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> list[tuple[str, int]]:
+    """Split text into chunks with their token counts. Runs in a pool worker."""
+    splitter, encoding = _get_worker_tools(chunk_size, chunk_overlap)
+    return [(chunk, len(encoding.encode(chunk))) for chunk in splitter.split_text(text)]
+
+
+def chunk_page_stream(
+    carry: PageText,
+    pages: list[tuple[int, str]],
+    chunk_size: int,
+    chunk_overlap: int,
+    final: bool
+) -> tuple[list[tuple[str, int, int, int]], PageText]:
+    """
+    Chunk the next pages of a document as one continuous text. Runs in a pool worker.
+
+    The pages are appended to the text carried over from the previous
+    call and split together, so chunks run across page breaks. Unless
+    this is the final call, the last chunk may be cut short by the end
+    of the window: it is not emitted but carried into the next call.
+
+    Args:
+        carry: Text left over from the previous call
+        pages: (page_number, page_text) pairs, in order
+        chunk_size: Splitter chunk size
+        chunk_overlap: Splitter chunk overlap
+        final: Whether these are the document's last pages
+
+    Returns:
+        Tuple of (list of (chunk_text, start_page, end_page, token_count), carry)
+    """
+    splitter, encoding = _get_worker_tools(chunk_size, chunk_overlap)
+
+    stream = PageText(carry.text, list(carry.page_starts))
+    for page_number, page_text in pages:
+        stream.append_page(page_number, page_text)
+
+    spans = split_with_offsets(splitter, stream.text, chunk_overlap)
+    carry = PageText()
+    if spans and not final:
+        carry = stream.tail(spans[-1][1])
+        spans = spans[:-1]
+
+    results = []
+    for chunk_text, start in spans:
+        results.append((
+            chunk_text,
+            stream.page_at(start),
+            stream.page_at(start + len(chunk_text) - 1),
+            len(encoding.encode(chunk_text))
+        ))
+
+    return results, carry
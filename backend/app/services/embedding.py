@@ -1,23 +1,55 @@
 """Embedding service using OpenAI."""
 
 import asyncio
+import random
 from typing import Any
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
 import tiktoken
 
 from app.config import get_settings
+from app.services.embedding_cache import EmbeddingCache, make_cache_key
+from app.metrics import record_cache, track_stage
+from app.services.mcp_client import retry_after_seconds
+from app.services.rate_limiter import AsyncTokenBucket
+
+# Errors retried with backoff; the client's own retries are turned off so
+# attempts do not multiply
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
 
 
 class EmbeddingService:
     """Service for creating text embeddings."""
 
-    def __init__(self) -> None:
-        """Initialize embedding service."""
+    def __init__(
+        self,
+        cache: EmbeddingCache | None = None,
+        client: AsyncOpenAI | None = None
+    ) -> None:
+        """
+        Initialize embedding service.
+
+        Args:
+            cache: Optional embedding cache (built from settings if omitted)
+            client: Shared OpenAI client (a new one is created if omitted);
+                it should be built with `max_retries=0`
+        """
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.client = client or AsyncOpenAI(api_key=self.settings.openai_api_key, max_retries=0)
         self.model = self.settings.openai_embedding_model
         self.encoding = tiktoken.encoding_for_model("gpt-4")
 
+        if cache is None and self.settings.embedding_cache_enabled:
+            cache = EmbeddingCache(
+                path=self.settings.embedding_cache_path,
+                max_memory_items=self.settings.embedding_cache_max_memory_items
+            )
+        self.cache = cache
+
+        # Shared across concurrent batches so the budget holds per process
+        self.rate_limiter = AsyncTokenBucket.per_minute(
+            self.settings.embedding_tokens_per_minute
+        )
+
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
         return len(self.encoding.encode(text))
@@ -32,12 +64,20 @@ class EmbeddingService:
         Returns:
             Embedding vector
         """
-        response = await self.client.embeddings.create(
-            model=self.model,
-            input=text,
-            encoding_format="float"
-        )
-        return response.data[0].embedding
+        if self.cache is not None:
+            key = make_cache_key(self.model, text)
+            cached = await asyncio.to_thread(self.cache.get_many, [key])
+            record_cache("embedding", hits=len(cached), misses=1 - len(cached))
+            if key in cached:
+                return cached[key]
+
+        response = await self._create_embeddings(text)
+        embedding = response.data[0].embedding
+
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set_many, {key: embedding})
+
+        return embedding
 
     async def embed_batch(
         self,
@@ -47,33 +87,127 @@ class EmbeddingService:
         """
         Create embeddings for multiple texts with batching.
 
+        Cached vectors are reused; only cache misses are sent to the API.
+
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts per batch
+            batch_size: Maximum number of texts per API request
 
         Returns:
             List of embedding vectors
         """
-        all_embeddings: list[list[float]] = []
+        if self.cache is None:
+            return await self._embed_uncached(texts, batch_size)
 
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        keys = [make_cache_key(self.model, text) for text in texts]
+        found = await asyncio.to_thread(self.cache.get_many, keys)
 
-            response = await self.client.embeddings.create(
-                model=self.model,
-                input=batch,
-                encoding_format="float"
-            )
+        # Embed each distinct missing text once
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        record_cache("embedding", hits=len(keys) - len(missing), misses=len(missing))
 
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
+        if missing:
+            new_embeddings = await self._embed_uncached(list(missing.values()), batch_size)
+            new_items = dict(zip(missing.keys(), new_embeddings))
+            await asyncio.to_thread(self.cache.set_many, new_items)
+            found.update(new_items)
 
-            # Small delay to avoid rate limits
-            if i + batch_size < len(texts):
-                await asyncio.sleep(0.1)
+        return [found[key] for key in keys]
 
-        return all_embeddings
+    async def _embed_uncached(
+        self,
+        texts: list[str],
+        batch_size: int
+    ) -> list[list[float]]:
+        """
+        Call the embeddings API for texts, running batches concurrently.
+
+        Batches are sized by token count as well as item count, throttled by
+        the tokens-per-minute budget, and results keep the input order.
+        """
+        results: list[list[float]] = [[] for _ in texts]
+        semaphore = asyncio.Semaphore(self.settings.embedding_max_concurrency)
+
+        async def run_batch(indices: list[int], tokens: int) -> None:
+            async with semaphore:
+                await self.rate_limiter.acquire(tokens)
+                response = await self._create_embeddings([texts[i] for i in indices])
+
+            for i, item in zip(indices, response.data):
+                results[i] = item.embedding
+
+        await asyncio.gather(*(
+            run_batch(indices, tokens)
+            for indices, tokens in self._plan_batches(texts, batch_size)
+        ))
+
+        return results
+
+    def _plan_batches(
+        self,
+        texts: list[str],
+        batch_size: int
+    ) -> list[tuple[list[int], int]]:
+        """
+        Group text indices into API requests.
+
+        Args:
+            texts: Texts to embed
+            batch_size: Maximum number of texts per request
+
+        Returns:
+            List of (text indices, total tokens) per request
+        """
+        max_tokens = self.settings.embedding_max_tokens_per_request
+        batches: list[tuple[list[int], int]] = []
+        current: list[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (
+                len(current) >= batch_size or current_tokens + tokens > max_tokens
+            ):
+                batches.append((current, current_tokens))
+                current, current_tokens = [], 0
+
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append((current, current_tokens))
+
+        return batches
+
+    async def _create_embeddings(self, batch: str | list[str]) -> Any:
+        """
+        Call the embeddings API, backing off with jitter on 429s and transient errors.
+
+        The wait is exponential backoff with full jitter, on top of the
+        response's `Retry-After` when present, capped at
+        `embedding_retry_max_delay`.
+        """
+        max_retries = self.settings.embedding_max_retries
+
+        for attempt in range(max_retries + 1):
+            try:
+                with track_stage("embed"):
+                    return await self.client.embeddings.create(
+                        model=self.model,
+                        input=batch,
+                        encoding_format="float"
+                    )
+            except RETRYABLE_ERRORS as e:
+                if attempt == max_retries:
+                    raise
+
+                response = getattr(e, "response", None)
+                floor = retry_after_seconds(response) if response is not None else None
+                jitter = random.uniform(0, self.settings.embedding_retry_base_delay * 2 ** attempt)
+                await asyncio.sleep(min((floor or 0.0) + jitter, self.settings.embedding_retry_max_delay))
 
     async def embed_documents(
         self,
@@ -0,0 +1,54 @@
+"""Persistent content-addressed cache for text embeddings."""
+
+import hashlib
+import re
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Any
+
+from app.services.sqlite_cache import SQLiteLRUCache
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry."""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_cache_key(model: str, text: str) -> str:
+    """Build the cache key for a (model, normalized text) pair."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class EmbeddingCache(SQLiteLRUCache[list[float]]):
+    """
+    Two-level embedding cache: in-memory LRU backed by SQLite.
+
+    Vectors are stored as float32 blobs keyed on the model name and the
+    SHA-256 of the normalized text.
+    """
+
+    table = "embeddings"
+    columns = ("dimension INTEGER NOT NULL", "vector BLOB NOT NULL")
+
+    def __init__(self, path: str | Path | None, max_memory_items: int = 10_000) -> None:
+        """
+        Initialize embedding cache.
+
+        Args:
+            path: SQLite file path, or None for a memory-only cache
+            max_memory_items: Maximum number of vectors kept in the LRU
+        """
+        super().__init__(path, max_memory_items)
+
+    def _encode(self, vector: list[float]) -> tuple[Any, ...]:
+        """Store the dimension and the vector as packed float32."""
+        return len(vector), array("f", vector).tobytes()
+
+    def _decode(self, row: tuple[Any, ...]) -> list[float]:
+        """Unpack the float32 vector."""
+        return array("f", row[1]).tolist()
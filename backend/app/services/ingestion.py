@@ -0,0 +1,449 @@
+"""Background ingestion queue for uploaded documents."""
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, select, update
+
+from app.config import get_settings
+from app.db import get_db
+from app.db.postgres import Chunk, Document as DBDocument, bulk_insert_chunks
+from app.metrics import current_endpoint, track_stage
+from app.models.document import DocumentStatus
+from app.services.document_processor import ChunkBatch
+
+
+logger = logging.getLogger(__name__)
+
+# Chunk IDs per DELETE statement
+DELETE_BATCH_SIZE = 5000
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue cannot accept more jobs."""
+
+
+@dataclass
+class IngestionJob:
+    """Document waiting to be parsed, embedded and indexed."""
+
+    document_id: str
+    file_path: str
+    title: str | None = None
+
+
+# Progress fraction reported for each processing stage
+STAGE_PROGRESS = {
+    "queued": 0.0,
+    "parsing": 0.1,
+    "embedding": 0.4,
+    "completed": 1.0,
+    "failed": 1.0,
+}
+
+
+def chunk_fingerprint(text: str, page: int | None, page_end: int | None) -> str:
+    """
+    Fingerprint of a chunk's text and page span used to detect changed chunks.
+
+    Chunk IDs already follow the text; the page span is included so a chunk
+    that moved to other pages is re-indexed with correct citations.
+    """
+    return hashlib.sha256(f"{page}:{page_end}:{text}".encode("utf-8")).hexdigest()
+
+
+async def update_document_row(
+    document_id: str,
+    progress: dict[str, Any],
+    fields: dict[str, Any],
+    metadata_updates: dict[str, Any] | None = None,
+    chunk_rows: list[dict[str, Any]] | None = None,
+    removed_chunk_ids: list[str] | None = None
+) -> None:
+    """
+    Persist status fields, ingestion progress and chunk rows.
+
+    Chunk rows are replaced in the same transaction as the document
+    update, so the `chunks` table never disagrees with the status.
+
+    Args:
+        document_id: Document to update
+        progress: Stored as the `ingestion` entry of the document metadata
+        fields: Column values to set
+        metadata_updates: Other entries merged into the document metadata
+        chunk_rows: Chunk rows to insert
+        removed_chunk_ids: Chunk rows to delete first
+    """
+    db = get_db()
+
+    async with db.session() as session:
+        # Batched to stay under the driver's bind parameter limit
+        removed_chunk_ids = removed_chunk_ids or []
+        for i in range(0, len(removed_chunk_ids), DELETE_BATCH_SIZE):
+            await session.execute(
+                delete(Chunk).where(Chunk.id.in_(removed_chunk_ids[i:i + DELETE_BATCH_SIZE]))
+            )
+        await bulk_insert_chunks(session, chunk_rows or [])
+
+        result = await session.execute(
+            select(DBDocument.doc_metadata).where(DBDocument.id == document_id)
+        )
+        metadata = dict(result.scalar_one_or_none() or {})
+        metadata.update(metadata_updates or {})
+        metadata["ingestion"] = progress
+
+        await session.execute(
+            update(DBDocument)
+            .where(DBDocument.id == document_id)
+            .values(doc_metadata=metadata, **fields)
+        )
+        await session.commit()
+
+
+class IngestionQueue:
+    """
+    Bounded queue of ingestion jobs served by a pool of worker tasks.
+
+    Every state transition is written to the `documents` row (`status`
+    plus an `ingestion` entry in its metadata), so progress can be polled
+    and unfinished jobs can be resumed after a restart. Chunks are written
+    to the `chunks` table batch by batch as they are indexed; a revised
+    upload is diffed against them so only chunks whose text changed are
+    re-embedded.
+    """
+
+    def __init__(
+        self,
+        processor: Any,
+        rag: Any,
+        workers: int | None = None,
+        max_size: int | None = None
+    ) -> None:
+        """
+        Initialize ingestion queue.
+
+        Args:
+            processor: DocumentProcessor used to chunk files
+            rag: RAGEngine used to embed and index chunks
+            workers: Number of concurrent jobs (defaults to settings)
+            max_size: Maximum queued jobs (defaults to settings)
+        """
+        settings = get_settings()
+        self.processor = processor
+        self.rag = rag
+        self.workers = workers or settings.ingestion_workers
+        self.max_size = max_size or settings.ingestion_queue_size
+        self._queue: asyncio.Queue[IngestionJob] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._progress: dict[str, dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """Start worker tasks if they are not running."""
+        if self._tasks:
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel worker tasks. Jobs in flight are resumed on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, job: IngestionJob) -> None:
+        """
+        Add a job to the queue.
+
+        Raises:
+            IngestionQueueFull: If the queue is at capacity
+        """
+        self.start()
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise IngestionQueueFull(
+                f"Ingestion queue is full ({self.max_size} jobs)"
+            ) from None
+
+        self._progress[job.document_id] = {"stage": "queued", "progress": 0.0}
+
+    def is_full(self) -> bool:
+        """Whether the queue is at capacity."""
+        return self._queue is not None and self._queue.full()
+
+    async def mark_failed(self, document_id: str, error: str) -> None:
+        """
+        Record a document whose job could not be queued as failed.
+
+        Keeps a committed row from staying pending with no job behind it;
+        failed rows are retried in place by the next upload.
+
+        Args:
+            document_id: Document that was not queued
+            error: Reason stored with the ingestion progress
+        """
+        await self._set_stage(document_id, "failed", error=error)
+
+    async def resume(self) -> int:
+        """
+        Re-enqueue documents left pending or processing by a previous run.
+
+        Returns:
+            Number of jobs resumed
+        """
+        self.start()
+        db = get_db()
+
+        async with db.session() as session:
+            stmt = select(DBDocument.id, DBDocument.file_path, DBDocument.title).where(
+                DBDocument.status.in_([
+                    DocumentStatus.PENDING.value,
+                    DocumentStatus.PROCESSING.value
+                ]),
+                DBDocument.file_path.is_not(None)
+            ).order_by(DBDocument.created_at)
+
+            result = await session.execute(stmt)
+            rows = result.all()
+
+        for row in rows:
+            job = IngestionJob(document_id=row.id, file_path=row.file_path, title=row.title)
+            # Wait for room rather than fail: workers are already draining
+            await self._queue.put(job)
+            self._progress[job.document_id] = {"stage": "queued", "progress": 0.0}
+
+        return len(rows)
+
+    def progress(self, document_id: str) -> dict[str, Any] | None:
+        """In-memory progress of a job handled by this process, if any."""
+        return self._progress.get(document_id)
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self) -> None:
+        """Process jobs until cancelled."""
+        current_endpoint.set("ingestion")
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                # The worker must survive a failed status write (e.g. the database is down)
+                try:
+                    await self._set_stage(job.document_id, "failed", error=str(e))
+                except Exception:
+                    logger.exception("Could not record ingestion failure for %s", job.document_id)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: IngestionJob) -> None:
+        """
+        Parse, chunk, embed and index one document.
+
+        Chunks arrive in batches (a window of PDF pages at a time) and each
+        batch is embedded and written before the next is used, so a large
+        document is never held in memory whole.
+        """
+        file_path = Path(job.file_path)
+        # Keep the user-provided title
+        title = job.title or file_path.stem
+
+        await self._set_stage(job.document_id, "parsing")
+
+        if file_path.suffix.lower() == ".pdf":
+            batches = self.processor.stream_pdf_chunks(
+                file_path=file_path,
+                document_id=job.document_id
+            )
+        else:
+            batches = self._text_file_batches(file_path, job.document_id)
+
+        # Re-indexing a revision: chunk IDs are derived from the text, so only
+        # new chunks and chunks that moved to other pages are embedded, and
+        # chunk IDs that no longer exist are dropped. The stored `chunk_index`
+        # of an unchanged chunk is its position when it was last indexed.
+        previous_fingerprints = await self._load_chunk_fingerprints(job.document_id)
+        current_ids: set[str] = set()
+        upserted = 0
+        unchanged = 0
+        total_tokens = 0
+        total_pages = None
+
+        while True:
+            with track_stage("parse"):
+                batch = await anext(batches, None)
+            if batch is None:
+                break
+
+            total_pages = batch.total_pages
+            total_tokens += sum(chunk.token_count or 0 for chunk in batch.chunks)
+
+            # Prepare chunks for embedding
+            chunk_dicts = [
+                {
+                    "chunk_id": chunk.chunk_id,
+                    "document_id": chunk.document_id,
+                    "text": chunk.text,
+                    "chunk_index": chunk.chunk_index,
+                    "metadata": {
+                        "source": title,
+                        "page": chunk.page_number,
+                        "document_id": job.document_id,
+                        **chunk.metadata
+                    }
+                }
+                for chunk in batch.chunks
+            ]
+            current_ids.update(chunk["chunk_id"] for chunk in chunk_dicts)
+            changed = [
+                chunk for chunk in chunk_dicts
+                if previous_fingerprints.get(chunk["chunk_id"]) != chunk_fingerprint(
+                    chunk["text"], chunk["metadata"].get("page"), chunk["metadata"].get("page_end")
+                )
+            ]
+            unchanged += len(chunk_dicts) - len(changed)
+            replaced_ids = [chunk["chunk_id"] for chunk in changed if chunk["chunk_id"] in previous_fingerprints]
+
+            # Embed and upsert to Pinecone
+            if changed:
+                upsert_stats = await self.rag.upsert_chunks(changed)
+                upserted += upsert_stats["upserted"]
+
+            # Rows for the chunks table, written once the batch is indexed
+            token_counts = {chunk.chunk_id: chunk.token_count for chunk in batch.chunks}
+            chunk_rows = [
+                {
+                    "id": chunk["chunk_id"],
+                    "document_id": chunk["document_id"],
+                    "text": chunk["text"],
+                    "chunk_index": chunk["chunk_index"],
+                    "page_number": chunk["metadata"].get("page"),
+                    "token_count": token_counts[chunk["chunk_id"]],
+                    "chunk_metadata": {**chunk["metadata"], "chunk_index": chunk["chunk_index"]},
+                }
+                for chunk in changed
+            ]
+
+            await self._set_stage(
+                job.document_id,
+                "embedding",
+                detail={"pages_done": batch.pages_done, "total_pages": total_pages} if total_pages else None,
+                chunk_rows=chunk_rows,
+                removed_chunk_ids=replaced_ids,
+                chunk_count=len(current_ids)
+            )
+
+        stale_ids = [chunk_id for chunk_id in previous_fingerprints if chunk_id not in current_ids]
+        deleted = await self.rag.delete_chunks(job.document_id, stale_ids)
+
+        await self._set_stage(
+            job.document_id,
+            "completed",
+            metadata={
+                "last_index": {
+                    "upserted": upserted,
+                    "unchanged": unchanged,
+                    "deleted": deleted
+                }
+            },
+            removed_chunk_ids=stale_ids,
+            total_pages=total_pages,
+            total_tokens=total_tokens,
+            chunk_count=len(current_ids)
+        )
+
+    async def _text_file_batches(self, file_path: Path, document_id: str) -> AsyncIterator[ChunkBatch]:
+        """Chunk a text file as a single batch."""
+        chunks, _ = await self.processor.process_text_file(
+            file_path=file_path,
+            document_id=document_id
+        )
+        yield ChunkBatch(chunks=chunks, pages_done=0)
+
+    async def _load_chunk_fingerprints(self, document_id: str) -> dict[str, str]:
+        """Fingerprints of the chunks stored for a document, by chunk ID."""
+        db = get_db()
+
+        async with db.session() as session:
+            result = await session.execute(
+                select(Chunk.id, Chunk.text, Chunk.page_number, Chunk.chunk_metadata)
+                .where(Chunk.document_id == document_id)
+            )
+            return {
+                row.id: chunk_fingerprint(
+                    row.text, row.page_number, (row.chunk_metadata or {}).get("page_end")
+                )
+                for row in result
+            }
+
+    async def _set_stage(
+        self,
+        document_id: str,
+        stage: str,
+        error: str | None = None,
+        detail: dict[str, Any] | None = None,
+        metadata: dict[str, Any] | None = None,
+        chunk_rows: list[dict[str, Any]] | None = None,
+        removed_chunk_ids: list[str] | None = None,
+        **fields: Any
+    ) -> None:
+        """Record a stage transition in memory and on the documents row."""
+        progress = {"stage": stage, "progress": STAGE_PROGRESS[stage]}
+        if detail:
+            progress.update(detail)
+        if error:
+            progress["error"] = error
+        self._progress[document_id] = progress
+
+        if stage == "completed":
+            fields["status"] = DocumentStatus.COMPLETED.value
+            fields["processed_at"] = datetime.utcnow()
+        elif stage == "failed":
+            fields["status"] = DocumentStatus.FAILED.value
+        else:
+            fields["status"] = DocumentStatus.PROCESSING.value
+
+        await self._update_document(
+            document_id,
+            progress,
+            fields,
+            metadata,
+            chunk_rows=chunk_rows,
+            removed_chunk_ids=removed_chunk_ids
+        )
+
+    async def _update_document(
+        self,
+        document_id: str,
+        progress: dict[str, Any],
+        fields: dict[str, Any],
+        metadata_updates: dict[str, Any] | None = None,
+        chunk_rows: list[dict[str, Any]] | None = None,
+        removed_chunk_ids: list[str] | None = None
+    ) -> None:
+        """Persist status fields, ingestion progress and chunk rows."""
+        await update_document_row(
+            document_id,
+            progress,
+            fields,
+            metadata_updates,
+            chunk_rows=chunk_rows,
+            removed_chunk_ids=removed_chunk_ids
+        )
@@ -0,0 +1,385 @@
+"""In-memory BM25 index over chunk texts for hybrid retrieval."""
+
+import asyncio
+import functools
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from sqlalchemy import select
+
+from app.db import get_db
+from app.db.postgres import Chunk
+from app.services.metadata_filter import matches_filter
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Function words in the corpus languages (English and French); they carry no
+# keyword signal and have the longest postings lists
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been but by can could did do
+does for from had has have he her his how i if in into is it its me my no not
+of on or our out s she so such than that the their them then there these they
+this those to us was we were what when where which who why will with would you
+your au aux avec ce ces d dans de des du elle en et il ils je l la le les leur
+lui m ma mais me mes n ne nos notre nous on ou par pas pour qu que qui sa se
+ses son sur t ta te tu un une vos votre vous y
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, strip accents and split text into word tokens."""
+    if text.isascii():
+        return _TOKEN_RE.findall(text.lower())
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text)
+
+
+def index_terms(text: str) -> list[str]:
+    """Tokens of a text that are indexed and searched, without stopwords."""
+    return [token for token in tokenize(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Incrementally updatable BM25 index.
+
+    Keeps postings in memory so exact terms such as SKUs, RFP numbers and
+    company names can be matched without a round trip. Chunks are added
+    as they are upserted and removed with their document; the index is
+    rebuilt from the `chunks` table at startup.
+
+    The synchronous methods do the work; the async `query`, `upsert` and
+    `delete` run them one at a time on a dedicated thread so scoring never
+    blocks the event loop and never races an update.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_df_ratio: float = 0.5) -> None:
+        """
+        Initialize BM25 index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+            max_df_ratio: Query terms found in a larger share of chunks are
+                skipped when rarer terms remain (low IDF, long postings)
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._lengths: dict[str, int] = {}
+        self._chunks: dict[str, dict[str, Any]] = {}
+        self._by_document: dict[str, set[str]] = defaultdict(set)
+        self._total_length = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexical-index")
+
+    def __len__(self) -> int:
+        """Number of indexed chunks."""
+        return len(self._chunks)
+
+    def add_chunk(
+        self,
+        chunk_id: str,
+        document_id: str,
+        text: str,
+        metadata: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Index a chunk, replacing any previous version with the same ID.
+
+        Args:
+            chunk_id: Chunk identifier
+            document_id: Parent document ID
+            text: Chunk text
+            metadata: Metadata used for filtering and citations
+        """
+        if chunk_id in self._chunks:
+            self.remove_chunk(chunk_id)
+
+        term_counts = Counter(index_terms(text))
+        for term, count in term_counts.items():
+            self._postings[term][chunk_id] = count
+
+        length = sum(term_counts.values())
+        self._lengths[chunk_id] = length
+        self._total_length += length
+        self._chunks[chunk_id] = {
+            "document_id": document_id,
+            "text": text,
+            "terms": list(term_counts),
+            "metadata": metadata or {},
+        }
+        self._by_document[document_id].add(chunk_id)
+
+    def add_chunks(self, chunks: list[dict[str, Any]]) -> None:
+        """Index chunk dicts with `chunk_id`, `document_id`, `text` and `metadata`."""
+        for chunk in chunks:
+            self.add_chunk(
+                chunk_id=chunk["chunk_id"],
+                document_id=chunk["document_id"],
+                text=chunk["text"],
+                metadata=chunk.get("metadata")
+            )
+
+    def remove_chunk(self, chunk_id: str) -> None:
+        """Remove a chunk from the index."""
+        chunk = self._chunks.pop(chunk_id, None)
+        if chunk is None:
+            return
+
+        for term in chunk["terms"]:
+            postings = self._postings[term]
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self._postings[term]
+
+        self._total_length -= self._lengths.pop(chunk_id)
+
+        document_chunks = self._by_document[chunk["document_id"]]
+        document_chunks.discard(chunk_id)
+        if not document_chunks:
+            del self._by_document[chunk["document_id"]]
+
+    def remove_document(self, document_id: str) -> int:
+        """
+        Remove every chunk of a document.
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            Number of chunks removed
+        """
+        chunk_ids = list(self._by_document.get(document_id, ()))
+        for chunk_id in chunk_ids:
+            self.remove_chunk(chunk_id)
+        return len(chunk_ids)
+
+    async def _call(self, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a method on the index thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(method, *args, **kwargs)
+        )
+
+    async def query(
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_dict: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """Rank chunks against a query off the event loop (see `search`)."""
+        return await self._call(self.search, query, top_k, filter_dict)
+
+    async def upsert(self, chunks: list[dict[str, Any]]) -> None:
+        """Index chunk dicts off the event loop (see `add_chunks`)."""
+        await self._call(self.add_chunks, chunks)
+
+    async def delete(
+        self,
+        ids: list[str] | None = None,
+        document_id: str | None = None
+    ) -> int:
+        """
+        Remove chunks by ID and/or a whole document off the event loop.
+
+        Args:
+            ids: Chunk IDs to remove
+            document_id: Document whose chunks are all removed
+
+        Returns:
+            Number of chunks removed
+        """
+        return await self._call(self._delete, ids or [], document_id)
+
+    def _delete(self, ids: list[str], document_id: str | None) -> int:
+        """Remove chunk IDs, then a whole document."""
+        before = len(self._chunks)
+        for chunk_id in ids:
+            self.remove_chunk(chunk_id)
+        if document_id is not None:
+            self.remove_document(document_id)
+        return before - len(self._chunks)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        filter_dict: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Stopwords are ignored and, when rarer terms remain, so are terms found
+        in more than `max_df_ratio` of chunks. Each result's `relevance` is its
+        score divided by the summed IDF of the scored query terms and of terms
+        the index lacks: about 1 when the chunk contains the whole query, near
+        0 when it only shares a common word with it.
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            filter_dict: Pinecone-style metadata filters
+
+        Returns:
+            Retrieved chunks in the same format as RAGEngine.retrieve
+        """
+        total = len(self._chunks)
+        if total == 0:
+            return []
+
+        avg_length = self._total_length / total
+        scores: dict[str, float] = defaultdict(float)
+
+        weighted_terms = []
+        for term in set(index_terms(query)):
+            df = len(self._postings.get(term, ()))
+            weighted_terms.append((term, df, math.log(1 + (total - df + 0.5) / (df + 0.5))))
+
+        scored_terms = [item for item in weighted_terms if 0 < item[1] <= self.max_df_ratio * total]
+        if not scored_terms:
+            present = [item for item in weighted_terms if item[1]]
+            scored_terms = [min(present, key=lambda item: item[1])] if present else []
+        missing_terms = [item for item in weighted_terms if not item[1]]
+        query_weight = sum(idf for _, _, idf in scored_terms + missing_terms)
+
+        for term, _, idf in scored_terms:
+            for chunk_id, tf in self._postings[term].items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if filter_dict:
+            scores = {
+                chunk_id: score
+                for chunk_id, score in scores.items()
+                if matches_filter(self._chunks[chunk_id]["metadata"], filter_dict)
+            }
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+        results = []
+        for chunk_id, score in best:
+            chunk = self._chunks[chunk_id]
+            metadata = chunk["metadata"]
+            results.append({
+                "id": chunk_id,
+                "text": chunk["text"],
+                "source": metadata.get("source", "Unknown"),
+                "page": metadata.get("page"),
+                "chunk_id": chunk_id,
+                "score": score,
+                "relevance": score / query_weight,
+                "document_id": chunk["document_id"],
+                "metadata": metadata
+            })
+
+        return results
+
+    async def load_from_db(self, db: Any, batch_size: int = 1000) -> int:
+        """
+        Rebuild the index from the `chunks` table.
+
+        Rows are streamed in batches and tokenized on the index thread.
+
+        Args:
+            db: DatabaseSession instance
+            batch_size: Rows fetched per round trip
+
+        Returns:
+            Number of chunks indexed
+        """
+        stmt = select(
+            Chunk.id,
+            Chunk.document_id,
+            Chunk.text,
+            Chunk.chunk_metadata
+        ).execution_options(yield_per=batch_size)
+
+        count = 0
+        async with db.session() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions(batch_size):
+                await self.upsert([
+                    {
+                        "chunk_id": row.id,
+                        "document_id": row.document_id,
+                        "text": row.text,
+                        "metadata": row.chunk_metadata or {},
+                    }
+                    for row in rows
+                ])
+                count += len(rows)
+
+        return count
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: list[tuple[list[dict[str, Any]], float]],
+    top_k: int,
+    k: int = 60
+) -> list[dict[str, Any]]:
+    """
+    Fuse ranked result lists with weighted reciprocal rank fusion.
+
+    Each result list contributes `weight / (k + rank)` per document. The
+    fused `score` is normalized to 0-1, where 1 means ranked first by every
+    weighted list; the original scores are kept as `vector_score` and
+    `lexical_score` when available.
+
+    Args:
+        ranked_lists: (results, weight) pairs; results are best-first
+        top_k: Number of fused results to return
+        k: RRF rank offset
+
+    Returns:
+        Fused results, best first
+    """
+    fused: dict[str, dict[str, Any]] = {}
+    rrf_scores: dict[str, float] = defaultdict(float)
+    score_keys = ["vector_score", "lexical_score"]
+
+    for list_index, (results, weight) in enumerate(ranked_lists):
+        score_key = score_keys[list_index] if list_index < len(score_keys) else None
+        for rank, doc in enumerate(results, start=1):
+            chunk_id = doc["chunk_id"]
+            if chunk_id not in fused:
+                fused[chunk_id] = dict(doc)
+            if score_key:
+                fused[chunk_id][score_key] = doc["score"]
+            rrf_scores[chunk_id] += weight / (k + rank)
+
+    max_score = sum(weight for _, weight in ranked_lists) / (k + 1)
+
+    ranked = sorted(rrf_scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    results = []
+    for chunk_id, rrf_score in ranked:
+        doc = fused[chunk_id]
+        doc["rrf_score"] = rrf_score
+        doc["score"] = rrf_score / max_score if max_score else 0.0
+        results.append(doc)
+
+    return results
+
+
+# Singleton instance
+_lexical_index: BM25Index | None = None
+
+
+def get_lexical_index() -> BM25Index:
+    """Get lexical index instance."""
+    global _lexical_index
+    if _lexical_index is None:
+        _lexical_index = BM25Index()
+    return _lexical_index
+
+
+async def init_lexical_index() -> int:
+    """Load existing chunks from PostgreSQL into the lexical index."""
+    return await get_lexical_index().load_from_db(get_db())
@@ -1,27 +1,291 @@
 """MCP (Model Context Protocol) client for integrations."""
 
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import httpx
 from typing import Any
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.metrics import record_cache
+from app.services.rate_limiter import AsyncTokenBucket
+from app.services.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    content_hash,
+    make_request_key,
+)
+
+# Responses worth retrying: rate limited or a transient server failure
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    """
+    Parse a `Retry-After` header (seconds or HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is absent or invalid
+    """
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class ProviderLimits:
+    """Request rate and concurrency allowed for one provider."""
+
+    bucket: AsyncTokenBucket
+    semaphore: asyncio.Semaphore
+
+    @classmethod
+    def create(cls, requests_per_second: float, max_concurrency: int) -> "ProviderLimits":
+        """Limits allowing bursts of up to one second's worth of requests."""
+        return cls(
+            bucket=AsyncTokenBucket(rate=requests_per_second, capacity=max(1.0, requests_per_second)),
+            semaphore=asyncio.Semaphore(max_concurrency)
+        )
 
 
 class MCPClient:
-    """Client for MCP integrations (Firecrawl, Brave Search, etc.)."""
+    """
+    Client for MCP integrations (Firecrawl, Brave Search, etc.).
+
+    Scrapes and searches go through a persistent response cache. A fresh
+    entry is returned without a request; an expired one is re-fetched and
+    its content hash compared, so callers can tell whether a page changed.
+    Results carry a `cache` entry with `hit`, `changed` and `content_hash`.
 
-    def __init__(self) -> None:
-        """Initialize MCP client."""
-        self.settings = get_settings()
-        self.client = httpx.AsyncClient(timeout=60.0)
+    Requests to each provider are bounded by a token bucket (requests per
+    second) and a concurrency limit, so `gather_scrapes`/`gather_searches`
+    can fan out freely. Rate-limited and transient failures are retried
+    with exponential backoff, waiting for `Retry-After` when given.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache | None = None,
+        settings: Settings | None = None
+    ) -> None:
+        """
+        Initialize MCP client.
+
+        Args:
+            cache: Response cache (built from settings if omitted)
+            settings: Application settings (defaults to the cached settings)
+        """
+        self.settings = settings or get_settings()
+        self.client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(
+                max_connections=self.settings.mcp_max_connections,
+                max_keepalive_connections=self.settings.mcp_max_keepalive_connections
+            ),
+            # HTTP/2 needs the optional h2 package (`http2` extra)
+            http2=self.settings.mcp_http2_enabled and importlib.util.find_spec("h2") is not None
+        )
+        self.limits = {
+            "firecrawl": ProviderLimits.create(
+                self.settings.firecrawl_requests_per_second,
+                self.settings.firecrawl_max_concurrency
+            ),
+            "brave": ProviderLimits.create(
+                self.settings.brave_requests_per_second,
+                self.settings.brave_max_concurrency
+            ),
+        }
+
+        if cache is None and self.settings.mcp_cache_enabled:
+            cache = ResponseCache(self.settings.mcp_cache_path)
+        self.cache = cache
 
     async def close(self) -> None:
-        """Close HTTP client."""
+        """Close HTTP client and response cache."""
         await self.client.aclose()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _cached(
+        self,
+        kind: str,
+        target: str,
+        params: dict[str, Any],
+        ttl_seconds: float,
+        fetch: Callable[[], Awaitable[dict[str, Any]]],
+        content: Callable[[dict[str, Any]], str],
+        max_age: float | None = None
+    ) -> dict[str, Any]:
+        """
+        Serve a request from the response cache or fetch and store it.
+
+        Args:
+            kind: Request type, part of the cache key and metric label
+            target: URL or query
+            params: Other parameters that change the response
+            ttl_seconds: Lifetime of a cached response for this source type
+            fetch: Performs the request
+            content: Extracts the content that is hashed from a response
+            max_age: Override of the TTL (0 forces a re-fetch)
+
+        Returns:
+            Response body with a `cache` entry added
+        """
+        if self.cache is None:
+            return await fetch()
+
+        key = make_request_key(kind, target, params)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        ttl = ttl_seconds if max_age is None else max_age
+
+        if cached is not None and time.time() - cached.fetched_at < ttl:
+            record_cache(f"mcp_{kind}", hits=1, misses=0)
+            return {
+                **cached.body,
+                "cache": {"hit": True, "changed": False, "content_hash": cached.content_hash},
+            }
+
+        record_cache(f"mcp_{kind}", hits=0, misses=1)
+        body = await fetch()
+        digest = content_hash(content(body))
+        await asyncio.to_thread(self.cache.set, key, CachedResponse(body, digest, time.time()))
+
+        return {
+            **body,
+            "cache": {
+                "hit": False,
+                "changed": cached is None or cached.content_hash != digest,
+                "content_hash": digest,
+            },
+        }
+
+    async def _request(self, provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request within the provider's limits, retrying failures.
+
+        429 and 5xx responses and connection errors are retried up to
+        `mcp_max_retries` times. The wait is the response's `Retry-After`
+        when present, otherwise exponential backoff with full jitter, and
+        is capped at `mcp_retry_max_delay`.
+
+        Raises:
+            httpx.HTTPStatusError: On an error response that is not retried
+                or still fails after the last retry
+        """
+        limits = self.limits[provider]
+        max_retries = self.settings.mcp_max_retries
+
+        for attempt in range(max_retries + 1):
+            delay: float | None = None
+
+            async with limits.semaphore:
+                await limits.bucket.acquire()
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if attempt == max_retries:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                        response.raise_for_status()
+                        return response
+                    delay = retry_after_seconds(response)
+
+            if delay is None:
+                delay = random.uniform(0, self.settings.mcp_retry_base_delay * 2 ** attempt)
+            await asyncio.sleep(min(delay, self.settings.mcp_retry_max_delay))
+
+        raise AssertionError("unreachable")
+
+    async def gather_scrapes(
+        self,
+        urls: list[str],
+        formats: list[str] | None = None,
+        max_age: float | None = None
+    ) -> list[dict[str, Any] | Exception]:
+        """
+        Scrape many URLs concurrently within the Firecrawl limits.
+
+        Args:
+            urls: URLs to scrape (duplicates are fetched once)
+            formats: Output formats
+            max_age: Accept cached results up to this many seconds old
+
+        Returns:
+            One result per URL, in order; failed scrapes return their exception
+        """
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(
+            *(self.firecrawl_scrape(url, formats=formats, max_age=max_age) for url in unique),
+            return_exceptions=True
+        )
+        by_url = dict(zip(unique, results))
+        return [by_url[url] for url in urls]
+
+    async def gather_searches(
+        self,
+        queries: list[str],
+        count: int = 10,
+        freshness: str | None = None,
+        max_age: float | None = None
+    ) -> list[dict[str, Any] | Exception]:
+        """
+        Run many searches concurrently within the Brave Search limits.
+
+        Args:
+            queries: Search queries (duplicates are run once)
+            count: Number of results per query
+            freshness: Time filter
+            max_age: Accept cached results up to this many seconds old
+
+        Returns:
+            One result per query, in order; failed searches return their exception
+        """
+        unique = list(dict.fromkeys(queries))
+        results = await asyncio.gather(
+            *(
+                self.brave_search(query, count=count, freshness=freshness, max_age=max_age)
+                for query in unique
+            ),
+            return_exceptions=True
+        )
+        by_query = dict(zip(unique, results))
+        return [by_query[query] for query in queries]
+
+    @property
+    def _firecrawl_url(self) -> str:
+        return self.settings.firecrawl_api_url.rstrip("/")
+
+    def _firecrawl_headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.settings.firecrawl_api_key}",
+            "Content-Type": "application/json"
+        }
 
     async def firecrawl_scrape(
         self,
         url: str,
-        formats: list[str] | None = None
+        formats: list[str] | None = None,
+        max_age: float | None = None
     ) -> dict[str, Any]:
         """
         Scrape a website using Firecrawl.
@@ -29,6 +293,8 @@ class MCPClient:
         Args:
             url: URL to scrape
             formats: Output formats (e.g., ['markdown', 'html'])
+            max_age: Accept a cached result up to this many seconds old
+                (defaults to the scrape TTL; 0 forces a re-fetch)
 
         Returns:
             Scraped content
@@ -40,67 +306,121 @@ class MCPClient:
 
         formats = formats or ["markdown"]
 
-        response = await self.client.post(
-            "https://api.firecrawl.dev/v1/scrape",
-            headers={
-                "Authorization": f"Bearer {self.settings.firecrawl_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "url": url,
-                "formats": formats
-            }
-        )
+        async def fetch() -> dict[str, Any]:
+            response = await self._request(
+                "firecrawl",
+                "POST",
+                f"{self._firecrawl_url}/v1/scrape",
+                headers=self._firecrawl_headers(),
+                json={
+                    "url": url,
+                    "formats": formats
+                }
+            )
+            return response.json()
 
-        response.raise_for_status()
-        return response.json()
+        def page_content(body: dict[str, Any]) -> str:
+            data = body.get("data") or {}
+            return json.dumps([data.get(name) for name in formats])
+
+        return await self._cached(
+            "scrape", url, {"formats": formats},
+            self.settings.mcp_cache_scrape_ttl_seconds, fetch, page_content, max_age
+        )
 
     async def firecrawl_crawl(
         self,
         url: str,
         max_depth: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        include_paths: list[str] | None = None,
+        exclude_paths: list[str] | None = None
     ) -> dict[str, Any]:
         """
         Crawl a website using Firecrawl.
 
         Args:
             url: Base URL to crawl
-            max_depth: Maximum depth to crawl
+            max_depth: Maximum path depth below the base URL (0 = base page only)
             limit: Maximum number of pages
+            include_paths: Regex patterns; only matching URL paths are crawled
+            exclude_paths: Regex patterns; matching URL paths are skipped
 
         Returns:
             Crawl job information
 
-        Note: Firecrawl crawl is async - you need to poll for results
+        Note: Firecrawl crawl is async - poll `firecrawl_crawl_status` for results
         """
         if not self.settings.firecrawl_api_key:
             raise ValueError("Firecrawl API key not configured")
 
-        response = await self.client.post(
-            "https://api.firecrawl.dev/v1/crawl",
-            headers={
-                "Authorization": f"Bearer {self.settings.firecrawl_api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "url": url,
-                "maxDepth": max_depth,
-                "limit": limit,
-                "scrapeOptions": {
-                    "formats": ["markdown"]
-                }
+        payload: dict[str, Any] = {
+            "url": url,
+            "maxDepth": max_depth,
+            "limit": limit,
+            "scrapeOptions": {
+                "formats": ["markdown"]
             }
+        }
+        if include_paths:
+            payload["includePaths"] = include_paths
+        if exclude_paths:
+            payload["excludePaths"] = exclude_paths
+
+        response = await self._request(
+            "firecrawl",
+            "POST",
+            f"{self._firecrawl_url}/v1/crawl",
+            headers=self._firecrawl_headers(),
+            json=payload
         )
+        return response.json()
+
+    async def firecrawl_crawl_status(
+        self,
+        job_id: str,
+        skip: int = 0,
+        next_url: str | None = None
+    ) -> dict[str, Any]:
+        """
+        Get the status and scraped pages of a Firecrawl crawl job.
+
+        Args:
+            job_id: ID returned by `firecrawl_crawl`
+            skip: Number of pages already received (only newer ones are returned)
+            next_url: `next` link of a previous response, for the following
+                batch of pages
+
+        Returns:
+            Crawl status with `status`, `data` (pages) and optional `next`
+        """
+        if not self.settings.firecrawl_api_key:
+            raise ValueError("Firecrawl API key not configured")
 
-        response.raise_for_status()
+        # Never send the API key to a host other than Firecrawl's
+        if next_url and not next_url.startswith(f"{self._firecrawl_url}/"):
+            raise ValueError(f"Unexpected crawl pagination URL: {next_url}")
+
+        if next_url:
+            response = await self._request(
+                "firecrawl", "GET", next_url, headers=self._firecrawl_headers()
+            )
+        else:
+            response = await self._request(
+                "firecrawl",
+                "GET",
+                f"{self._firecrawl_url}/v1/crawl/{job_id}",
+                headers=self._firecrawl_headers(),
+                params={"skip": skip} if skip else None
+            )
         return response.json()
 
     async def brave_search(
         self,
         query: str,
         count: int = 10,
-        freshness: str | None = None
+        freshness: str | None = None,
+        max_age: float | None = None
     ) -> dict[str, Any]:
         """
         Search using Brave Search API.
@@ -109,6 +429,8 @@ class MCPClient:
             query: Search query
             count: Number of results
             freshness: Time filter (e.g., 'pd' for past day, 'pw' for past week)
+            max_age: Accept cached results up to this many seconds old
+                (defaults to the search TTL; 0 forces a re-fetch)
 
         Returns:
             Search results
@@ -126,17 +448,31 @@ class MCPClient:
         if freshness:
             params["freshness"] = freshness
 
-        response = await self.client.get(
-            "https://api.search.brave.com/res/v1/web/search",
-            headers={
-                "Accept": "application/json",
-                "X-Subscription-Token": self.settings.brave_api_key
-            },
-            params=params
-        )
+        async def fetch() -> dict[str, Any]:
+            response = await self._request(
+                "brave",
+                "GET",
+                "https://api.search.brave.com/res/v1/web/search",
+                headers={
+                    "Accept": "application/json",
+                    "X-Subscription-Token": self.settings.brave_api_key
+                },
+                params=params
+            )
+            return response.json()
 
-        response.raise_for_status()
-        return response.json()
+        def result_content(body: dict[str, Any]) -> str:
+            # Only the results themselves; responses also carry volatile fields
+            results = (body.get("web") or {}).get("results") or []
+            return json.dumps([
+                [result.get("url"), result.get("title"), result.get("description")]
+                for result in results
+            ])
+
+        return await self._cached(
+            "search", query, {"count": count, "freshness": freshness},
+            self.settings.mcp_cache_search_ttl_seconds, fetch, result_content, max_age
+        )
 
 
 # Singleton instance
@@ -0,0 +1,69 @@
+"""Local evaluation of Pinecone-style metadata filters."""
+
+from typing import Any
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    """Apply a single filter operator to a metadata value."""
+    if operator == "$exists":
+        return (value is not None) == bool(operand)
+    if operator == "$eq":
+        return value == operand
+    if operator == "$ne":
+        return value != operand
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+
+    if value is None:
+        return False
+
+    try:
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata: dict[str, Any], filter_dict: dict[str, Any] | None) -> bool:
+    """
+    Check whether metadata satisfies a Pinecone-style filter.
+
+    Supports bare equality (`{"field": value}`), the comparison operators
+    `$eq`, `$ne`, `$gt`, `$gte`, `$lt`, `$lte`, `$in`, `$nin`, `$exists`,
+    and the logical combinators `$and` / `$or`.
+
+    Args:
+        metadata: Chunk metadata
+        filter_dict: Filter expression (None matches everything)
+
+    Returns:
+        True if the metadata matches
+    """
+    if not filter_dict:
+        return True
+
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+
+    return True
@@ -1,58 +1,137 @@
 """Core RAG engine for retrieval and synthesis."""
 
 import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 from anthropic import AsyncAnthropic
-from pinecone import Pinecone
 
 from app.config import get_settings
 from app.models.chat import Source
+from app.services.answer_cache import get_answer_cache
+from app.services.context_packer import ContextPacker, PackedContext, format_context_doc
 from app.services.embedding import EmbeddingService
+from app.services.lexical_index import get_lexical_index, reciprocal_rank_fusion
+from app.metrics import record_cache, record_tokens, track_stage
+from app.services.reranker import Reranker, get_reranker
+from app.services.vector_store import VectorStore, get_vector_store
+
+# Static instructions, sent as the (cacheable) system prompt
+RAG_SYSTEM_PROMPT = """You answer questions using ONLY the context documents provided in the user's message.
+Always cite your sources using [Document X] notation.
+
+Instructions:
+- Answer in the same language as the question
+- Be concise but comprehensive
+- Always cite sources for claims using [Document X] format
+- If the context doesn't contain enough information to answer fully, say so clearly
+- Synthesize information from multiple sources when relevant
+- For competitive intelligence queries, provide actionable insights"""
+
+# Per-question part of the prompt
+RAG_USER_TEMPLATE = """Answer the following question using ONLY the provided context documents.
+
+<context>
+{context}
+</context>
+
+<question>
+{query}
+</question>"""
+
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class RAGEngine:
     """RAG engine for retrieval-augmented generation."""
 
-    def __init__(self) -> None:
-        """Initialize RAG engine."""
+    def __init__(
+        self,
+        vector_store: VectorStore | None = None,
+        claude: AsyncAnthropic | None = None,
+        embedding_service: EmbeddingService | None = None,
+        reranker: Reranker | None = None,
+        context_packer: ContextPacker | None = None
+    ) -> None:
+        """
+        Initialize RAG engine.
+
+        Args:
+            vector_store: Vector index (defaults to the configured backend)
+            claude: Shared Anthropic client (a new one is created if omitted)
+            embedding_service: Shared embedding service
+            reranker: Cross-encoder reranker (defaults to the configured one)
+            context_packer: Token budgeter for context and history
+        """
         self.settings = get_settings()
-        self.claude = AsyncAnthropic(api_key=self.settings.anthropic_api_key)
-        self.embedding_service = EmbeddingService()
+        self.claude = claude or AsyncAnthropic(api_key=self.settings.anthropic_api_key)
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.answer_cache = (
+            get_answer_cache() if self.settings.answer_cache_enabled else None
+        )
+        self.lexical_index = (
+            get_lexical_index() if self.settings.lexical_index_enabled else None
+        )
+        self.reranker = reranker or get_reranker()
+        self.context_packer = context_packer or ContextPacker(
+            max_input_tokens=self.settings.context_max_input_tokens,
+            history_max_tokens=self.settings.context_history_max_tokens,
+            duplicate_threshold=self.settings.context_duplicate_threshold,
+            history_block_messages=self.settings.context_history_block_messages
+        )
+        self._vector_store = vector_store
+
+    @property
+    def vector_store(self) -> VectorStore:
+        """Vector index, resolved on first use."""
+        if self._vector_store is None:
+            self._vector_store = get_vector_store()
+        return self._vector_store
 
-        # Initialize Pinecone
-        pc = Pinecone(api_key=self.settings.pinecone_api_key)
-        self.index = pc.Index(self.settings.pinecone_index_name)
+    @property
+    def index(self) -> Any:
+        """Underlying synchronous index (the local index returns itself)."""
+        return self.vector_store.index
 
     async def retrieve(
         self,
         query: str,
         top_k: int = 5,
         filter_dict: dict[str, Any] | None = None,
-        min_score: float | None = None
+        min_score: float | None = None,
+        query_embedding: list[float] | None = None,
+        lexical_weight: float | None = None
     ) -> list[dict[str, Any]]:
         """
-        Retrieve relevant documents from Pinecone.
+        Retrieve relevant documents from the vector store, fused with BM25 matches.
+
+        When the lexical index has matches, dense and lexical rankings are
+        combined with weighted reciprocal rank fusion and `score` becomes the
+        normalized fused score (the cosine score is kept as `vector_score`).
 
         Args:
             query: Search query
             top_k: Number of results to return
             filter_dict: Metadata filters
             min_score: Minimum similarity score threshold
+            query_embedding: Precomputed query embedding, if available
+            lexical_weight: Weight of BM25 results in fusion (0 = dense only)
 
         Returns:
             List of retrieved documents with metadata
         """
         # Create query embedding
-        query_embedding = await self.embedding_service.embed_text(query)
-
-        # Query Pinecone
-        results = self.index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            filter=filter_dict,
-            include_metadata=True
-        )
+        if query_embedding is None:
+            query_embedding = await self.embedding_service.embed_text(query)
+
+        # Query the vector store
+        with track_stage("vector_query"):
+            results = await self.vector_store.query(
+                vector=query_embedding,
+                top_k=top_k,
+                filter=filter_dict,
+                include_metadata=True
+            )
 
         # Apply minimum score filter if specified
         min_score = min_score or self.settings.similarity_threshold
@@ -73,8 +152,105 @@ class RAGEngine:
                 }
                 retrieved_docs.append(doc)
 
+        if lexical_weight is None:
+            lexical_weight = self.settings.hybrid_lexical_weight
+
+        if self.lexical_index is not None and lexical_weight > 0:
+            with track_stage("lexical_query"):
+                lexical_docs = await self.lexical_index.query(query, top_k, filter_dict)
+
+            # Keyword-only matches skip the similarity cutoff, so hold them to
+            # their own floor; otherwise off-topic queries pick up chunks that
+            # merely share a word with the question
+            dense_ids = {doc["chunk_id"] for doc in retrieved_docs}
+            min_relevance = self.settings.hybrid_lexical_min_relevance
+            lexical_docs = [
+                doc for doc in lexical_docs
+                if doc["chunk_id"] in dense_ids or doc["relevance"] >= min_relevance
+            ]
+            if lexical_docs:
+                retrieved_docs = reciprocal_rank_fusion(
+                    [(retrieved_docs, 1 - lexical_weight), (lexical_docs, lexical_weight)],
+                    top_k=top_k,
+                    k=self.settings.hybrid_rrf_k
+                )
+
         return retrieved_docs
 
+    def _build_messages(
+        self,
+        query: str,
+        context_docs: list[dict[str, Any]],
+        conversation_history: list[dict[str, str]] | None = None
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]], PackedContext]:
+        """
+        Build the Claude system prompt and message list for a RAG question.
+
+        Context and history are packed into the input token budget first,
+        so only the selected documents are numbered for citation. With
+        prompt caching enabled, the system prompt and the last history turn
+        are marked as cache breakpoints, so follow-up questions only pay
+        full price for the new context and question. The packer drops old
+        history in whole blocks, so the cached prefix stays identical from
+        one turn to the next even once the conversation is over budget.
+
+        Args:
+            query: User question
+            context_docs: Retrieved context documents, most relevant first
+            conversation_history: Previous messages
+
+        Returns:
+            Tuple of (system blocks, messages, packed context)
+        """
+        reserved = self.context_packer.count_tokens(
+            RAG_SYSTEM_PROMPT + RAG_USER_TEMPLATE.format(context="", query=query)
+        )
+        packed = self.context_packer.pack(context_docs, conversation_history, reserved)
+
+        # Build context from the packed documents
+        context_text = "\n".join(
+            format_context_doc(idx, doc) for idx, doc in enumerate(packed.docs, start=1)
+        )
+
+        system: list[dict[str, Any]] = [{"type": "text", "text": RAG_SYSTEM_PROMPT}]
+
+        # Build messages
+        messages: list[dict[str, Any]] = list(packed.history)
+
+        if self.settings.prompt_cache_enabled:
+            system[-1]["cache_control"] = CACHE_CONTROL
+            if messages:
+                last = messages[-1]
+                messages[-1] = {
+                    "role": last["role"],
+                    "content": [
+                        {"type": "text", "text": last["content"], "cache_control": CACHE_CONTROL}
+                    ]
+                }
+
+        # Add current query with context
+        messages.append({
+            "role": "user",
+            "content": RAG_USER_TEMPLATE.format(context=context_text, query=query)
+        })
+
+        return system, messages, packed
+
+    def _generation_metadata(self, response: Any, processing_time: float) -> dict[str, Any]:
+        """Collect usage metadata from a Claude response."""
+        usage = response.usage
+        return {
+            "model": self.settings.claude_model,
+            "tokens_used": usage.input_tokens + usage.output_tokens,
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            # Prompt-cache usage (absent from older responses)
+            "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+            "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+            "processing_time_ms": processing_time,
+            "stop_reason": response.stop_reason
+        }
+
     async def synthesize(
         self,
         query: str,
@@ -92,113 +268,239 @@ class RAGEngine:
         Returns:
             Tuple of (answer text, metadata)
         """
-        # Build context from retrieved documents
-        context_parts = []
-        for idx, doc in enumerate(context_docs, start=1):
-            source_info = f"Source: {doc['source']}"
-            if doc.get('page'):
-                source_info += f", Page: {doc['page']}"
-
-            context_parts.append(
-                f"[Document {idx}] {source_info}\n{doc['text']}\n"
+        system, messages, packed = self._build_messages(query, context_docs, conversation_history)
+
+        # Call Claude
+        start_time = time.time()
+
+        with track_stage("synthesize"):
+            response = await self.claude.messages.create(
+                model=self.settings.claude_model,
+                max_tokens=self.settings.claude_max_tokens,
+                system=system,
+                messages=messages
             )
 
-        context_text = "\n".join(context_parts)
+        processing_time = (time.time() - start_time) * 1000  # Convert to ms
 
-        # Build messages
-        messages = []
+        # Extract answer
+        answer = response.content[0].text
 
-        # Add conversation history if exists
-        if conversation_history:
-            messages.extend(conversation_history)
+        metadata = self._generation_metadata(response, processing_time)
+        metadata["context"] = packed.stats()
+        record_tokens(metadata)
 
-        # Add current query with context
-        user_message = f"""Answer the following question using ONLY the provided context documents.
-Always cite your sources using [Document X] notation.
+        return answer, metadata
 
-<context>
-{context_text}
-</context>
+    async def synthesize_stream(
+        self,
+        query: str,
+        context_docs: list[dict[str, Any]],
+        conversation_history: list[dict[str, str]] | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Stream an answer from Claude with RAG context.
 
-<question>
-{query}
-</question>
+        Args:
+            query: User question
+            context_docs: Retrieved context documents
+            conversation_history: Previous messages
 
-Instructions:
-- Answer in the same language as the question
-- Be concise but comprehensive
-- Always cite sources for claims using [Document X] format
-- If the context doesn't contain enough information to answer fully, say so clearly
-- Synthesize information from multiple sources when relevant
-- For competitive intelligence queries, provide actionable insights"""
+        Yields:
+            A {"type": "context", "context": ...} event with the packing
+            accounting, {"type": "token", "text": ...} events as text
+            arrives, then a final {"type": "metadata", "metadata": ...} event
+        """
+        system, messages, packed = self._build_messages(query, context_docs, conversation_history)
+        yield {"type": "context", "context": packed.stats()}
 
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        start_time = time.time()
+        first_token_ms: float | None = None
+
+        with track_stage("synthesize"):
+            async with self.claude.messages.stream(
+                model=self.settings.claude_model,
+                max_tokens=self.settings.claude_max_tokens,
+                system=system,
+                messages=messages
+            ) as stream:
+                async for text in stream.text_stream:
+                    if first_token_ms is None:
+                        first_token_ms = (time.time() - start_time) * 1000
+                    yield {"type": "token", "text": text}
+
+                response = await stream.get_final_message()
+
+        processing_time = (time.time() - start_time) * 1000
+        metadata = self._generation_metadata(response, processing_time)
+        metadata["time_to_first_token_ms"] = first_token_ms
+        metadata["context"] = packed.stats()
+        record_tokens(metadata)
+
+        yield {"type": "metadata", "metadata": metadata}
+
+    def _no_results_response(self) -> dict[str, Any]:
+        """Response returned when retrieval finds nothing relevant."""
+        return {
+            "answer": "I don't have enough information in my knowledge base to answer this question. Please upload relevant documents or try a different query.",
+            "sources": [],
+            "model_used": self.settings.claude_model,
+            "tokens_used": 0,
+            "processing_time_ms": 0,
+            "retrieved_doc_count": 0
+        }
 
-        # Call Claude
+    def _packed_docs(
+        self,
+        retrieved_docs: list[dict[str, Any]],
+        context: dict[str, Any] | None
+    ) -> list[dict[str, Any]]:
+        """Retrieved documents that made it into the packed context, in citation order."""
+        if context is None:
+            return retrieved_docs
+        used = set(context["chunk_ids"])
+        return [doc for doc in retrieved_docs if doc["chunk_id"] in used]
+
+    def _format_sources(self, retrieved_docs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Convert retrieved documents into serialized source citations."""
+        sources = [
+            Source(
+                source=doc["source"],
+                page=doc.get("page"),
+                chunk_id=doc["chunk_id"],
+                relevance_score=doc["score"],
+                text_snippet=doc["text"][:200] + "..." if len(doc["text"]) > 200 else doc["text"]
+            )
+            for doc in retrieved_docs
+        ]
+        return [s.model_dump() for s in sources]
+
+    async def _prepare(
+        self,
+        user_query: str,
+        conversation_history: list[dict[str, str]] | None,
+        filters: dict[str, Any] | None,
+        top_k: int,
+        lexical_weight: float | None
+    ) -> tuple[list[float], bool, dict[str, Any] | None, list[dict[str, Any]], dict[str, Any]]:
+        """
+        Embed the query, consult the answer cache and retrieve context.
+
+        With a reranker configured, `rerank_candidates` documents are
+        retrieved and the reranker keeps the best `top_k`.
+
+        Returns:
+            Tuple of (query embedding, whether the cache applies,
+            cached result or None, retrieved documents, retrieval metadata)
+        """
         start_time = time.time()
+        query_embedding = await self.embedding_service.embed_text(user_query)
+
+        # Follow-up questions depend on the history, so only cache standalone ones
+        use_cache = self.answer_cache is not None and not conversation_history
+        if use_cache:
+            cached = self.answer_cache.lookup(
+                query_embedding, filters, top_k, lexical_weight=lexical_weight
+            )
+            record_cache("answer", hits=int(cached is not None), misses=int(cached is None))
+            if cached is not None:
+                cached["processing_time_ms"] = (time.time() - start_time) * 1000
+                return query_embedding, use_cache, cached, [], {}
 
-        response = await self.claude.messages.create(
-            model=self.settings.claude_model,
-            max_tokens=self.settings.claude_max_tokens,
-            messages=messages
+        fetch_k = top_k
+        if self.reranker is not None:
+            fetch_k = max(top_k, self.settings.rerank_candidates)
+
+        retrieved_docs = await self.retrieve(
+            query=user_query,
+            top_k=fetch_k,
+            filter_dict=filters,
+            query_embedding=query_embedding,
+            lexical_weight=lexical_weight
         )
 
-        processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        retrieval_metadata: dict[str, Any] = {}
+        if self.reranker is not None and retrieved_docs:
+            with track_stage("rerank"):
+                retrieved_docs, retrieval_metadata["rerank"] = await self.reranker.rerank(
+                    user_query, retrieved_docs, top_k
+                )
 
-        # Extract answer
-        answer = response.content[0].text
+        return query_embedding, use_cache, None, retrieved_docs, retrieval_metadata
 
-        # Collect metadata
-        metadata = {
-            "model": self.settings.claude_model,
-            "tokens_used": response.usage.input_tokens + response.usage.output_tokens,
-            "input_tokens": response.usage.input_tokens,
-            "output_tokens": response.usage.output_tokens,
-            "processing_time_ms": processing_time,
-            "stop_reason": response.stop_reason
+    def _finalize(
+        self,
+        user_query: str,
+        query_embedding: list[float],
+        use_cache: bool,
+        filters: dict[str, Any] | None,
+        top_k: int,
+        lexical_weight: float | None,
+        answer: str,
+        retrieved_docs: list[dict[str, Any]],
+        gen_metadata: dict[str, Any],
+        retrieval_metadata: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Assemble the final response and store it in the answer cache."""
+        cited_docs = self._packed_docs(retrieved_docs, gen_metadata.get("context"))
+        result = {
+            "answer": answer,
+            "sources": self._format_sources(cited_docs),
+            "model_used": gen_metadata["model"],
+            "tokens_used": gen_metadata["tokens_used"],
+            "processing_time_ms": gen_metadata["processing_time_ms"],
+            "retrieved_doc_count": len(retrieved_docs),
+            "metadata": {**gen_metadata, **retrieval_metadata, "cache": {"hit": False}}
         }
 
-        return answer, metadata
+        if use_cache:
+            self.answer_cache.store(
+                query=user_query,
+                query_embedding=query_embedding,
+                filters=filters,
+                top_k=top_k,
+                result=result,
+                document_ids={doc["document_id"] for doc in cited_docs},
+                lexical_weight=lexical_weight
+            )
+
+        return result
 
     async def query(
         self,
         user_query: str,
         conversation_history: list[dict[str, str]] | None = None,
         filters: dict[str, Any] | None = None,
-        top_k: int = 5
+        top_k: int = 5,
+        lexical_weight: float | None = None
     ) -> dict[str, Any]:
         """
         Full RAG pipeline: retrieve → synthesize → return with sources.
 
+        Standalone questions (no conversation history) are served from the
+        semantic answer cache when a similar question was answered recently.
+
         Args:
             user_query: User question
             conversation_history: Previous conversation messages
             filters: Metadata filters for retrieval
             top_k: Number of documents to retrieve
+            lexical_weight: Weight of BM25 results in hybrid retrieval
 
         Returns:
             Dictionary with answer, sources, and metadata
         """
-        # Step 1: Retrieve relevant documents
-        retrieved_docs = await self.retrieve(
-            query=user_query,
-            top_k=top_k,
-            filter_dict=filters
+        # Step 1: Retrieve relevant documents (or a cached answer)
+        query_embedding, use_cache, cached, retrieved_docs, retrieval_metadata = await self._prepare(
+            user_query, conversation_history, filters, top_k, lexical_weight
         )
 
+        if cached is not None:
+            return cached
+
         if not retrieved_docs:
             # No relevant documents found
-            return {
-                "answer": "I don't have enough information in my knowledge base to answer this question. Please upload relevant documents or try a different query.",
-                "sources": [],
-                "model_used": self.settings.claude_model,
-                "tokens_used": 0,
-                "processing_time_ms": 0,
-                "retrieved_doc_count": 0
-            }
+            return self._no_results_response()
 
         # Step 2: Synthesize answer
         answer, gen_metadata = await self.synthesize(
@@ -207,28 +509,67 @@ Instructions:
             conversation_history=conversation_history
         )
 
-        # Step 3: Format sources
-        sources = [
-            Source(
-                source=doc["source"],
-                page=doc.get("page"),
-                chunk_id=doc["chunk_id"],
-                relevance_score=doc["score"],
-                text_snippet=doc["text"][:200] + "..." if len(doc["text"]) > 200 else doc["text"]
-            )
-            for doc in retrieved_docs
-        ]
+        # Step 3: Format sources and return complete response
+        return self._finalize(
+            user_query, query_embedding, use_cache, filters, top_k, lexical_weight,
+            answer, retrieved_docs, gen_metadata, retrieval_metadata
+        )
 
-        # Step 4: Return complete response
-        return {
-            "answer": answer,
-            "sources": [s.model_dump() for s in sources],
-            "model_used": gen_metadata["model"],
-            "tokens_used": gen_metadata["tokens_used"],
-            "processing_time_ms": gen_metadata["processing_time_ms"],
-            "retrieved_doc_count": len(retrieved_docs),
-            "metadata": gen_metadata
-        }
+    async def query_stream(
+        self,
+        user_query: str,
+        conversation_history: list[dict[str, str]] | None = None,
+        filters: dict[str, Any] | None = None,
+        top_k: int = 5,
+        lexical_weight: float | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Streaming RAG pipeline.
+
+        Args:
+            user_query: User question
+            conversation_history: Previous conversation messages
+            filters: Metadata filters for retrieval
+            top_k: Number of documents to retrieve
+            lexical_weight: Weight of BM25 results in hybrid retrieval
+
+        Yields:
+            {"type": "sources"} once the context is packed, {"type": "token"} for
+            each chunk of answer text, and a final {"type": "done"} event
+            carrying the same result dictionary `query` returns
+        """
+        query_embedding, use_cache, cached, retrieved_docs, retrieval_metadata = await self._prepare(
+            user_query, conversation_history, filters, top_k, lexical_weight
+        )
+
+        if cached is not None or not retrieved_docs:
+            result = cached or self._no_results_response()
+            yield {"type": "sources", "sources": result["sources"]}
+            yield {"type": "token", "text": result["answer"]}
+            yield {"type": "done", "result": result}
+            return
+
+        answer_parts: list[str] = []
+        gen_metadata: dict[str, Any] = {}
+        async for event in self.synthesize_stream(
+            query=user_query,
+            context_docs=retrieved_docs,
+            conversation_history=conversation_history
+        ):
+            if event["type"] == "context":
+                cited_docs = self._packed_docs(retrieved_docs, event["context"])
+                yield {"type": "sources", "sources": self._format_sources(cited_docs)}
+            elif event["type"] == "token":
+                answer_parts.append(event["text"])
+                yield event
+            else:
+                gen_metadata = event["metadata"]
+
+        result = self._finalize(
+            user_query, query_embedding, use_cache, filters, top_k, lexical_weight,
+            "".join(answer_parts), retrieved_docs, gen_metadata, retrieval_metadata
+        )
+        yield {"type": "done", "result": result}
 
     async def upsert_chunks(
         self,
@@ -236,7 +577,7 @@ Instructions:
         batch_size: int = 100
     ) -> dict[str, int]:
         """
-        Embed and upsert document chunks to Pinecone.
+        Embed and upsert document chunks to the vector store.
 
         Args:
             chunks: List of chunk dictionaries with text and metadata
@@ -246,43 +587,85 @@ Instructions:
             Statistics about the upsert operation
         """
         total_chunks = len(chunks)
-        upserted_count = 0
+
+        # Cached answers citing a re-indexed document may now be stale
+        if self.answer_cache is not None:
+            for document_id in {chunk["document_id"] for chunk in chunks}:
+                self.answer_cache.invalidate_document(document_id)
 
         # Embed all chunks
         embedded_chunks = await self.embedding_service.embed_documents(chunks)
 
-        # Upsert in batches
-        for i in range(0, len(embedded_chunks), batch_size):
-            batch = embedded_chunks[i:i + batch_size]
-
-            # Format for Pinecone
-            vectors = []
-            for chunk in batch:
-                vector = {
-                    "id": chunk["chunk_id"],
-                    "values": chunk["embedding"],
-                    "metadata": {
-                        "text": chunk["text"],
-                        "source": chunk["metadata"].get("source", ""),
-                        "document_id": chunk["document_id"],
-                        "chunk_index": chunk["chunk_index"],
-                        **chunk["metadata"]  # Include all other metadata
-                    }
+        # Format as vectors
+        vectors = [
+            {
+                "id": chunk["chunk_id"],
+                "values": chunk["embedding"],
+                "metadata": {
+                    "text": chunk["text"],
+                    **self._chunk_metadata(chunk)
                 }
-                vectors.append(vector)
+            }
+            for chunk in embedded_chunks
+        ]
 
-            # Upsert to Pinecone
-            self.index.upsert(vectors=vectors)
-            upserted_count += len(vectors)
+        # Upsert to the vector store, batches in parallel
+        with track_stage("vector_upsert"):
+            upserted_count = await self.vector_store.upsert(vectors, batch_size=batch_size)
+
+        # Keep the lexical index in step with the vector index
+        if self.lexical_index is not None:
+            await self.lexical_index.upsert([
+                {**chunk, "metadata": self._chunk_metadata(chunk)}
+                for chunk in chunks
+            ])
 
         return {
             "total_chunks": total_chunks,
             "upserted": upserted_count
         }
 
+    def _chunk_metadata(self, chunk: dict[str, Any]) -> dict[str, Any]:
+        """Metadata stored alongside a chunk in the vector and lexical indexes."""
+        return {
+            "source": chunk["metadata"].get("source", ""),
+            "document_id": chunk["document_id"],
+            "chunk_index": chunk["chunk_index"],
+            **chunk["metadata"]  # Include all other metadata
+        }
+
+    async def delete_chunks(
+        self,
+        document_id: str,
+        chunk_ids: list[str],
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Delete specific chunks of a document from the vector store.
+
+        Args:
+            document_id: Parent document ID
+            chunk_ids: Chunk IDs to delete
+            batch_size: Number of IDs per delete request
+
+        Returns:
+            Number of chunks deleted
+        """
+        if not chunk_ids:
+            return 0
+
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_document(document_id)
+        if self.lexical_index is not None:
+            await self.lexical_index.delete(ids=chunk_ids)
+
+        await self.vector_store.delete(ids=chunk_ids, batch_size=batch_size)
+
+        return len(chunk_ids)
+
     async def delete_document(self, document_id: str) -> bool:
         """
-        Delete all chunks for a document from Pinecone.
+        Delete all chunks for a document from the vector store.
 
         Args:
             document_id: Document identifier
@@ -290,8 +673,13 @@ Instructions:
         Returns:
             Success status
         """
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_document(document_id)
+        if self.lexical_index is not None:
+            await self.lexical_index.delete(document_id=document_id)
+
         try:
-            self.index.delete(filter={"document_id": document_id})
+            await self.vector_store.delete(filter={"document_id": document_id})
             return True
         except Exception:
             return False
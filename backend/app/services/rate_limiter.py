@@ -0,0 +1,55 @@
+"""Async rate limiting primitives."""
+
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for async callers.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Waiters are served in FIFO order.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens held (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float) -> "AsyncTokenBucket":
+        """Create a bucket allowing `amount` tokens per minute."""
+        return cls(rate=amount / 60.0, capacity=amount)
+
+    def _refill(self) -> None:
+        """Add tokens accrued since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        Wait until `amount` tokens are available and consume them.
+
+        Requests larger than the bucket capacity are clamped to it so they
+        can still proceed once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
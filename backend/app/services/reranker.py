@@ -0,0 +1,165 @@
+"""Cross-encoder reranking of retrieved chunks."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import get_settings
+
+# Scores (query, passage) pairs; higher is more relevant
+ScoreFn = Callable[[str, list[str]], list[float]]
+
+_reranker: "Reranker | None" = None
+
+
+def load_cross_encoder(model_name: str) -> ScoreFn:
+    """
+    Load a sentence-transformers cross-encoder as a scoring function.
+
+    Args:
+        model_name: Hugging Face model name or local path
+
+    Returns:
+        Function scoring a query against a batch of passages
+    """
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError as e:
+        raise ImportError(
+            "Reranking requires sentence-transformers "
+            "(install the `rerank` extra or set RERANK_ENABLED=false)"
+        ) from e
+
+    model = CrossEncoder(model_name, device="cpu")
+
+    def score(query: str, passages: list[str]) -> list[float]:
+        return [float(s) for s in model.predict([(query, p) for p in passages])]
+
+    return score
+
+
+class Reranker:
+    """
+    Reorders retrieval candidates with a cross-encoder under a time budget.
+
+    Candidates are scored in batches on dedicated CPU threads. If the
+    budget runs out before every candidate is scored, the candidates are
+    returned in their original (vector/fused) order, so a slow model can
+    delay an answer by at most the budget. The scoring thread checks the
+    deadline before each batch, so work for a query that already timed
+    out stops after the batch in progress; with more than one thread, that
+    batch does not hold up the next query either.
+    """
+
+    def __init__(
+        self,
+        score_fn: ScoreFn,
+        batch_size: int = 16,
+        timeout_ms: float = 300.0,
+        workers: int = 2
+    ) -> None:
+        """
+        Initialize reranker.
+
+        Args:
+            score_fn: Scores a query against a batch of passages
+            batch_size: Passages scored per model call
+            timeout_ms: Time budget for reranking one query
+            workers: Scoring threads
+        """
+        self.score_fn = score_fn
+        self.batch_size = batch_size
+        self.timeout_ms = timeout_ms
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reranker")
+
+    def _score(self, query: str, passages: list[str], deadline: float) -> list[float] | None:
+        """Score passages batch by batch; None if the deadline passes first."""
+        scores: list[float] = []
+        for i in range(0, len(passages), self.batch_size):
+            if time.perf_counter() >= deadline:
+                return None
+            scores.extend(self.score_fn(query, passages[i:i + self.batch_size]))
+        return scores
+
+    async def rerank(
+        self,
+        query: str,
+        docs: list[dict[str, Any]],
+        top_k: int
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """
+        Keep the `top_k` most relevant candidates.
+
+        Reranked documents get a `rerank_score`; `score` is left unchanged
+        so relevance scores keep their meaning for citations and caching.
+
+        Args:
+            query: User question
+            docs: Candidates in retrieval order
+            top_k: Number of documents to keep
+
+        Returns:
+            Tuple of (selected documents, info dict with `applied`,
+            `candidates` and `time_ms`)
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline = start + self.timeout_ms / 1000
+
+        passages = [doc["text"] for doc in docs]
+        try:
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._score, query, passages, deadline),
+                timeout=max(deadline - time.perf_counter(), 0)
+            )
+        except asyncio.TimeoutError:
+            scores = None
+        timed_out = scores is None
+
+        info = {
+            "applied": not timed_out,
+            "candidates": len(docs),
+            "time_ms": (time.perf_counter() - start) * 1000
+        }
+
+        if timed_out:
+            return docs[:top_k], info
+
+        ranked = sorted(zip(scores, range(len(docs))), key=lambda pair: -pair[0])
+        return [
+            {**docs[index], "rerank_score": score}
+            for score, index in ranked[:top_k]
+        ], info
+
+    def close(self) -> None:
+        """Stop the scoring thread."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_reranker() -> Reranker | None:
+    """Get reranker instance (None when reranking is disabled)."""
+    global _reranker
+
+    settings = get_settings()
+    if not settings.rerank_enabled:
+        return None
+
+    if _reranker is None:
+        _reranker = Reranker(
+            load_cross_encoder(settings.rerank_model),
+            batch_size=settings.rerank_batch_size,
+            timeout_ms=settings.rerank_timeout_ms,
+            workers=settings.rerank_workers
+        )
+
+    return _reranker
+
+
+def close_reranker() -> None:
+    """Release reranker resources."""
+    global _reranker
+
+    if _reranker is not None:
+        _reranker.close()
+        _reranker = None
@@ -0,0 +1,90 @@
+"""Persistent cache of external API responses (Firecrawl, Brave Search)."""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.services.embedding_cache import normalize_text
+from app.services.sqlite_cache import SQLiteLRUCache
+
+
+def make_request_key(kind: str, target: str, params: dict[str, Any] | None = None) -> str:
+    """
+    Build the cache key for a request.
+
+    Args:
+        kind: Request type (e.g. "scrape", "search")
+        target: URL or query
+        params: Other request parameters that change the response
+    """
+    payload = json.dumps([target.strip(), params or {}], sort_keys=True)
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of normalized content, used to detect changed pages."""
+    return hashlib.sha256(normalize_text(content).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    """Stored API response."""
+
+    body: dict[str, Any]
+    content_hash: str
+    fetched_at: float
+
+
+class ResponseCache(SQLiteLRUCache[CachedResponse]):
+    """
+    Two-level response cache: in-memory LRU backed by SQLite.
+
+    Entries never expire here; callers compare `fetched_at` with the TTL
+    of their source type, so an expired entry's content hash is still
+    available to tell whether a re-fetched response changed.
+    """
+
+    table = "responses"
+    columns = ("body TEXT NOT NULL", "content_hash TEXT NOT NULL", "fetched_at REAL NOT NULL")
+
+    def __init__(self, path: str | Path | None, max_memory_items: int = 1000) -> None:
+        """
+        Initialize response cache.
+
+        Args:
+            path: SQLite file path, or None for a memory-only cache
+            max_memory_items: Maximum number of responses kept in the LRU
+        """
+        super().__init__(path, max_memory_items)
+
+    def _encode(self, response: CachedResponse) -> tuple[Any, ...]:
+        """Store the body as JSON alongside its hash and fetch time."""
+        return json.dumps(response.body), response.content_hash, response.fetched_at
+
+    def _decode(self, row: tuple[Any, ...]) -> CachedResponse:
+        """Rebuild the response from its JSON body, hash and fetch time."""
+        return CachedResponse(body=json.loads(row[0]), content_hash=row[1], fetched_at=row[2])
+
+    def get(self, key: str) -> CachedResponse | None:
+        """
+        Look up a response, fresh or not.
+
+        Args:
+            key: Key from `make_request_key`
+
+        Returns:
+            The stored response, or None
+        """
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Key from `make_request_key`
+            response: Response to store
+        """
+        self.set_many({key: response})
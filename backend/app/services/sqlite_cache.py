@@ -0,0 +1,169 @@
+"""Base class for two-level caches: in-memory LRU backed by SQLite."""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+V = TypeVar("V")
+
+# Keys per SELECT, well under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+class SQLiteLRUCache(ABC, Generic[V]):
+    """
+    Two-level cache: in-memory LRU backed by SQLite.
+
+    Subclasses name the table and its value columns and convert values to
+    and from rows; lookups, eviction, persistence and locking live here.
+    The SQLite connection is opened lazily so that creating the cache has
+    no side effects on disk.
+    """
+
+    # Table name and value column definitions (the `key` column is implied)
+    table = ""
+    columns: tuple[str, ...] = ()
+
+    def __init__(self, path: str | Path | None, max_memory_items: int) -> None:
+        """
+        Initialize cache.
+
+        Args:
+            path: SQLite file path, or None for a memory-only cache
+            max_memory_items: Maximum number of values kept in the LRU
+        """
+        self.path = Path(path) if path else None
+        self.max_memory_items = max_memory_items
+        self._memory: OrderedDict[str, V] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        names = [column.split()[0] for column in self.columns]
+        self._select_columns = ", ".join(names)
+        self._insert_sql = (
+            f"INSERT OR REPLACE INTO {self.table} (key, {self._select_columns}) "
+            f"VALUES (?, {', '.join('?' * len(names))})"
+        )
+
+    @abstractmethod
+    def _encode(self, value: V) -> tuple[Any, ...]:
+        """Column values stored for a value, in `columns` order."""
+
+    @abstractmethod
+    def _decode(self, row: tuple[Any, ...]) -> V:
+        """Value rebuilt from its stored column values."""
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """Open the SQLite store on first use."""
+        if self.path is None:
+            return None
+
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key TEXT PRIMARY KEY, {', '.join(self.columns)})"
+            )
+            self._conn.commit()
+
+        return self._conn
+
+    def _remember(self, key: str, value: V) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entries."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, V]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Cache keys to look up
+
+        Returns:
+            Mapping of found keys to their values
+        """
+        found: dict[str, V] = {}
+
+        with self._lock:
+            missing: list[str] = []
+            for key in dict.fromkeys(keys):
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = value
+                else:
+                    missing.append(key)
+
+            conn = self._connection()
+            if conn is not None and missing:
+                for i in range(0, len(missing), LOOKUP_BATCH_SIZE):
+                    batch = missing[i:i + LOOKUP_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, {self._select_columns} FROM {self.table} "
+                        f"WHERE key IN ({placeholders})",
+                        batch
+                    ).fetchall()
+                    for key, *columns in rows:
+                        value = self._decode(tuple(columns))
+                        self._remember(key, value)
+                        found[key] = value
+                        self.disk_hits += 1
+
+            for key in keys:
+                if key in found:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        return found
+
+    def set_many(self, items: dict[str, V]) -> None:
+        """
+        Store several values at once.
+
+        Args:
+            items: Mapping of cache keys to values
+        """
+        if not items:
+            return
+
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+
+            conn = self._connection()
+            if conn is not None:
+                conn.executemany(
+                    self._insert_sql,
+                    [(key, *self._encode(value)) for key, value in items.items()]
+                )
+                conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and current memory usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "memory_items": len(self._memory),
+        }
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,667 @@
+"""Vector store interface and the local (on-disk) implementation."""
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Protocol
+
+from app.config import get_settings
+from app.db.pinecone_client import close_pinecone, get_async_index
+from app.services.metadata_filter import matches_filter
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import hnswlib
+except ImportError:  # pragma: no cover - optional dependency
+    hnswlib = None
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "index.sqlite3"
+HNSW_FILE = "hnsw.bin"
+
+# Rows allocated when the vectors file is created; it then doubles as needed
+INITIAL_CAPACITY = 1024
+# HNSW graph parameters (connectivity and build-time beam width)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+# Metadata kept only in SQLite: not filterable, returned with matches
+UNINDEXED_METADATA = {"text"}
+# IDs per SQLite statement, below its bound parameter limit
+SQLITE_BATCH_SIZE = 500
+
+_local_index: "LocalVectorIndex | None" = None
+
+
+class VectorStore(Protocol):
+    """
+    Async vector index used by the RAG engine.
+
+    `AsyncPineconeIndex` and `LocalVectorIndex` both implement it. Query
+    results follow Pinecone's shape: an object with `matches`, each having
+    `id`, `score` and `metadata`.
+    """
+
+    async def query(
+        self,
+        vector: list[float],
+        top_k: int,
+        filter: dict[str, Any] | None = None,
+        include_metadata: bool = True
+    ) -> Any:
+        """Return the `top_k` nearest vectors matching `filter`."""
+
+    async def upsert(self, vectors: list[dict[str, Any]], batch_size: int = 100) -> int:
+        """Insert or replace vectors; return how many were written."""
+
+    async def delete(
+        self,
+        ids: list[str] | None = None,
+        filter: dict[str, Any] | None = None,
+        batch_size: int = 1000
+    ) -> None:
+        """Delete vectors by ID or by metadata filter."""
+
+    def close(self) -> None:
+        """Release resources."""
+
+
+@dataclass
+class VectorMatch:
+    """A single query match."""
+
+    id: str
+    score: float
+    metadata: dict[str, Any]
+
+
+@dataclass
+class QueryResult:
+    """Query response with matches ordered by descending score."""
+
+    matches: list[VectorMatch] = field(default_factory=list)
+
+
+def _document_ids(condition: Any) -> list[Any] | None:
+    """Values a `document_id` filter condition allows, if it is an equality or `$in`."""
+    if not isinstance(condition, dict):
+        return [condition]
+    if condition.keys() == {"$eq"}:
+        return [condition["$eq"]]
+    if condition.keys() == {"$in"}:
+        return list(condition["$in"])
+    return None
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity index on local disk, for offline use and benchmarks.
+
+    Unit-normalized vectors are appended to a memory-mapped float32 file;
+    replacing or deleting a vector only marks its old row dead, and dead
+    rows are compacted away once they outnumber live ones. IDs and
+    metadata live in SQLite next to it. Each upsert or delete writes just
+    the affected rows, so indexing a corpus costs time linear in its size.
+
+    Queries use an HNSW graph when hnswlib is installed and more than
+    `exact_scan_max_rows` rows are eligible, and an exact NumPy scan
+    otherwise. Metadata filters first narrow the candidates (by
+    `document_id` through an in-memory posting index, then by the
+    remaining conditions on the non-text metadata) and only those rows are
+    scored. The graph is saved on `flush()`/`close()`; after a crash it is
+    brought up to date from the vectors file on load.
+
+    All reads and writes run on a single background thread, so they never
+    block the event loop and never race with each other.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ann: bool | None = None,
+        ef_search: int | None = None,
+        exact_scan_max_rows: int | None = None
+    ) -> None:
+        """
+        Initialize local index, loading any previously persisted state.
+
+        Args:
+            path: Directory holding the index files, or None for memory only
+            ann: Use an HNSW graph if hnswlib is installed (defaults to settings)
+            ef_search: HNSW search beam width (defaults to settings)
+            exact_scan_max_rows: Largest candidate set scanned exactly
+                instead of through the graph (defaults to settings)
+
+        Raises:
+            ImportError: If numpy is not installed
+        """
+        if np is None:
+            raise ImportError(
+                "The local vector store requires numpy "
+                "(install the `local-vectors` extra or set VECTOR_STORE_BACKEND=pinecone)"
+            )
+
+        settings = get_settings()
+        self.path = Path(path) if path else None
+        self.use_ann = (settings.local_vector_ann_enabled if ann is None else ann) and hnswlib is not None
+        self.ef_search = ef_search or settings.local_vector_hnsw_ef_search
+        self.exact_scan_max_rows = (
+            settings.local_vector_exact_scan_max_rows
+            if exact_scan_max_rows is None else exact_scan_max_rows
+        )
+        self.dimension: int | None = None
+
+        self._matrix: Any = None  # (capacity, dimension) float32
+        self._live = np.zeros(0, dtype=bool)
+        self._used = 0  # Rows written, live or dead
+        self._rows: dict[str, int] = {}
+        self._row_ids: list[str | None] = []
+        self._filter_metadata: list[dict[str, Any] | None] = []
+        self._by_document: dict[Any, set[int]] = {}
+        self._hnsw: Any = None
+        self._hnsw_dirty = False
+        self._closed = False
+
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(self.path / METADATA_FILE) if self.path else ":memory:",
+            check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "id TEXT PRIMARY KEY, row INTEGER NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-store")
+        self._load()
+
+    def __len__(self) -> int:
+        """Number of stored vectors."""
+        return len(self._rows)
+
+    @property
+    def index(self) -> "LocalVectorIndex":
+        """The index itself (mirrors `AsyncPineconeIndex.index`)."""
+        return self
+
+    async def _call(self, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a method on the index thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(method, *args, **kwargs)
+        )
+
+    async def query(
+        self,
+        vector: list[float],
+        top_k: int,
+        filter: dict[str, Any] | None = None,
+        include_metadata: bool = True,
+        **kwargs: Any
+    ) -> QueryResult:
+        """
+        Find the nearest stored vectors.
+
+        Args:
+            vector: Query embedding
+            top_k: Number of matches to return
+            filter: Pinecone-style metadata filter (on metadata other than `text`)
+            include_metadata: Whether to return metadata with each match
+
+        Returns:
+            Matches ordered by descending cosine similarity
+        """
+        return await self._call(self._query, vector, top_k, filter, include_metadata)
+
+    async def upsert(self, vectors: list[dict[str, Any]], batch_size: int = 100) -> int:
+        """
+        Insert or replace vectors and persist them.
+
+        Args:
+            vectors: Vectors with `id`, `values` and `metadata`
+            batch_size: Unused; accepted for interface compatibility
+
+        Returns:
+            Number of vectors upserted
+        """
+        return await self._call(self._upsert, vectors)
+
+    async def delete(
+        self,
+        ids: list[str] | None = None,
+        filter: dict[str, Any] | None = None,
+        batch_size: int = 1000
+    ) -> None:
+        """
+        Delete vectors by ID or by metadata filter and persist the deletion.
+
+        Args:
+            ids: Vector IDs to delete
+            filter: Metadata filter selecting vectors to delete
+            batch_size: Unused; accepted for interface compatibility
+        """
+        await self._call(self._delete, ids, filter)
+
+    async def flush(self) -> None:
+        """Save the HNSW graph so the next start does not rebuild it."""
+        await self._call(self._flush)
+
+    def close(self) -> None:
+        """Flush the index and stop the index thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.submit(self._flush).result()
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    def _query(
+        self,
+        vector: list[float],
+        top_k: int,
+        filter_dict: dict[str, Any] | None,
+        include_metadata: bool
+    ) -> QueryResult:
+        """Top-k search (runs on the index thread)."""
+        if not self._rows or top_k <= 0:
+            return QueryResult()
+
+        if len(vector) != self.dimension:
+            raise ValueError(
+                f"Query dimension {len(vector)} does not match index dimension {self.dimension}"
+            )
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+
+        rows = None
+        if filter_dict:
+            rows = self._candidates(filter_dict)
+            if not len(rows):
+                return QueryResult()
+
+        eligible = len(rows) if rows is not None else len(self._rows)
+        if self._hnsw is not None and eligible > self.exact_scan_max_rows:
+            best = self._ann_search(query, top_k, rows)
+        else:
+            best = self._exact_search(query, top_k, rows)
+
+        ids = [self._row_ids[row] for _, row in best]
+        metadata = self._fetch_metadata(ids) if include_metadata else {}
+        return QueryResult(matches=[
+            VectorMatch(id=vector_id, score=score, metadata=metadata.get(vector_id, {}))
+            for vector_id, (score, _) in zip(ids, best)
+        ])
+
+    def _candidates(self, filter_dict: dict[str, Any]) -> Any:
+        """Live rows matching a filter, as a sorted array of row numbers."""
+        residual = filter_dict
+        document_ids = None
+        if "document_id" in filter_dict:
+            document_ids = _document_ids(filter_dict["document_id"])
+
+        if document_ids is not None:
+            rows: Any = set().union(*(self._by_document.get(d, ()) for d in document_ids))
+            residual = {k: v for k, v in filter_dict.items() if k != "document_id"}
+        else:
+            rows = np.flatnonzero(self._live[:self._used]).tolist()
+
+        if residual:
+            rows = [row for row in rows if matches_filter(self._filter_metadata[row], residual)]
+
+        return np.fromiter(sorted(rows), dtype=np.int64)
+
+    def _exact_search(self, query: Any, top_k: int, rows: Any | None) -> list[tuple[float, int]]:
+        """Score every candidate row (all live rows if None)."""
+        if rows is None:
+            scores = self._matrix[:self._used] @ query
+            scores[~self._live[:self._used]] = -np.inf
+            top_k = min(top_k, len(self._rows))
+        else:
+            scores = self._matrix[rows] @ query
+            top_k = min(top_k, len(rows))
+
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (float(scores[i]), int(rows[i]) if rows is not None else int(i))
+            for i in top
+        ]
+
+    def _ann_search(self, query: Any, top_k: int, rows: Any | None) -> list[tuple[float, int]]:
+        """Approximate search through the HNSW graph, restricted to `rows` if given."""
+        top_k = min(top_k, len(rows) if rows is not None else len(self._rows))
+        allowed = set(rows.tolist()) if rows is not None else None
+        self._hnsw.set_ef(max(self.ef_search, top_k))
+
+        try:
+            labels, distances = self._hnsw.knn_query(
+                query,
+                k=top_k,
+                num_threads=1,
+                filter=allowed.__contains__ if allowed is not None else None
+            )
+        except RuntimeError:
+            # The graph walk found fewer than top_k allowed rows
+            return self._exact_search(query, top_k, rows)
+
+        # Inner-product space: distance = 1 - cosine for unit vectors
+        return [(1.0 - float(d), int(label)) for label, d in zip(labels[0], distances[0])]
+
+    def _fetch_metadata(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Full metadata of the given IDs from SQLite."""
+        metadata = {}
+        for i in range(0, len(ids), SQLITE_BATCH_SIZE):
+            batch = ids[i:i + SQLITE_BATCH_SIZE]
+            cursor = self._db.execute(
+                f"SELECT id, metadata FROM vectors WHERE id IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            metadata.update((vector_id, json.loads(value)) for vector_id, value in cursor)
+        return metadata
+
+    def _upsert(self, vectors: list[dict[str, Any]]) -> int:
+        """Append vectors, retiring rows they replace (runs on the index thread)."""
+        if not vectors:
+            return 0
+
+        # Later entries win when a batch repeats an ID
+        batch = {vector["id"]: vector for vector in vectors}
+
+        if self.dimension is None:
+            self.dimension = len(vectors[0]["values"])
+            self._set_state(dimension=self.dimension)
+
+        dim = self.dimension
+        for vector in batch.values():
+            if len(vector["values"]) != dim:
+                raise ValueError(
+                    f"Vector {vector['id']} has dimension {len(vector['values'])}, expected {dim}"
+                )
+
+        values = np.asarray([vector["values"] for vector in batch.values()], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        values /= norms
+
+        start = self._used
+        stop = start + len(batch)
+        self._ensure_capacity(stop)
+        self._matrix[start:stop] = values
+
+        records = []
+        for row, vector in enumerate(batch.values(), start=start):
+            old_row = self._rows.get(vector["id"])
+            if old_row is not None:
+                self._untrack(old_row)
+            metadata = dict(vector.get("metadata") or {})
+            self._track(vector["id"], row, metadata)
+            records.append((vector["id"], row, json.dumps(metadata)))
+
+        self._live[start:stop] = True
+        self._used = stop
+        if self._hnsw is not None:
+            self._hnsw.add_items(values, np.arange(start, stop))
+            self._hnsw_dirty = True
+
+        # Vectors reach disk before the rows that point at them
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)", records
+        )
+        self._set_state(rows_used=stop)
+
+        self._maybe_compact()
+        return len(vectors)
+
+    def _delete(self, ids: list[str] | None, filter_dict: dict[str, Any] | None) -> None:
+        """Retire rows by ID or filter (runs on the index thread)."""
+        if filter_dict is not None:
+            ids = [self._row_ids[row] for row in self._candidates(filter_dict).tolist()]
+
+        removed = []
+        for vector_id in ids or []:
+            row = self._rows.get(vector_id)
+            if row is not None:
+                self._untrack(row)
+                removed.append(vector_id)
+
+        if not removed:
+            return
+
+        for i in range(0, len(removed), SQLITE_BATCH_SIZE):
+            batch = removed[i:i + SQLITE_BATCH_SIZE]
+            self._db.execute(
+                f"DELETE FROM vectors WHERE id IN ({','.join('?' * len(batch))})", batch
+            )
+        self._db.commit()
+
+        self._maybe_compact()
+
+    def _track(self, vector_id: str, row: int, metadata: dict[str, Any]) -> None:
+        """Register a live row in the in-memory lookups."""
+        if row >= len(self._row_ids):
+            padding = row + 1 - len(self._row_ids)
+            self._row_ids.extend([None] * padding)
+            self._filter_metadata.extend([None] * padding)
+
+        self._rows[vector_id] = row
+        self._row_ids[row] = vector_id
+        self._filter_metadata[row] = {
+            key: value for key, value in metadata.items() if key not in UNINDEXED_METADATA
+        }
+        self._by_document.setdefault(metadata.get("document_id"), set()).add(row)
+
+    def _untrack(self, row: int) -> None:
+        """Mark a row dead; its space is reclaimed by compaction."""
+        vector_id = self._row_ids[row]
+        metadata = self._filter_metadata[row] or {}
+        document_rows = self._by_document.get(metadata.get("document_id"))
+        if document_rows is not None:
+            document_rows.discard(row)
+            if not document_rows:
+                del self._by_document[metadata.get("document_id")]
+
+        if self._rows.get(vector_id) == row:
+            del self._rows[vector_id]
+        self._row_ids[row] = None
+        self._filter_metadata[row] = None
+        self._live[row] = False
+
+        if self._hnsw is not None:
+            self._hnsw.mark_deleted(row)
+            self._hnsw_dirty = True
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the vectors file (and graph) to hold at least `rows` rows."""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows <= capacity:
+            return
+
+        self._open_matrix(max(rows, capacity * 2, INITIAL_CAPACITY))
+        if self.use_ann:
+            if self._hnsw is None:
+                self._hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+                self._hnsw.init_index(
+                    max_elements=self._matrix.shape[0],
+                    M=HNSW_M,
+                    ef_construction=HNSW_EF_CONSTRUCTION
+                )
+            else:
+                self._hnsw.resize_index(self._matrix.shape[0])
+
+    def _open_matrix(self, capacity: int) -> None:
+        """Map (or allocate) the vector matrix with room for `capacity` rows."""
+        dim = self.dimension
+        if self.path is None:
+            matrix = np.zeros((capacity, dim), dtype=np.float32)
+            if self._matrix is not None:
+                matrix[:self._used] = self._matrix[:self._used]
+        else:
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+            vectors_path = self.path / VECTORS_FILE
+            vectors_path.touch(exist_ok=True)
+            if vectors_path.stat().st_size < capacity * dim * 4:
+                os.truncate(vectors_path, capacity * dim * 4)
+            capacity = vectors_path.stat().st_size // (dim * 4)
+            matrix = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live[:capacity]
+        self._matrix = matrix
+        self._live = live
+
+    def _set_state(self, **values: Any) -> None:
+        """Write index-level values and commit."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+        self._db.commit()
+
+    def _maybe_compact(self) -> None:
+        """Compact once dead rows outnumber live ones (amortized linear cost)."""
+        dead = self._used - len(self._rows)
+        if dead > max(len(self._rows), INITIAL_CAPACITY):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Move live rows to the front of the file and rebuild the lookups."""
+        live_rows = np.flatnonzero(self._live[:self._used])
+
+        # Rows only move towards the front, so copying in order is safe
+        for i in range(0, len(live_rows), INITIAL_CAPACITY):
+            sources = live_rows[i:i + INITIAL_CAPACITY]
+            self._matrix[i:i + len(sources)] = self._matrix[sources]
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+
+        moves = [(row, self._row_ids[old_row]) for row, old_row in enumerate(live_rows.tolist())]
+        filter_metadata = [self._filter_metadata[old_row] for old_row in live_rows.tolist()]
+        self._db.executemany("UPDATE vectors SET row = ? WHERE id = ?", moves)
+        self._set_state(rows_used=len(moves), hnsw_rows=0)
+
+        self._used = len(moves)
+        self._live[:] = False
+        self._live[:self._used] = True
+        self._rows = {vector_id: row for row, vector_id in moves}
+        self._row_ids = [vector_id for _, vector_id in moves]
+        self._filter_metadata = filter_metadata
+        self._by_document = {}
+        for row, metadata in enumerate(filter_metadata):
+            self._by_document.setdefault(metadata.get("document_id"), set()).add(row)
+
+        if self._hnsw is not None:
+            self._hnsw = None
+            self._load_hnsw(saved_rows=0)
+
+    def _flush(self) -> None:
+        """Persist the HNSW graph if it changed since the last save."""
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+
+        if self.path is not None and self._hnsw is not None and self._hnsw_dirty:
+            self._hnsw.save_index(str(self.path / HNSW_FILE))
+            self._set_state(hnsw_rows=self._used)
+            self._hnsw_dirty = False
+
+    def _load(self) -> None:
+        """Load persisted state, if any."""
+        state = dict(self._db.execute("SELECT key, value FROM state"))
+        if "dimension" not in state:
+            return
+
+        self.dimension = int(state["dimension"])
+        used = int(state.get("rows_used", 0))
+
+        if self.path is not None:
+            vectors_path = self.path / VECTORS_FILE
+            if not vectors_path.exists() or vectors_path.stat().st_size < used * self.dimension * 4:
+                raise ValueError(f"Corrupt vector store at {self.path}: vectors file is truncated")
+
+        self._open_matrix(max(used, INITIAL_CAPACITY))
+        for vector_id, row, metadata in self._db.execute("SELECT id, row, metadata FROM vectors"):
+            self._track(vector_id, row, json.loads(metadata))
+            self._live[row] = True
+        self._used = used
+
+        if self.use_ann:
+            self._load_hnsw(saved_rows=int(state.get("hnsw_rows", 0)))
+
+    def _load_hnsw(self, saved_rows: int) -> None:
+        """Load the saved graph and add rows written after it was saved, or rebuild it."""
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        capacity = self._matrix.shape[0]
+        graph_path = self.path / HNSW_FILE if self.path else None
+
+        start = 0
+        if graph_path is not None and graph_path.exists() and 0 < saved_rows <= self._used:
+            index.load_index(str(graph_path), max_elements=capacity)
+            start = saved_rows
+            for row in np.flatnonzero(~self._live[:saved_rows]).tolist():
+                try:
+                    index.mark_deleted(row)
+                except RuntimeError:
+                    pass  # Already deleted when the graph was saved
+        else:
+            index.init_index(max_elements=capacity, M=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION)
+
+        rows = np.flatnonzero(self._live[start:self._used]) + start
+        if len(rows):
+            index.add_items(self._matrix[rows], rows)
+
+        self._hnsw = index
+        self._hnsw_dirty = start != self._used
+
+
+def get_local_index() -> LocalVectorIndex:
+    """Get local vector index instance."""
+    global _local_index
+
+    if _local_index is None:
+        _local_index = LocalVectorIndex(get_settings().local_vector_store_path)
+
+    return _local_index
+
+
+def get_vector_store() -> VectorStore:
+    """Get the vector store selected by `vector_store_backend`."""
+    backend = get_settings().vector_store_backend
+
+    if backend == "local":
+        return get_local_index()
+    if backend == "pinecone":
+        return get_async_index()
+
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+async def init_vector_store() -> None:
+    """Initialize the configured vector store."""
+    get_vector_store()
+
+
+def close_vector_store() -> None:
+    """Release vector store resources."""
+    global _local_index
+
+    if _local_index is not None:
+        _local_index.close()
+        _local_index = None
+
+    close_pinecone()
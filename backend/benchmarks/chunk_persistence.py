@@ -0,0 +1,98 @@
+"""
+Benchmark writing chunk rows to PostgreSQL.
+
+Usage (from backend/, with DATABASE_URL pointing at a scratch database):
+    python -m benchmarks.chunk_persistence --chunks 10000
+
+Inserts a synthetic document's chunks with bulk_insert_chunks (COPY on
+asyncpg) and with a plain executemany INSERT, and prints rows/s for each.
+The benchmark document is deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+
+from app.db import get_db, init_db
+from app.db.postgres import Chunk, Document, bulk_insert_chunks
+
+BENCHMARK_DOCUMENT_ID = "doc_benchmark_chunk_persistence"
+
+
+def build_rows(count: int, chunk_chars: int) -> list[dict]:
+    """Synthetic chunk rows of roughly `chunk_chars` characters."""
+    text = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40)[:chunk_chars]
+    return [
+        {
+            "id": f"{BENCHMARK_DOCUMENT_ID}_chunk_{i}",
+            "document_id": BENCHMARK_DOCUMENT_ID,
+            "text": text,
+            "chunk_index": i,
+            "page_number": i // 4 + 1,
+            "token_count": len(text) // 4,
+            "chunk_metadata": {"page": i // 4 + 1, "source": "benchmark.pdf"},
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(count)
+    ]
+
+
+async def timed_insert(rows: list[dict], use_copy: bool) -> float:
+    """Insert the benchmark document and its chunks in one transaction."""
+    db = get_db()
+
+    async with db.session() as session:
+        await session.execute(delete(Document).where(Document.id == BENCHMARK_DOCUMENT_ID))
+        session.add(Document(
+            id=BENCHMARK_DOCUMENT_ID,
+            title="Chunk persistence benchmark",
+            source_type="pdf",
+            status="completed"
+        ))
+        await session.flush()
+
+        start = time.perf_counter()
+        if use_copy:
+            await bulk_insert_chunks(session, rows)
+        else:
+            await session.execute(insert(Chunk), rows)
+        await session.commit()
+        elapsed = time.perf_counter() - start
+
+    async with db.session() as session:
+        await session.execute(delete(Document).where(Document.id == BENCHMARK_DOCUMENT_ID))
+        await session.commit()
+
+    return elapsed
+
+
+async def run(count: int, chunk_chars: int, repeat: int) -> None:
+    """Run both insert strategies and print throughput."""
+    await init_db()
+    rows = build_rows(count, chunk_chars)
+
+    print(f"{'method':>12} {'rows':>7} {'seconds':>8} {'rows/s':>10}")
+
+    for label, use_copy in (("copy", True), ("executemany", False)):
+        best = min([await timed_insert(rows, use_copy) for _ in range(repeat)])
+        print(f"{label:>12} {count:>7} {best:>8.3f} {count / best:>10.0f}")
+
+    await get_db().close()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.chunks, args.chunk_chars, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
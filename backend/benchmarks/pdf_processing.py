@@ -0,0 +1,91 @@
+"""
+Benchmark PDF extraction and chunking throughput by worker count.
+
+Usage (from backend/):
+    python -m benchmarks.pdf_processing path/to/file.pdf --workers 1 2 4 8
+
+Pages of the input are repeated until the document has at least
+--min-pages pages, so a short PDF can stand in for a large RFP.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+
+from app.services.document_processor import DocumentProcessor
+
+
+def build_benchmark_pdf(source: Path, min_pages: int, target: Path) -> int:
+    """Write a PDF repeating the source pages up to min_pages; return page count."""
+    reader = PdfReader(str(source))
+    writer = PdfWriter()
+
+    while len(writer.pages) < max(min_pages, len(reader.pages)):
+        for page in reader.pages:
+            writer.add_page(page)
+
+    with open(target, "wb") as f:
+        writer.write(f)
+
+    return len(writer.pages)
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    """Return the worst event loop delay observed while work runs."""
+    worst = 0.0
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(pdf_path: Path, worker_counts: list[int]) -> None:
+    """Process the PDF with each worker count and print throughput."""
+    print(f"{'workers':>7} {'pages':>6} {'chunks':>7} {'seconds':>8} {'pages/s':>8} {'max loop lag ms':>16}")
+
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            processor = DocumentProcessor(executor=executor, max_workers=workers)
+
+            # Warm up worker processes so start-up cost is not measured
+            await processor.chunk_pdf_by_pages(pdf_path, "doc_warmup")
+
+            stop = asyncio.Event()
+            lag_task = asyncio.create_task(measure_loop_lag(stop))
+
+            start = time.perf_counter()
+            chunks, metadata = await processor.chunk_pdf_by_pages(pdf_path, "doc_benchmark")
+            elapsed = time.perf_counter() - start
+
+            stop.set()
+            lag = await lag_task
+
+        print(
+            f"{workers:>7} {metadata.total_pages:>6} {len(chunks):>7} "
+            f"{elapsed:>8.2f} {metadata.total_pages / elapsed:>8.1f} {lag * 1000:>16.1f}"
+        )
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", type=Path, help="Source PDF")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--min-pages", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "benchmark.pdf"
+        build_benchmark_pdf(args.pdf, args.min_pages, pdf_path)
+        asyncio.run(run(pdf_path, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark query latency of the local vector store.
+
+Usage (from backend/):
+    python -m benchmarks.vector_search --vectors 100000 --dimension 3072
+
+Fills an in-memory LocalVectorIndex with random unit vectors and prints
+p50/p95 query latency with and without a metadata filter, through the
+HNSW graph (if hnswlib is installed) and with an exact scan.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+from app.services.vector_store import LocalVectorIndex, hnswlib
+
+
+async def run(count: int, dimension: int, queries: int, top_k: int, batch_size: int) -> None:
+    """Build the index and time queries."""
+    rng = np.random.default_rng(0)
+    modes = [("hnsw", True)] if hnswlib is not None else []
+    modes.append(("exact", False))
+
+    print(f"{'mode':>6} {'filter':>10} {'vectors':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for mode, ann in modes:
+        # Filtered queries below the exact-scan threshold skip the graph in both modes
+        index = LocalVectorIndex(ann=ann, exact_scan_max_rows=None if ann else count)
+        start = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            rows = range(offset, min(offset + batch_size, count))
+            values = rng.standard_normal((len(rows), dimension), dtype=np.float32)
+            await index.upsert([
+                {
+                    "id": f"chunk_{i}",
+                    "values": vector,
+                    "metadata": {"document_id": f"doc_{i % 100}", "page": i % 50}
+                }
+                for i, vector in zip(rows, values)
+            ])
+        print(f"{mode:>6} built in {time.perf_counter() - start:.1f}s")
+
+        for label, filter_dict in (("none", None), ("document", {"document_id": "doc_7"})):
+            timings = []
+            for _ in range(queries):
+                vector = rng.standard_normal(dimension, dtype=np.float32).tolist()
+                start = time.perf_counter()
+                await index.query(vector=vector, top_k=top_k, filter=filter_dict)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            p50 = statistics.median(timings)
+            p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else p50
+            print(f"{mode:>6} {label:>10} {count:>8} {p50:>8.2f} {p95:>8.2f}")
+
+        index.close()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.vectors, args.dimension, args.queries, args.top_k, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
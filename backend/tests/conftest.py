@@ -14,7 +14,7 @@ mock_pinecone_module.ServerlessSpec = MagicMock
 sys.modules['pinecone'] = mock_pinecone_module
 
 from app.main import app
-from app.config import Settings
+from app.config import Settings, get_settings
 from app.db.postgres import DatabaseSession, Base
 
 
@@ -32,6 +32,17 @@ def test_settings():
     )
 
 
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Give each test fresh embedding/response cache files, answer cache and lexical index."""
+    monkeypatch.setattr(
+        get_settings(), "embedding_cache_path", str(tmp_path / "embeddings.sqlite3")
+    )
+    monkeypatch.setattr(get_settings(), "mcp_cache_path", str(tmp_path / "mcp_responses.sqlite3"))
+    monkeypatch.setattr("app.services.answer_cache._answer_cache", None)
+    monkeypatch.setattr("app.services.lexical_index._lexical_index", None)
+
+
 @pytest.fixture
 async def async_client():
     """Async HTTP client for API testing."""
@@ -96,7 +107,12 @@ def mock_anthropic_response():
     """Mock Anthropic (Claude) API response."""
     mock_response = Mock()
     mock_response.content = [Mock(text="This is a test answer from Claude.")]
-    mock_response.usage = Mock(input_tokens=100, output_tokens=50)
+    mock_response.usage = Mock(
+        input_tokens=100,
+        output_tokens=50,
+        cache_creation_input_tokens=0,
+        cache_read_input_tokens=0
+    )
     mock_response.stop_reason = "end_turn"
     return mock_response
 
@@ -194,6 +210,7 @@ async def mock_embedding_service():
 async def mock_document_processor():
     """Mock document processor."""
     from app.models.document import DocumentChunk, DocumentMetadata, DocumentType, DocumentStatus
+    from app.services.document_processor import ChunkBatch
 
     processor = AsyncMock()
 
@@ -222,6 +239,17 @@ async def mock_document_processor():
     )
 
     processor.chunk_pdf_by_pages.return_value = (chunks, metadata)
+
+    # Stream whatever chunk_pdf_by_pages currently returns as one batch
+    async def stream_pdf_chunks(file_path, document_id):
+        batch_chunks, batch_metadata = processor.chunk_pdf_by_pages.return_value
+        yield ChunkBatch(
+            chunks=batch_chunks,
+            pages_done=batch_metadata.total_pages,
+            total_pages=batch_metadata.total_pages
+        )
+
+    processor.stream_pdf_chunks = Mock(side_effect=stream_pdf_chunks)
     processor.generate_document_id.return_value = "doc_test123"
     processor.count_tokens.return_value = 50
 
@@ -248,7 +276,106 @@ def mock_pinecone_index():
     return index
 
 
+@pytest.fixture
+def services(mock_rag_engine, mock_document_processor):
+    """Service container of mocks installed on the app."""
+    container = Mock()
+    container.rag = mock_rag_engine
+    container.doc_processor = mock_document_processor
+    container.ingestion_queue = Mock()
+    container.ingestion_queue.is_full.return_value = False
+    container.ingestion_queue.progress.return_value = None
+    container.conversation_cache = Mock()
+    container.conversation_cache.load = AsyncMock(return_value=[])
+
+    app.state.services = container
+    yield container
+    del app.state.services
+
+
+@pytest.fixture
+async def make_mcp_client():
+    """Factory for MCPClients with fast limits whose HTTP requests are served by `handler`."""
+    import httpx
+    from app.services.mcp_client import MCPClient
+    from app.services.response_cache import ResponseCache
+
+    clients = []
+
+    def factory(handler, **settings):
+        client = MCPClient(cache=ResponseCache(None), settings=get_settings().model_copy(update={
+            "firecrawl_api_key": "fc-test",
+            "brave_api_key": "brave-test",
+            "firecrawl_requests_per_second": 1000.0,
+            "brave_requests_per_second": 1000.0,
+            "mcp_retry_base_delay": 0.01,
+            **settings,
+        }))
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        await client.close()
+
+
+def write_text_pdf(path, pages):
+    """Write a minimal PDF with one text line per entry in `pages`."""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for text in pages:
+        lines = text.split("\n")
+        ops = ["BT /F1 10 Tf 12 TL 50 750 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_obj, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref
+    )
+    path.write_bytes(bytes(out))
+    return path
+
+
 # Fixtures for sample files
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Factory writing a real text PDF with the given page texts."""
+    def _make_pdf(pages, name="document.pdf"):
+        return write_text_pdf(tmp_path / name, pages)
+    return _make_pdf
+
+
 @pytest.fixture
 def sample_text_file(tmp_path):
     """Create sample text file."""
@@ -0,0 +1,103 @@
+"""Unit tests for semantic answer cache."""
+
+import random
+import time
+
+import pytest
+from app.services.answer_cache import SemanticAnswerCache
+
+
+@pytest.mark.unit
+class TestSemanticAnswerCache:
+    """Test suite for SemanticAnswerCache."""
+
+    @pytest.fixture
+    def cache(self):
+        """Create answer cache instance."""
+        return SemanticAnswerCache(similarity_threshold=0.95, ttl_seconds=60)
+
+    @pytest.fixture
+    def cached_result(self):
+        """Sample RAG result."""
+        return {"answer": "TechCorp and InnoSoft.", "sources": [], "metadata": {}}
+
+    def test_hit_on_similar_query(self, cache, cached_result):
+        """Test that a near-identical embedding is served from cache."""
+        cache.store("Who are Acme's competitors?", [1.0, 0.0, 0.1], None, 5,
+                    cached_result, {"doc_a"})
+
+        result = cache.lookup([1.0, 0.01, 0.1], None, 5)
+
+        assert result["answer"] == "TechCorp and InnoSoft."
+        assert result["metadata"]["cache"]["hit"] is True
+        assert result["metadata"]["cache"]["cached_query"] == "Who are Acme's competitors?"
+        assert result["metadata"]["cache"]["similarity"] >= 0.95
+
+    def test_miss_on_dissimilar_query(self, cache, cached_result):
+        """Test that unrelated embeddings miss."""
+        cache.store("q", [1.0, 0.0], None, 5, cached_result, {"doc_a"})
+
+        assert cache.lookup([0.0, 1.0], None, 5) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_scope_includes_filters_and_top_k(self, cache, cached_result):
+        """Test that filters and top_k must match exactly."""
+        cache.store("q", [1.0, 0.0], {"source_type": "pdf"}, 5, cached_result, set())
+
+        assert cache.lookup([1.0, 0.0], {"source_type": "pdf"}, 5) is not None
+        assert cache.lookup([1.0, 0.0], {"source_type": "web_page"}, 5) is None
+        assert cache.lookup([1.0, 0.0], {"source_type": "pdf"}, 10) is None
+
+    def test_ttl_expiry(self, cached_result):
+        """Test that expired entries are not served."""
+        cache = SemanticAnswerCache(ttl_seconds=0)
+        cache.store("q", [1.0, 0.0], None, 5, cached_result, set())
+        cache._entries[0][1].created_at -= 1
+
+        assert cache.lookup([1.0, 0.0], None, 5) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_invalidate_document(self, cache, cached_result):
+        """Test that entries citing a document are dropped."""
+        cache.store("q1", [1.0, 0.0], None, 5, cached_result, {"doc_a"})
+        cache.store("q2", [0.0, 1.0], None, 5, cached_result, {"doc_b"})
+
+        removed = cache.invalidate_document("doc_a")
+
+        assert removed == 1
+        assert cache.lookup([1.0, 0.0], None, 5) is None
+        assert cache.lookup([0.0, 1.0], None, 5) is not None
+
+    def test_cached_result_is_isolated(self, cache, cached_result):
+        """Test that callers cannot mutate the cached copy."""
+        cache.store("q", [1.0, 0.0], None, 5, cached_result, set())
+
+        first = cache.lookup([1.0, 0.0], None, 5)
+        first["answer"] = "mutated"
+
+        assert cache.lookup([1.0, 0.0], None, 5)["answer"] == "TechCorp and InnoSoft."
+
+    def test_max_entries_evicts_oldest(self, cached_result):
+        """Test LRU eviction."""
+        cache = SemanticAnswerCache(max_entries=1)
+        cache.store("q1", [1.0, 0.0], None, 5, cached_result, set())
+        cache.store("q2", [0.0, 1.0], None, 5, cached_result, set())
+
+        assert cache.lookup([1.0, 0.0], None, 5) is None
+        assert cache.lookup([0.0, 1.0], None, 5) is not None
+
+    def test_lookup_cost_at_capacity(self, cached_result):
+        """Test a full cache of 3072-dimension embeddings is scanned in a few milliseconds."""
+        rng = random.Random(0)
+        cache = SemanticAnswerCache(max_entries=1000)
+        for i in range(1000):
+            cache.store(f"q{i}", [rng.gauss(0, 1) for _ in range(3072)], None, 5,
+                        cached_result, set())
+        query = [rng.gauss(0, 1) for _ in range(3072)]
+
+        start = time.perf_counter()
+        for _ in range(10):
+            assert cache.lookup(query, None, 5) is None
+        elapsed = (time.perf_counter() - start) / 10
+
+        assert elapsed < 0.02
@@ -1,5 +1,7 @@
 """Integration tests for Chat API endpoints."""
 
+import json
+
 import pytest
 from unittest.mock import patch, AsyncMock
 from httpx import AsyncClient
@@ -11,15 +13,15 @@ class TestChatAPI:
     """Test suite for Chat API endpoints."""
 
     @pytest.fixture
-    async def client(self):
+    async def client(self, services):
         """Create async test client."""
         async with AsyncClient(app=app, base_url="http://test") as ac:
             yield ac
 
     @pytest.mark.asyncio
-    async def test_chat_basic(self, client, mock_rag_engine):
+    async def test_chat_basic(self, client, services, mock_rag_engine):
         """Test basic chat endpoint."""
-        with patch("app.api.chat.rag", mock_rag_engine):
+        with patch.object(services, "rag", mock_rag_engine):
             response = await client.post(
                 "/api/chat/",
                 json={"message": "What is Acme Corp?", "top_k": 5},
@@ -38,11 +40,11 @@ class TestChatAPI:
             assert len(data["sources"]) > 0
 
     @pytest.mark.asyncio
-    async def test_chat_with_conversation_id(self, client, mock_rag_engine):
+    async def test_chat_with_conversation_id(self, client, services, mock_rag_engine):
         """Test chat with existing conversation ID."""
         conversation_id = "conv_test123"
 
-        with patch("app.api.chat.rag", mock_rag_engine), patch(
+        with patch.object(services, "rag", mock_rag_engine), patch(
             "app.api.chat.get_conversation_history", return_value=[]
         ), patch("app.api.chat.save_message", new_callable=AsyncMock):
             response = await client.post(
@@ -69,9 +71,9 @@ class TestChatAPI:
         assert response.status_code == 422
 
     @pytest.mark.asyncio
-    async def test_chat_with_filters(self, client, mock_rag_engine):
+    async def test_chat_with_filters(self, client, services, mock_rag_engine):
         """Test chat with metadata filters."""
-        with patch("app.api.chat.rag", mock_rag_engine):
+        with patch.object(services, "rag", mock_rag_engine):
             response = await client.post(
                 "/api/chat/",
                 json={
@@ -90,9 +92,9 @@ class TestChatAPI:
             assert call_kwargs["filters"] == {"document_type": "competitor_report"}
 
     @pytest.mark.asyncio
-    async def test_chat_with_custom_top_k(self, client, mock_rag_engine):
+    async def test_chat_with_custom_top_k(self, client, services, mock_rag_engine):
         """Test chat with custom top_k parameter."""
-        with patch("app.api.chat.rag", mock_rag_engine):
+        with patch.object(services, "rag", mock_rag_engine):
             response = await client.post(
                 "/api/chat/",
                 json={"message": "What is Acme Corp?", "top_k": 10},
@@ -105,9 +107,63 @@ class TestChatAPI:
             assert call_kwargs["top_k"] == 10
 
     @pytest.mark.asyncio
-    async def test_chat_error_handling(self, client):
+    async def test_chat_streaming(self, client, services, mock_rag_engine):
+        """Test Server-Sent Events streaming mode."""
+        final_result = await mock_rag_engine.query()
+
+        async def fake_query_stream(**kwargs):
+            yield {"type": "sources", "sources": final_result["sources"]}
+            yield {"type": "token", "text": "Acme Corp is "}
+            yield {"type": "token", "text": "a technology company."}
+            yield {"type": "done", "result": final_result}
+
+        mock_rag_engine.query_stream = fake_query_stream
+
+        with patch.object(services, "rag", mock_rag_engine), patch(
+            "app.api.chat._save_exchange", new_callable=AsyncMock
+        ) as mock_save:
+            response = await client.post(
+                "/api/chat/",
+                json={"message": "What is Acme Corp?", "stream": True},
+            )
+
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+
+            events = [
+                (block.split("\n")[0].removeprefix("event: "),
+                 json.loads(block.split("\n")[1].removeprefix("data: ")))
+                for block in response.text.strip().split("\n\n")
+            ]
+
+            assert [name for name, _ in events] == ["sources", "token", "token", "done"]
+            assert events[0][1]["sources"][0]["chunk_id"] == "doc_test_chunk_0"
+            assert events[-1][1]["answer"] == final_result["answer"]
+            mock_save.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_chat_streaming_error_event(self, client, services, mock_rag_engine):
+        """Test that mid-stream failures are reported as an error event."""
+        async def failing_query_stream(**kwargs):
+            yield {"type": "sources", "sources": []}
+            raise RuntimeError("Claude unavailable")
+
+        mock_rag_engine.query_stream = failing_query_stream
+
+        with patch.object(services, "rag", mock_rag_engine):
+            response = await client.post(
+                "/api/chat/",
+                json={"message": "What is Acme Corp?", "stream": True},
+            )
+
+            assert response.status_code == 200
+            assert "event: error" in response.text
+            assert "Claude unavailable" in response.text
+
+    @pytest.mark.asyncio
+    async def test_chat_error_handling(self, client, services):
         """Test error handling in chat endpoint."""
-        with patch("app.api.chat.rag") as mock_rag:
+        with patch.object(services, "rag") as mock_rag:
             mock_rag.query.side_effect = Exception("RAG engine error")
 
             response = await client.post(
@@ -125,7 +181,7 @@ class TestConversationAPI:
     """Test suite for Conversation management endpoints."""
 
     @pytest.fixture
-    async def client(self):
+    async def client(self, services):
         """Create async test client."""
         async with AsyncClient(app=app, base_url="http://test") as ac:
             yield ac
@@ -1,11 +1,18 @@
 """Integration tests for Documents API endpoints."""
 
+import hashlib
+from datetime import datetime
+
 import pytest
+from fastapi import UploadFile
 from unittest.mock import patch, AsyncMock, Mock
 from httpx import AsyncClient
 from io import BytesIO
 from app.main import app
+from app.api import documents as documents_api
+from app.api.pagination import encode_cursor
 from app.models.document import DocumentStatus
+from app.services.ingestion import IngestionQueueFull
 
 
 @pytest.mark.integration
@@ -13,47 +20,264 @@ class TestDocumentsAPI:
     """Test suite for Documents API endpoints."""
 
     @pytest.fixture
-    async def client(self):
+    async def client(self, services):
         """Create async test client."""
         async with AsyncClient(app=app, base_url="http://test") as ac:
             yield ac
 
     @pytest.mark.asyncio
     async def test_upload_document_success(
-        self, client, mock_document_processor, mock_rag_engine
+        self, client, services, mock_document_processor, tmp_path
     ):
-        """Test successful document upload."""
+        """Test upload is accepted and queued for background processing."""
         # Create mock file
         file_content = b"Test PDF content"
         files = {"file": ("test.pdf", BytesIO(file_content), "application/pdf")}
         data = {"title": "Test Document"}
 
-        with patch("app.api.documents.doc_processor", mock_document_processor), patch(
-            "app.api.documents.rag", mock_rag_engine
+        mock_document_processor.generate_document_id = Mock(return_value="doc_test123")
+        mock_queue = Mock()
+        mock_queue.is_full.return_value = False
+
+        with patch.object(services, "doc_processor", mock_document_processor), patch.object(
+            services, "ingestion_queue", mock_queue
+        ), patch.object(
+            documents_api.settings, "upload_dir", str(tmp_path)
         ), patch("app.api.documents.get_db") as mock_db:
-            # Mock database
+            # Mock database: no document with the same content hash
             mock_session = AsyncMock()
+            mock_session.add = Mock()
+            mock_result = Mock()
+            mock_result.scalar_one_or_none.return_value = None
+            mock_session.execute.return_value = mock_result
             mock_db.return_value.session.return_value.__aenter__.return_value = (
                 mock_session
             )
 
-            # Mock RAG upsert
-            mock_rag_engine.upsert_chunks.return_value = {
-                "total_chunks": 10,
-                "upserted": 10,
-            }
-
             response = await client.post(
                 "/api/documents/upload", files=files, data=data
             )
 
-            assert response.status_code == 200
+            assert response.status_code == 202
             data = response.json()
 
-            assert "document_id" in data
+            assert data["document_id"] == "doc_test123"
             assert data["title"] == "Test Document"
-            assert data["status"] == DocumentStatus.COMPLETED.value
-            assert "chunks indexed" in data["message"].lower()
+            assert data["status"] == DocumentStatus.PENDING.value
+            assert "queued" in data["message"].lower()
+
+            # Row is written as pending before the job is queued
+            db_doc = mock_session.add.call_args.args[0]
+            assert db_doc.status == DocumentStatus.PENDING.value
+            assert db_doc.content_hash == hashlib.sha256(file_content).hexdigest()
+            assert mock_document_processor.generate_document_id.call_args.kwargs[
+                "content_hash"
+            ] == db_doc.content_hash
+            job = mock_queue.enqueue.call_args.args[0]
+            assert job.document_id == "doc_test123"
+            assert (tmp_path / "doc_test123.pdf").read_bytes() == file_content
+
+    @pytest.mark.asyncio
+    async def test_upload_streams_file_and_hashes(self, tmp_path):
+        """Test uploads are copied in chunks with a running SHA-256."""
+        content = b"x" * 10 + b"y" * 7
+        upload = UploadFile(file=BytesIO(content), filename="report.pdf")
+
+        with patch.object(documents_api.settings, "upload_chunk_size", 4):
+            size, digest = await documents_api.save_upload(
+                upload, tmp_path / "report.pdf", max_size=1024
+            )
+
+        assert size == len(content)
+        assert digest == hashlib.sha256(content).hexdigest()
+        assert (tmp_path / "report.pdf").read_bytes() == content
+
+    @pytest.mark.asyncio
+    async def test_upload_rejects_oversized_file(self, client, services, tmp_path):
+        """Test the size limit is enforced while streaming to disk."""
+        files = {"file": ("big.pdf", BytesIO(b"x" * 100), "application/pdf")}
+        mock_queue = Mock()
+        mock_queue.is_full.return_value = False
+
+        with patch.object(services, "ingestion_queue", mock_queue), patch.object(
+            documents_api.settings, "upload_dir", str(tmp_path)
+        ), patch.object(documents_api.settings, "max_file_size", 10):
+            response = await client.post("/api/documents/upload", files=files)
+
+        assert response.status_code == 413
+        # The partial file is removed
+        assert list(tmp_path.iterdir()) == []
+        mock_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upload_rejects_declared_size_before_reading(self, client):
+        """Test an oversized Content-Length is refused up front."""
+        files = {"file": ("big.pdf", BytesIO(b"x" * 200_000), "application/pdf")}
+
+        with patch.object(documents_api.settings, "max_file_size", 10), patch(
+            "app.api.documents.save_upload"
+        ) as mock_save:
+            response = await client.post("/api/documents/upload", files=files)
+
+        assert response.status_code == 413
+        mock_save.assert_not_called()
+
+    @pytest.fixture
+    def upload_db(self, services, tmp_path):
+        """Patch the upload path's database, queue and upload directory."""
+        mock_queue = Mock()
+        mock_queue.is_full.return_value = False
+        mock_session = AsyncMock()
+        mock_session.add = Mock()
+        mock_result = Mock()
+        mock_session.execute.return_value = mock_result
+
+        with patch.object(services, "ingestion_queue", mock_queue), patch.object(
+            documents_api.settings, "upload_dir", str(tmp_path)
+        ), patch("app.api.documents.get_db") as mock_db:
+            mock_db.return_value.session.return_value.__aenter__.return_value = (
+                mock_session
+            )
+            yield mock_session, mock_result, mock_queue
+
+    @pytest.mark.asyncio
+    async def test_upload_duplicate_content_reuses_document(self, client, upload_db, tmp_path):
+        """Test identical content short-circuits to the existing document."""
+        mock_session, mock_result, mock_queue = upload_db
+        mock_result.scalar_one_or_none.return_value = Mock(
+            id="doc_existing", title="Original", status="completed"
+        )
+        files = {"file": ("copy.pdf", BytesIO(b"same bytes"), "application/pdf")}
+
+        response = await client.post("/api/documents/upload", files=files)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["document_id"] == "doc_existing"
+        assert data["status"] == "completed"
+        mock_queue.enqueue.assert_not_called()
+        mock_session.add.assert_not_called()
+        # Nothing is left on disk
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_upload_revision_updates_existing_document(self, client, upload_db, tmp_path):
+        """Test a revision keeps the document ID and re-queues it."""
+        mock_session, mock_result, mock_queue = upload_db
+        mock_result.scalar_one_or_none.return_value = None
+        old_file = tmp_path / "doc_rfp.pdf"
+        old_file.write_bytes(b"old")
+        existing = Mock(
+            id="doc_rfp",
+            title="RFP",
+            status="completed",
+            file_path=str(old_file),
+            doc_metadata={"last_index": {"upserted": 3}}
+        )
+        mock_session.get.return_value = existing
+        files = {"file": ("rfp_v2.pdf", BytesIO(b"revised"), "application/pdf")}
+
+        response = await client.post(
+            "/api/documents/upload", files=files, data={"document_id": "doc_rfp"}
+        )
+
+        assert response.status_code == 202
+        assert response.json()["document_id"] == "doc_rfp"
+        assert existing.status == DocumentStatus.PENDING.value
+        assert existing.content_hash == hashlib.sha256(b"revised").hexdigest()
+        assert existing.doc_metadata["last_index"] == {"upserted": 3}
+        assert existing.doc_metadata["ingestion"]["stage"] == "queued"
+        assert old_file.read_bytes() == b"revised"
+        assert mock_queue.enqueue.call_args.args[0].document_id == "doc_rfp"
+
+    @pytest.mark.asyncio
+    async def test_upload_revision_conflicts_while_processing(self, client, upload_db, tmp_path):
+        """Test a revision is refused while the document is still processing."""
+        mock_session, mock_result, mock_queue = upload_db
+        mock_result.scalar_one_or_none.return_value = None
+        mock_session.get.return_value = Mock(id="doc_rfp", status="processing")
+        files = {"file": ("rfp_v2.pdf", BytesIO(b"revised"), "application/pdf")}
+
+        response = await client.post(
+            "/api/documents/upload", files=files, data={"document_id": "doc_rfp"}
+        )
+
+        assert response.status_code == 409
+        mock_queue.enqueue.assert_not_called()
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_upload_rejected_when_queue_full(self, client, services):
+        """Test upload returns 503 when the ingestion queue is full."""
+        files = {"file": ("test.pdf", BytesIO(b"content"), "application/pdf")}
+        mock_queue = Mock()
+        mock_queue.is_full.return_value = True
+
+        with patch.object(services, "ingestion_queue", mock_queue):
+            response = await client.post("/api/documents/upload", files=files)
+
+        assert response.status_code == 503
+        mock_queue.enqueue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_upload_marked_failed_when_queue_fills_after_commit(
+        self, client, services, mock_document_processor, tmp_path
+    ):
+        """Test a row committed just before the queue filled up is not left pending."""
+        files = {"file": ("test.pdf", BytesIO(b"content"), "application/pdf")}
+        mock_document_processor.generate_document_id = Mock(return_value="doc_late")
+        mock_queue = Mock()
+        mock_queue.is_full.return_value = False
+        mock_queue.enqueue.side_effect = IngestionQueueFull("Ingestion queue is full (1 jobs)")
+        mock_queue.mark_failed = AsyncMock()
+
+        with patch.object(services, "doc_processor", mock_document_processor), patch.object(
+            services, "ingestion_queue", mock_queue
+        ), patch.object(
+            documents_api.settings, "upload_dir", str(tmp_path)
+        ), patch("app.api.documents.get_db") as mock_db:
+            mock_session = AsyncMock()
+            mock_session.add = Mock()
+            mock_result = Mock()
+            mock_result.scalar_one_or_none.return_value = None
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            response = await client.post("/api/documents/upload", files=files)
+
+        assert response.status_code == 503
+        mock_queue.mark_failed.assert_awaited_once_with("doc_late", "Ingestion queue is full (1 jobs)")
+
+    @pytest.mark.asyncio
+    async def test_get_document_status(self, client, services):
+        """Test status endpoint reports persisted ingestion progress."""
+        row = Mock(
+            status="processing",
+            chunk_count=12,
+            doc_metadata={"ingestion": {"stage": "embedding", "progress": 0.4}}
+        )
+        mock_queue = Mock()
+        mock_queue.progress.return_value = None
+
+        with patch.object(services, "ingestion_queue", mock_queue), patch(
+            "app.api.documents.get_db"
+        ) as mock_db:
+            mock_session = AsyncMock()
+            mock_result = Mock()
+            mock_result.one_or_none.return_value = row
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = (
+                mock_session
+            )
+
+            response = await client.get("/api/documents/doc_test123/status")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "processing"
+        assert data["stage"] == "embedding"
+        assert data["progress"] == 0.4
+        assert data["chunk_count"] == 12
 
     @pytest.mark.asyncio
     async def test_upload_invalid_file_type(self, client):
@@ -131,11 +355,35 @@ class TestDocumentsAPI:
         assert "documents" in data
 
     @pytest.mark.asyncio
-    async def test_delete_document(self, client, mock_rag_engine):
+    async def test_list_documents_cursor_pages(self, client):
+        """Test listing returns a next_cursor and rejects malformed cursors."""
+        rows = [
+            Mock(id=f"doc_{i}", title=f"Doc {i}", source_type="pdf", total_pages=1,
+                 chunk_count=2, status="completed", created_at=datetime(2024, 1, 10 - i),
+                 processed_at=None)
+            for i in range(3)
+        ]
+
+        with patch("app.api.documents.get_db") as mock_db:
+            mock_session = AsyncMock()
+            mock_session.execute.return_value = Mock(all=Mock(return_value=rows))
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            response = await client.get("/api/documents/?limit=2")
+            bad = await client.get("/api/documents/?cursor=garbage")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [d["id"] for d in data["documents"]] == ["doc_0", "doc_1"]
+        assert data["next_cursor"] == encode_cursor(datetime(2024, 1, 9), "doc_1")
+        assert bad.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_delete_document(self, client, services, mock_rag_engine):
         """Test deleting a document."""
         document_id = "doc_to_delete"
 
-        with patch("app.api.documents.rag", mock_rag_engine), patch(
+        with patch.object(services, "rag", mock_rag_engine), patch(
             "app.api.documents.get_db"
         ) as mock_db:
             # Mock database
@@ -187,16 +435,97 @@ class TestDocumentsAPI:
             assert "not found" in data["detail"].lower()
 
     @pytest.mark.asyncio
-    async def test_crawl_website_not_implemented(self, client):
-        """Test web crawl endpoint (not yet implemented)."""
+    async def test_crawl_website_requires_firecrawl_key(self, client):
+        """Test crawling is unavailable without a Firecrawl API key."""
+        with patch.object(documents_api.settings, "firecrawl_api_key", None):
+            response = await client.post(
+                "/api/documents/crawl",
+                json={"url": "https://example.com", "max_depth": 1},
+            )
+
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_crawl_website_starts_background_crawl(
+        self, client, services, mock_document_processor
+    ):
+        """Test a pending web document is created and the crawl submitted."""
+        services.crawler = Mock()
+        mock_document_processor.generate_document_id = Mock(return_value="doc_test123")
+
+        with patch.object(documents_api.settings, "firecrawl_api_key", "fc-test"), patch(
+            "app.api.documents.get_db"
+        ) as mock_db:
+            mock_session = AsyncMock()
+            mock_session.add = Mock()
+            mock_result = Mock()
+            mock_result.scalar_one_or_none.return_value = None
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            response = await client.post(
+                "/api/documents/crawl",
+                json={
+                    "url": "https://example.com/blog",
+                    "max_depth": 2,
+                    "exclude_patterns": ["/tag/"],
+                },
+            )
+
+        assert response.status_code == 202, response.text
+        data = response.json()
+        assert data["document_id"] == "doc_test123"
+        assert data["status"] == DocumentStatus.PENDING.value
+
+        db_doc = mock_session.add.call_args.args[0]
+        assert db_doc.source_type == "web_page"
+        assert db_doc.source_url == "https://example.com/blog"
+        document_id, crawl_request = services.crawler.submit.call_args.args
+        assert document_id == "doc_test123"
+        assert crawl_request.exclude_patterns == ["/tag/"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("existing_status, expected", [("completed", 202), ("processing", 409)])
+    async def test_crawl_website_refreshes_existing_document(
+        self, client, services, existing_status, expected
+    ):
+        """Test crawling a URL again reuses its document unless a crawl is running."""
+        services.crawler = Mock()
+        existing = Mock(id="doc_existing", title="Acme blog", status=existing_status,
+                        doc_metadata={"crawl": {"pages": {}}})
+
+        with patch.object(documents_api.settings, "firecrawl_api_key", "fc-test"), patch(
+            "app.api.documents.get_db"
+        ) as mock_db:
+            mock_session = AsyncMock()
+            mock_session.add = Mock()
+            mock_result = Mock()
+            mock_result.scalar_one_or_none.return_value = existing
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            response = await client.post(
+                "/api/documents/crawl", json={"url": "https://example.com/blog", "max_depth": 2}
+            )
+
+        assert response.status_code == expected
+        if expected == 202:
+            assert response.json()["document_id"] == "doc_existing"
+            assert existing.status == DocumentStatus.PENDING.value
+            assert "crawl" in existing.doc_metadata
+            mock_session.add.assert_not_called()
+        else:
+            services.crawler.submit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_crawl_website_rejects_invalid_pattern(self, client):
+        """Test include/exclude patterns must be valid regular expressions."""
         response = await client.post(
             "/api/documents/crawl",
-            json={"url": "https://example.com", "max_depth": 1},
+            json={"url": "https://example.com", "include_patterns": ["[unclosed"]},
         )
 
-        assert response.status_code == 501
-        data = response.json()
-        assert "not yet implemented" in data["detail"].lower()
+        assert response.status_code == 422
 
 
 @pytest.mark.integration
@@ -204,7 +533,7 @@ class TestDocumentUploadValidation:
     """Test suite for document upload validation."""
 
     @pytest.fixture
-    async def client(self):
+    async def client(self, services):
         """Create async test client."""
         async with AsyncClient(app=app, base_url="http://test") as ac:
             yield ac
@@ -220,11 +549,11 @@ class TestDocumentUploadValidation:
         assert response.status_code == 422
 
     @pytest.mark.asyncio
-    async def test_upload_empty_file(self, client):
+    async def test_upload_empty_file(self, client, services):
         """Test upload with empty file."""
         files = {"file": ("empty.pdf", BytesIO(b""), "application/pdf")}
 
-        with patch("app.api.documents.doc_processor") as mock_processor:
+        with patch.object(services, "doc_processor") as mock_processor:
             mock_processor.generate_document_id.return_value = "doc_empty"
 
             response = await client.post("/api/documents/upload", files=files)
@@ -233,7 +562,7 @@ class TestDocumentUploadValidation:
             assert response.status_code in [200, 400, 500]
 
     @pytest.mark.asyncio
-    async def test_upload_large_file(self, client):
+    async def test_upload_large_file(self, client, services):
         """Test upload with file exceeding size limit."""
         # Create a file larger than MAX_FILE_SIZE
         large_content = b"x" * (11 * 1024 * 1024)  # 11MB (exceeds 10MB limit)
@@ -241,7 +570,7 @@ class TestDocumentUploadValidation:
 
         # This would need actual file size validation in the endpoint
         # For now, we just verify the upload is attempted
-        with patch("app.api.documents.doc_processor"):
+        with patch.object(services, "doc_processor"):
             response = await client.post("/api/documents/upload", files=files)
 
             # May succeed or fail depending on implementation
@@ -0,0 +1,36 @@
+"""Unit tests for the service container."""
+
+import pytest
+
+from app.services.container import ServiceContainer
+
+
+@pytest.mark.unit
+class TestServiceContainer:
+    """Test suite for ServiceContainer."""
+
+    @pytest.mark.asyncio
+    async def test_services_share_clients(self):
+        """Test every service is wired to the container's clients."""
+        services = ServiceContainer()
+
+        assert services.rag.claude is services.anthropic
+        assert services.rag.embedding_service is services.embedding_service
+        assert services.embedding_service.client is services.openai
+        assert services.openai.max_retries == 0
+        assert services.ingestion_queue.rag is services.rag
+        assert services.ingestion_queue.processor is services.doc_processor
+
+        await services.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_http_pools(self):
+        """Test shutdown closes the provider connection pools."""
+        services = ServiceContainer()
+        services.ingestion_queue.start()
+
+        await services.aclose()
+
+        assert services.anthropic.is_closed()
+        assert services.openai.is_closed()
+        assert services.ingestion_queue._tasks == []
@@ -0,0 +1,183 @@
+"""Unit tests for token-budgeted context packing."""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.services.context_packer import ContextPacker, format_context_doc
+from app.services.rag_engine import RAGEngine
+
+
+def make_doc(chunk_id: str, text: str) -> dict:
+    """Retrieved document in RAGEngine.retrieve format."""
+    return {"chunk_id": chunk_id, "text": text, "source": "report.pdf", "page": 1,
+            "score": 0.9, "document_id": "doc_a"}
+
+
+WORDS = "market share revenue growth pricing churn segment channel partner roadmap".split()
+
+
+def distinct_text(seed: int, words: int = 60) -> str:
+    """Text that shares no word trigrams with other seeds."""
+    return " ".join(f"{WORDS[i % len(WORDS)]}{seed}x{i}" for i in range(words))
+
+
+@pytest.mark.unit
+class TestContextPacker:
+    """Test suite for ContextPacker."""
+
+    def test_fits_everything_within_budget(self):
+        """Test small inputs pass through unchanged with accounting."""
+        packer = ContextPacker(max_input_tokens=4000, history_max_tokens=1000)
+        docs = [make_doc("c1", distinct_text(1)), make_doc("c2", distinct_text(2))]
+        history = [
+            {"role": "user", "content": "Tell me about Acme"},
+            {"role": "assistant", "content": "Acme is a tech company"},
+        ]
+
+        packed = packer.pack(docs, history, reserved_tokens=100)
+
+        assert packed.docs == docs
+        assert packed.history == history
+        assert packed.tokens["context"] == sum(
+            packer.count_tokens(format_context_doc(i, d)) for i, d in enumerate(docs, start=1)
+        )
+        assert packed.tokens["total"] == 100 + packed.tokens["history"] + packed.tokens["context"]
+        assert packed.dropped == {
+            "duplicate_chunks": 0, "over_budget_chunks": 0, "history_messages": 0
+        }
+
+    def test_context_label_shows_page_span(self):
+        """Test chunks spanning a page break cite their page range."""
+        single = make_doc("c1", "Pricing table.")
+        spanning = {**make_doc("c2", "Pricing table."), "metadata": {"page_end": 3}}
+
+        assert format_context_doc(1, single).startswith("[Document 1] Source: report.pdf, Page: 1\n")
+        assert format_context_doc(2, spanning).startswith("[Document 2] Source: report.pdf, Pages: 1-3\n")
+
+    def test_drops_near_duplicates(self):
+        """Test a chunk nearly identical to a better one is skipped."""
+        packer = ContextPacker(max_input_tokens=4000)
+        text = distinct_text(1)
+        docs = [make_doc("c1", text), make_doc("c2", text + " extra"), make_doc("c3", distinct_text(2))]
+
+        packed = packer.pack(docs, None)
+
+        assert [d["chunk_id"] for d in packed.docs] == ["c1", "c3"]
+        assert packed.dropped["duplicate_chunks"] == 1
+
+    def test_fills_budget_in_relevance_order(self):
+        """Test chunks that do not fit are skipped and smaller ones still fill."""
+        packer = ContextPacker(max_input_tokens=300, history_max_tokens=0)
+        docs = [
+            make_doc("c1", distinct_text(1, words=40)),
+            make_doc("c2", distinct_text(2, words=100)),
+            make_doc("c3", distinct_text(3, words=10)),
+        ]
+
+        packed = packer.pack(docs, None)
+
+        assert [d["chunk_id"] for d in packed.docs] == ["c1", "c3"]
+        assert packed.dropped["over_budget_chunks"] == 1
+        assert packed.tokens["total"] <= 300
+
+    def test_truncates_top_chunk_when_nothing_fits(self):
+        """Test the most relevant chunk is trimmed rather than sending no context."""
+        packer = ContextPacker(max_input_tokens=50, history_max_tokens=0)
+
+        packed = packer.pack([make_doc("c1", distinct_text(1, words=200))], None)
+
+        assert packed.docs[0]["text"].endswith("[...]")
+        assert packed.tokens["context"] <= 50
+
+    def test_keeps_newest_history_and_starts_with_user(self):
+        """Test old turns are truncated or dropped and history opens with a user turn."""
+        packer = ContextPacker(max_input_tokens=4000, history_max_tokens=120)
+        history = []
+        for i in range(6):
+            history.append({"role": "user", "content": distinct_text(i, words=15)})
+            history.append({"role": "assistant", "content": distinct_text(i + 10, words=15)})
+
+        packed = packer.pack([], history)
+
+        assert packed.history[-1] == history[-1]
+        assert packed.history[0]["role"] == "user"
+        assert packed.tokens["history"] <= 120
+        assert packed.dropped["history_messages"] > 0
+
+
+    def test_drops_old_history_in_whole_blocks(self):
+        """Test over-budget history is cut at block boundaries, never mid-turn."""
+        packer = ContextPacker(max_input_tokens=4000, history_max_tokens=600,
+                               history_block_messages=4)
+        history = []
+        for i in range(8):
+            history.append({"role": "user", "content": distinct_text(i, words=15)})
+            history.append({"role": "assistant", "content": distinct_text(i + 10, words=15)})
+
+        packed = packer.pack([], history)
+
+        assert packed.dropped["history_messages"] % 4 == 0
+        assert packed.history == history[packed.dropped["history_messages"]:]
+        assert 0 < packed.tokens["history"] <= 600
+
+
+@pytest.mark.unit
+class TestRAGEngineContextPacking:
+    """Context packing as used by RAGEngine."""
+
+    @pytest.mark.asyncio
+    async def test_sources_and_metadata_follow_packed_context(self, mock_anthropic_response):
+        """Test dropped duplicates are not cited and token accounting is returned."""
+        claude = Mock()
+        claude.messages.create = AsyncMock(return_value=mock_anthropic_response)
+        rag = RAGEngine(vector_store=Mock(), claude=claude)
+        rag.answer_cache = None
+        rag.embedding_service = Mock(embed_text=AsyncMock(return_value=[0.1]))
+        text = distinct_text(1)
+        rag.retrieve = AsyncMock(return_value=[
+            make_doc("c1", text), make_doc("c2", text), make_doc("c3", distinct_text(2))
+        ])
+
+        result = await rag.query("What is Acme?")
+
+        assert [s["chunk_id"] for s in result["sources"]] == ["c1", "c3"]
+        context = result["metadata"]["context"]
+        assert context["chunk_ids"] == ["c1", "c3"]
+        assert context["dropped"]["duplicate_chunks"] == 1
+        prompt = claude.messages.create.call_args.kwargs["messages"][-1]["content"]
+        assert "[Document 2]" in prompt and "[Document 3]" not in prompt
+
+    def test_cached_history_prefix_is_stable_over_budget(self):
+        """Test two consecutive over-budget turns send the same cached history prefix."""
+        rag = RAGEngine(vector_store=Mock(), claude=Mock())
+        rag.context_packer = ContextPacker(history_max_tokens=900, history_block_messages=4)
+        history = []
+        for i in range(8):
+            history.append({"role": "user", "content": distinct_text(i, words=15)})
+            history.append({"role": "assistant", "content": distinct_text(i + 10, words=15)})
+
+        def cached_prefix(messages):
+            # Messages up to and including the history cache breakpoint
+            end = next(
+                i for i, message in enumerate(messages)
+                if isinstance(message["content"], list)
+                and message["content"][-1].get("cache_control")
+            )
+            return [
+                (m["role"], m["content"] if isinstance(m["content"], str)
+                 else m["content"][0]["text"])
+                for m in messages[:end + 1]
+            ]
+
+        _, first, first_packed = rag._build_messages("Next question?", [], history)
+        history += [
+            {"role": "user", "content": distinct_text(20, words=15)},
+            {"role": "assistant", "content": distinct_text(21, words=15)},
+        ]
+        _, second, second_packed = rag._build_messages("Another question?", [], history)
+
+        assert first_packed.dropped["history_messages"] > 0
+        assert second_packed.dropped["history_messages"] > 0
+        prefix = cached_prefix(first)
+        assert cached_prefix(second)[:len(prefix)] == prefix
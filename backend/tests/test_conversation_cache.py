@@ -0,0 +1,126 @@
+"""Unit tests for the conversation history cache."""
+
+import pytest
+
+from app.services.conversation_cache import ConversationHistoryCache
+
+
+class FakeMessageStore:
+    """In-memory stand-in for the messages table."""
+
+    def __init__(self):
+        self.rows: dict[str, list[tuple[int, str, str]]] = {}
+        self.calls: list[tuple[str, int | None, int]] = []
+        self._next_id = 1
+
+    def add(self, conversation_id: str, role: str, content: str) -> None:
+        self.rows.setdefault(conversation_id, []).append((self._next_id, role, content))
+        self._next_id += 1
+
+    async def fetch(self, conversation_id, after_id, limit):
+        self.calls.append((conversation_id, after_id, limit))
+        rows = self.rows.get(conversation_id, [])
+        if after_id is None:
+            return rows[-limit:]
+        return [row for row in rows if row[0] > after_id][:limit]
+
+
+@pytest.fixture
+def store():
+    """Message store with a four-message conversation."""
+    store = FakeMessageStore()
+    for i in range(2):
+        store.add("conv_a", "user", f"question {i}")
+        store.add("conv_a", "assistant", f"answer {i}")
+    return store
+
+
+@pytest.mark.unit
+class TestConversationHistoryCache:
+    """Test suite for ConversationHistoryCache."""
+
+    @pytest.mark.asyncio
+    async def test_first_load_reads_latest_window(self, store):
+        """Test a miss loads only the newest window_size messages."""
+        cache = ConversationHistoryCache(window_size=3, fetch=store.fetch)
+
+        history = await cache.load("conv_a")
+
+        assert [m["content"] for m in history] == ["answer 0", "question 1", "answer 1"]
+        assert store.calls == [("conv_a", None, 3)]
+
+    @pytest.mark.asyncio
+    async def test_later_loads_append_new_messages(self, store):
+        """Test a hit only fetches messages after the last one seen."""
+        cache = ConversationHistoryCache(window_size=10, fetch=store.fetch)
+        await cache.load("conv_a")
+
+        store.add("conv_a", "user", "question 2")
+        store.add("conv_a", "assistant", "answer 2")
+        history = await cache.load("conv_a")
+
+        assert history[-2:] == [
+            {"role": "user", "content": "question 2"},
+            {"role": "assistant", "content": "answer 2"},
+        ]
+        assert len(history) == 6
+        assert store.calls[1] == ("conv_a", 4, 10)
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_window_stays_bounded(self, store):
+        """Test appended messages push the oldest out of the window."""
+        cache = ConversationHistoryCache(window_size=4, fetch=store.fetch)
+        await cache.load("conv_a")
+
+        store.add("conv_a", "user", "question 2")
+        history = await cache.load("conv_a")
+
+        assert len(history) == 4
+        assert history[0]["content"] == "answer 0"
+
+    @pytest.mark.asyncio
+    async def test_full_window_trims_whole_steps(self, store):
+        """Test a full window drops its oldest messages a step at a time."""
+        cache = ConversationHistoryCache(window_size=4, fetch=store.fetch, trim_step=2)
+        await cache.load("conv_a")
+
+        store.add("conv_a", "user", "question 2")
+        history = await cache.load("conv_a")
+        assert [m["content"] for m in history] == ["question 1", "answer 1", "question 2"]
+
+        store.add("conv_a", "assistant", "answer 2")
+        history = await cache.load("conv_a")
+        assert history[0]["content"] == "question 1"
+        assert len(history) == 4
+
+    @pytest.mark.asyncio
+    async def test_far_behind_reloads_latest_window(self, store):
+        """Test a conversation that grew by a full window is reloaded from the end."""
+        cache = ConversationHistoryCache(window_size=2, fetch=store.fetch)
+        await cache.load("conv_a")
+
+        for i in range(3, 6):
+            store.add("conv_a", "user", f"question {i}")
+        history = await cache.load("conv_a")
+
+        assert [m["content"] for m in history] == ["question 4", "question 5"]
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_invalidate(self, store):
+        """Test least recently used conversations are evicted."""
+        store.add("conv_b", "user", "hello")
+        store.add("conv_c", "user", "hi")
+        cache = ConversationHistoryCache(max_conversations=2, fetch=store.fetch)
+
+        await cache.load("conv_a")
+        await cache.load("conv_b")
+        await cache.load("conv_a")
+        await cache.load("conv_c")
+
+        assert len(cache) == 2
+        assert cache.stats()["misses"] == 3
+
+        cache.invalidate("conv_a")
+        await cache.load("conv_a")
+        assert cache.stats()["misses"] == 4
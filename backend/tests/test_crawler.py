@@ -0,0 +1,372 @@
+"""Tests for Firecrawl crawl ingestion against a local stub server."""
+
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, Mock, patch
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.config import get_settings
+from app.models.document import WebCrawlRequest
+from app.services.crawler import (
+    CrawlError,
+    CrawlScope,
+    WebCrawler,
+    indexed_chunk_ids,
+    page_chunk_ids,
+)
+from app.services.document_processor import DocumentProcessor
+from app.services.mcp_client import MCPClient
+
+SITE = "https://acme.test"
+
+
+def page(path: str, text: str, status_code: int = 200) -> dict:
+    """Firecrawl page record."""
+    return {
+        "markdown": text,
+        "metadata": {"sourceURL": f"{SITE}{path}", "title": path, "statusCode": status_code},
+    }
+
+
+class StubFirecrawl(BaseHTTPRequestHandler):
+    """Firecrawl v1 crawl and scrape endpoints backed by `self.server` state."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body: dict, status: int = 200) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body, self.headers.get("Authorization")))
+        if self.path == "/v1/crawl":
+            self._reply({"success": True, "id": "job_1"})
+        elif self.path == "/v1/scrape":
+            self._reply({"success": True, "data": page("/", "Acme home page text.")})
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != "/v1/crawl/job_1":
+            self._reply({"error": "not found"}, status=404)
+            return
+
+        skip = int(parse_qs(parts.query).get("skip", ["0"])[0])
+        if skip == 0 or "next" not in parse_qs(parts.query):
+            # A new poll: the crawl advances one step
+            self.server.polls += 1
+        step = self.server.steps[min(self.server.polls, len(self.server.steps)) - 1]
+        status, available = step
+        data = available[skip:skip + self.server.batch_size]
+
+        body = {"status": status, "total": len(available), "data": data}
+        if skip + self.server.batch_size < len(available):
+            body["next"] = f"{self.server.base_url}/v1/crawl/job_1?skip={skip + self.server.batch_size}&next=1"
+        self._reply(body)
+
+
+@pytest.fixture
+def firecrawl():
+    """Stub Firecrawl server running on a local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFirecrawl)
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    server.requests = []
+    server.polls = 0
+    server.batch_size = 10
+    server.steps = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def mcp(firecrawl):
+    """MCPClient pointed at the stub server."""
+    client = MCPClient(settings=get_settings().model_copy(update={
+        "firecrawl_api_key": "fc-test",
+        "firecrawl_api_url": firecrawl.base_url,
+        "firecrawl_requests_per_second": 1000.0,
+    }))
+    yield client
+    await client.close()
+
+
+@pytest.fixture
+def updates():
+    """Recorded (progress, fields, metadata_updates, chunk_rows) document updates."""
+    return []
+
+
+@pytest.fixture
+def make_crawler(mcp, updates, firecrawl):
+    """Factory for a crawler whose document updates are recorded."""
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def factory(**kwargs):
+        rag = Mock()
+        rag.upsert_indexed_at_poll = []
+
+        async def upsert_chunks(chunks):
+            rag.upsert_indexed_at_poll.append(firecrawl.polls)
+            return {"total_chunks": len(chunks), "upserted": len(chunks)}
+
+        rag.upsert_chunks = AsyncMock(side_effect=upsert_chunks)
+        rag.delete_chunks = AsyncMock(return_value=0)
+        crawler = WebCrawler(
+            mcp, DocumentProcessor(executor=executor), rag,
+            poll_initial_delay=0.01, poll_max_delay=0.05, **kwargs
+        )
+
+        async def record(document_id, progress, fields, metadata_updates=None,
+                         chunk_rows=None, removed_chunk_ids=None):
+            updates.append((progress, fields, metadata_updates or {}, chunk_rows or []))
+
+        async def last_crawl_pages(document_id):
+            # What the last recorded update stored on the document
+            for _, _, metadata, _ in reversed(updates):
+                if "crawl" in metadata:
+                    return dict(metadata["crawl"]["pages"])
+            return {}
+
+        crawler._update = record
+        crawler._load_pages = last_crawl_pages
+        return crawler
+
+    yield factory
+    executor.shutdown()
+
+
+@pytest.mark.unit
+class TestCrawlScope:
+    """Test suite for CrawlScope."""
+
+    def test_depth_host_and_base_path(self):
+        """Test pages must be below the base path and within max_depth."""
+        scope = CrawlScope(f"{SITE}/blog", max_depth=2)
+
+        assert scope.allows(f"{SITE}/blog")
+        assert scope.allows(f"{SITE}/blog/post-1")
+        assert not scope.allows(f"{SITE}/blog/2024/post-1")
+        assert not scope.allows(f"{SITE}/pricing")
+        assert not scope.allows("https://other.test/blog/post-1")
+
+    def test_include_and_exclude_patterns(self):
+        """Test include patterns restrict and exclude patterns remove paths."""
+        scope = CrawlScope(
+            SITE, max_depth=3, include_patterns=[r"^/(docs|blog)"], exclude_patterns=[r"/draft"]
+        )
+
+        assert scope.allows(f"{SITE}/docs/setup")
+        assert not scope.allows(f"{SITE}/careers")
+        assert not scope.allows(f"{SITE}/blog/draft-post")
+
+
+@pytest.mark.unit
+class TestWebCrawler:
+    """Test suite for WebCrawler against the stub Firecrawl server."""
+
+    @pytest.mark.asyncio
+    async def test_pages_are_indexed_while_crawl_runs(self, firecrawl, make_crawler, updates):
+        """Test pages stream into indexing before the crawl job completes."""
+        first = [page("/", "Acme builds widgets. " * 20), page("/private/x", "Secret notes.")]
+        later = first + [page("/products", "Widget pricing and plans. " * 20),
+                         page("/products/a/b", "Too deep."),
+                         page("/missing", "Not found", status_code=404)]
+        firecrawl.steps = [("scraping", first), ("scraping", first), ("completed", later)]
+        crawler = make_crawler(concurrency=2)
+        request = WebCrawlRequest(url=SITE, max_depth=2, exclude_patterns=["^/private"])
+
+        stats = await crawler.run("doc_web", request)
+
+        assert stats["pages_crawled"] == 2
+        # The first page was indexed before the crawl reported completion
+        assert crawler.rag.upsert_indexed_at_poll[0] < firecrawl.polls
+
+        path, body, auth = firecrawl.requests[0]
+        assert path == "/v1/crawl"
+        assert body["maxDepth"] == 1
+        assert body["excludePaths"] == ["^/private"]
+        assert auth == "Bearer fc-test"
+
+        indexed = {
+            row["chunk_metadata"]["url"] for _, _, _, rows in updates for row in rows
+        }
+        assert indexed == {f"{SITE}/", f"{SITE}/products"}
+        chunk_ids = [row["id"] for _, _, _, rows in updates for row in rows]
+        assert len(chunk_ids) == len(set(chunk_ids))
+
+        progress, fields, metadata, _ = updates[-1]
+        assert progress["stage"] == "completed"
+        assert fields["status"] == "completed"
+        assert metadata["crawl"]["chunk_count"] == len(chunk_ids)
+
+    @pytest.mark.asyncio
+    async def test_follows_next_links_and_skips_received_pages(self, firecrawl, make_crawler):
+        """Test large results are paged and each page is indexed once."""
+        pages = [page(f"/p{i}", f"Page {i} text.") for i in range(5)]
+        firecrawl.batch_size = 2
+        firecrawl.steps = [("scraping", pages[:3]), ("completed", pages)]
+        crawler = make_crawler(concurrency=1)
+
+        stats = await crawler.run("doc_web", WebCrawlRequest(url=SITE, max_depth=2))
+
+        assert stats["pages_crawled"] == 5
+        assert crawler.rag.upsert_chunks.await_count == 5
+
+    @pytest.mark.asyncio
+    async def test_single_page_is_scraped_directly(self, firecrawl, make_crawler, updates):
+        """Test max_depth=1 scrapes the URL without starting a crawl job."""
+        crawler = make_crawler()
+
+        stats = await crawler.run("doc_web", WebCrawlRequest(url=SITE, max_depth=1))
+
+        assert stats["pages_crawled"] == 1
+        assert [path for path, _, _ in firecrawl.requests] == ["/v1/scrape"]
+        assert updates[-1][0]["stage"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_recrawl_only_reindexes_changed_pages(self, firecrawl, make_crawler, updates):
+        """Test unchanged pages are skipped and vanished pages removed on a re-crawl."""
+        firecrawl.steps = [("completed", [
+            page("/a", "Alpha text."), page("/b", "Beta text."), page("/c", "Gamma text."),
+        ])]
+        crawler = make_crawler(concurrency=1)
+        request = WebCrawlRequest(url=SITE, max_depth=2)
+        await crawler.run("doc_web", request)
+        first_ids = {row["id"] for _, _, _, rows in updates for row in rows}
+
+        firecrawl.polls = 0
+        firecrawl.steps = [("completed", [page("/a", "Alpha text."), page("/b", "Beta, revised.")])]
+        crawler = make_crawler(concurrency=1)
+        stats = await crawler.run("doc_web", request)
+
+        assert stats["pages_crawled"] == 2
+        assert stats["pages_unchanged"] == 1
+        [upserted] = crawler.rag.upsert_chunks.await_args_list
+        assert {chunk["metadata"]["url"] for chunk in upserted.args[0]} == {f"{SITE}/b"}
+        # The revised chunk gets a new ID; the old one and the vanished page are removed
+        assert upserted.args[0][0]["chunk_id"] not in first_ids
+
+        revised, vanished = [call.args[1] for call in crawler.rag.delete_chunks.await_args_list]
+        assert len(revised) == 1 and revised[0] in first_ids
+        assert len(vanished) == 1 and vanished[0] in first_ids
+        assert set(updates[-1][2]["crawl"]["pages"]) == {f"{SITE}/a", f"{SITE}/b"}
+
+    def test_page_chunk_ids_follow_text(self):
+        """Test crawl chunk IDs derive from URL and text, with a suffix for repeats."""
+        ids = page_chunk_ids("doc_web", f"{SITE}/a", ["Intro.", "Pricing.", "Intro."])
+        revised = page_chunk_ids("doc_web", f"{SITE}/a", ["New lead.", "Intro.", "Pricing."])
+
+        assert len(set(ids)) == 3
+        assert ids[2] == f"{ids[0]}_1"
+        assert revised[1:] == ids[:2]
+        assert page_chunk_ids("doc_web", f"{SITE}/b", ["Intro."])[0] != ids[0]
+
+    def test_legacy_positional_ids_are_still_removed(self):
+        """Test pages recorded before content-derived IDs map to their old IDs."""
+        url_key = hashlib.sha256(f"{SITE}/a".encode()).hexdigest()[:16]
+
+        ids = indexed_chunk_ids("doc_web", f"{SITE}/a", {"hash": "h", "chunks": 2})
+
+        assert ids == [f"doc_web_{url_key}_chunk_0", f"doc_web_{url_key}_chunk_1"]
+
+    @pytest.mark.asyncio
+    async def test_failed_crawl_is_recorded(self, firecrawl, make_crawler, updates):
+        """Test a failed crawl job marks the document failed."""
+        firecrawl.steps = [("failed", [])]
+        crawler = make_crawler()
+
+        await crawler.run("doc_web", WebCrawlRequest(url=SITE, max_depth=2))
+
+        progress, fields, _, _ = updates[-1]
+        assert progress["stage"] == "failed"
+        assert "job_1 failed" in progress["error"]
+        assert fields["status"] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_crawl_can_be_crawled_again(self, firecrawl, make_crawler, updates):
+        """Test a crawl cancelled at shutdown is marked failed and re-crawls cleanly."""
+        first = [page("/a", "Alpha text.")]
+        firecrawl.steps = [("scraping", first)] * 1000
+        crawler = make_crawler(concurrency=1)
+        request = WebCrawlRequest(url=SITE, max_depth=2)
+
+        crawler.submit("doc_web", request)
+        while not crawler.rag.upsert_chunks.await_count:
+            await asyncio.sleep(0.01)
+        await crawler.stop()
+
+        progress, fields, metadata, _ = updates[-1]
+        assert progress == {"stage": "failed", "progress": 1.0, "error": "Crawl cancelled"}
+        assert fields["status"] == "failed"
+        assert set(metadata["crawl"]["pages"]) == {f"{SITE}/a"}
+
+        firecrawl.polls = 0
+        firecrawl.steps = [("completed", first + [page("/b", "Beta text.")])]
+        crawler = make_crawler(concurrency=1)
+        stats = await crawler.run("doc_web", request)
+
+        assert stats["pages_unchanged"] == 1
+        assert updates[-1][1]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_fail_interrupted_marks_unfinished_crawls(self, make_crawler, updates):
+        """Test crawls left running by a previous process are failed at startup."""
+        crawler = make_crawler()
+
+        with patch("app.services.crawler.get_db") as mock_db:
+            mock_session = AsyncMock()
+            mock_result = Mock()
+            mock_result.scalars.return_value = iter(["doc_a", "doc_b"])
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            interrupted = await crawler.fail_interrupted()
+
+        assert interrupted == 2
+        assert [fields["status"] for _, fields, _, _ in updates] == ["failed", "failed"]
+
+    @pytest.mark.asyncio
+    async def test_polling_backs_off_while_idle(self, firecrawl, make_crawler, monkeypatch):
+        """Test the poll interval doubles without new pages and resets when pages arrive."""
+        one = [page("/a", "A text.")]
+        two = one + [page("/b", "B text.")]
+        firecrawl.steps = [("scraping", one)] + [("scraping", one)] * 3 + [("scraping", two), ("completed", two)]
+        crawler = make_crawler()
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def record_sleep(delay):
+            delays.append(delay)
+            await real_sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", record_sleep)
+        pages = [p.url async for p in crawler.pages(WebCrawlRequest(url=SITE, max_depth=2))]
+
+        assert pages == [f"{SITE}/a", f"{SITE}/b"]
+        assert delays == [0.01, 0.02, 0.04, 0.05, 0.01]
+
+    @pytest.mark.asyncio
+    async def test_timeout_raises(self, firecrawl, make_crawler):
+        """Test a crawl that never completes fails after the timeout."""
+        firecrawl.steps = [("scraping", [])]
+        crawler = make_crawler(timeout=0.05)
+
+        with pytest.raises(CrawlError, match="timed out"):
+            async for _ in crawler.pages(WebCrawlRequest(url=SITE, max_depth=2)):
+                pass
@@ -1,8 +1,13 @@
 """Unit tests for document processor."""
 
+import subprocess
+import sys
 import pytest
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from app.services.document_processor import DocumentProcessor
+from app.services.document_processor import DocumentProcessor, split_page_ranges
+from app.services.document_workers import PageText, chunk_page_stream, iter_pdf_pages
 from app.models.document import DocumentChunk
 
 
@@ -54,6 +59,23 @@ class TestDocumentProcessor:
         for chunk in chunks:
             assert chunk.metadata == metadata
 
+    @pytest.mark.asyncio
+    async def test_chunk_text_runs_in_executor(self):
+        """Test splitting and token counting happen off the event loop."""
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(fn.__name__)
+                return super().submit(fn, *args)
+
+        with RecordingExecutor(max_workers=1) as executor:
+            processor = DocumentProcessor(executor=executor)
+            chunks = await processor.chunk_text("Pricing update. " * 200, "doc_exec")
+
+        assert submitted == ["split_text"]
+        assert all(chunk.token_count == processor.count_tokens(chunk.text) for chunk in chunks)
+
     @pytest.mark.asyncio
     async def test_chunk_text_respects_chunk_size(self, doc_processor):
         """Test that chunks respect size limits."""
@@ -118,12 +140,32 @@ class TestDocumentProcessor:
         assert doc_id4 != doc_id5  # Should be different (random)
 
     def test_generate_chunk_id(self, doc_processor):
-        """Test chunk ID generation."""
-        document_id = "doc_test123"
-        chunk_id = doc_processor._generate_chunk_id(document_id, 5)
+        """Test chunk IDs follow the text, with a suffix for repeated text."""
+        seen = Counter()
+        first = doc_processor._generate_chunk_id("doc_test123", "Pricing table", seen)
+        other = doc_processor._generate_chunk_id("doc_test123", "Scope of work", seen)
+        repeat = doc_processor._generate_chunk_id("doc_test123", "Pricing table", seen)
+
+        assert first.startswith("doc_test123_")
+        assert other != first
+        assert repeat == f"{first}_1"
+        assert doc_processor._generate_chunk_id("doc_test123", "Pricing table", Counter()) == first
+
+    @pytest.mark.asyncio
+    async def test_chunk_ids_stable_across_revisions(self, doc_processor):
+        """Test inserting text early keeps the IDs of the chunks after it."""
+        sections = [f"Section {i}. " + f"Requirement {i} applies to every site. " * 40 for i in range(4)]
+        original = await doc_processor.chunk_text("\n\n".join(sections), "doc_rev")
+        revised = await doc_processor.chunk_text(
+            "\n\n".join(["Addendum. " + "New delivery terms apply. " * 40] + sections), "doc_rev"
+        )
+
+        original_ids = {chunk.text: chunk.chunk_id for chunk in original}
+        kept = [chunk for chunk in revised if chunk.text in original_ids]
 
-        assert chunk_id == "doc_test123_chunk_5"
-        assert chunk_id.startswith(document_id)
+        assert len(kept) == len(original)
+        assert all(chunk.chunk_id == original_ids[chunk.text] for chunk in kept)
+        assert [chunk.chunk_index for chunk in kept] != [chunk.chunk_index for chunk in original]
 
     @pytest.mark.asyncio
     async def test_chunk_empty_text(self, doc_processor):
@@ -209,3 +251,183 @@ class TestDocumentProcessorPDF:
         except Exception:
             # Skip if PDF processing fails (expected without real PDF library)
             pytest.skip("PDF processing requires real PDF file")
+
+    @pytest.mark.asyncio
+    async def test_chunk_pdf_by_pages_split_across_workers(self, make_pdf, monkeypatch):
+        """Test that page ranges processed in parallel keep page order."""
+        pdf_path = make_pdf([f"Page {n} mentions SKU SP70{n:04d}." for n in range(1, 21)])
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            processor = DocumentProcessor(executor=executor, max_workers=3)
+            monkeypatch.setattr(processor.settings, "document_min_pages_per_task", 1)
+            monkeypatch.setattr(processor.settings, "chunk_size", 200)
+            monkeypatch.setattr(processor.settings, "chunk_overlap", 0)
+            chunks, metadata = await processor.chunk_pdf_by_pages(pdf_path, "doc_pdf")
+
+        assert metadata.total_pages == 20
+        # Short pages are packed together instead of one chunk per page
+        assert metadata.chunk_count == len(chunks) < 20
+        assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+        text = " ".join(chunk.text for chunk in chunks)
+        assert [f"SP70{n:04d}" in text for n in range(1, 21)] == [True] * 20
+        assert chunks[0].metadata == {"page": 1, "page_end": chunks[0].metadata["page_end"], "source": pdf_path.name}
+        # Page spans are contiguous and cover the document in order
+        assert chunks[0].page_number == 1 and chunks[-1].metadata["page_end"] == 20
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert chunk.page_number == previous.metadata["page_end"] + 1
+        for chunk in chunks:
+            first, last = chunk.page_number, chunk.metadata["page_end"]
+            assert f"Page {first} " in chunk.text and f"Page {last} " in chunk.text
+        assert all(chunk.token_count > 0 for chunk in chunks)
+
+    def test_worker_module_imports_no_services(self):
+        """Test pool workers load only the extraction and chunking libraries."""
+        heavy = ["anthropic", "openai", "sqlalchemy", "pinecone", "app.config", "app.services.rag_engine"]
+        code = (
+            "import sys, app.services.document_workers; "
+            f"print([m for m in {heavy!r} if m in sys.modules])"
+        )
+
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent.parent
+        )
+
+        assert result.stdout.strip() == "[]"
+
+    @pytest.mark.asyncio
+    async def test_chunk_pdf_by_pages_process_pool(self, make_pdf):
+        """Test extraction and chunking in real worker processes."""
+        pdf_path = make_pdf(["First page text.", "Second page text."])
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            processor = DocumentProcessor(executor=executor, max_workers=2)
+            chunks, metadata = await processor.chunk_pdf_by_pages(pdf_path, "doc_pdf")
+
+        assert metadata.total_pages == 2
+        assert [chunk.text for chunk in chunks] == ["First page text.\nSecond page text."]
+        assert (chunks[0].page_number, chunks[0].metadata["page_end"]) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_stream_pdf_chunks_bounds_pages_in_flight(self, make_pdf, monkeypatch):
+        """Test streaming reads at most one window per worker ahead of the consumer."""
+        pdf_path = make_pdf([f"Page {n} text." for n in range(1, 11)])
+        submitted = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                if fn.__name__ == "extract_pdf_page_range":
+                    submitted.append(args[1:3])
+                return super().submit(fn, *args)
+
+        with RecordingExecutor(max_workers=2) as executor:
+            processor = DocumentProcessor(executor=executor, max_workers=2)
+            monkeypatch.setattr(processor.settings, "document_min_pages_per_task", 1)
+            monkeypatch.setattr(processor.settings, "document_max_pages_per_task", 2)
+
+            stream = processor.stream_pdf_chunks(pdf_path, "doc_pdf")
+            first = await anext(stream)
+            # Two windows of two pages each, one per worker
+            assert submitted == [(0, 2), (2, 4)]
+
+            batches = [first] + [batch async for batch in stream]
+
+        assert [batch.pages_done for batch in batches] == [2, 4, 6, 8, 10]
+        assert all(batch.total_pages == 10 for batch in batches)
+        chunks = [chunk for batch in batches for chunk in batch.chunks]
+        assert len(chunks) == 1
+        assert (chunks[0].page_number, chunks[0].metadata["page_end"]) == (1, 10)
+
+    def test_iter_pdf_pages_is_lazy(self, make_pdf):
+        """Test pages are extracted one at a time and can be ranged."""
+        pdf_path = make_pdf(["One.", "Two.", "Three."])
+
+        pages = iter_pdf_pages(pdf_path, start=1)
+
+        number, text = next(pages)
+        assert (number, text.strip()) == (2, "Two.")
+        assert [(n, t.strip()) for n, t in pages] == [(3, "Three.")]
+        assert [n for n, _ in iter_pdf_pages(pdf_path, stop=1)] == [1]
+
+    @pytest.mark.asyncio
+    async def test_extract_text_from_pdf_generated(self, make_pdf):
+        """Test full-text extraction joins pages and reports metadata."""
+        pdf_path = make_pdf(["One.", "Two."])
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            text, metadata = await DocumentProcessor(executor=executor).extract_text_from_pdf(pdf_path)
+
+        assert [part.strip() for part in text.split("\n\n")] == ["One.", "Two."]
+        assert metadata["total_pages"] == 2
+        assert metadata["file_name"] == pdf_path.name
+
+
+@pytest.mark.unit
+class TestCrossPageChunking:
+    """Test suite for chunking the continuous page stream."""
+
+    def test_page_offset_map(self):
+        """Test offsets map back to their pages, including after rebasing."""
+        stream = PageText()
+        stream.append_page(1, "alpha")
+        stream.append_page(2, "")
+        stream.append_page(3, "gamma\n")
+        stream.append_page(4, "delta")
+
+        # Empty pages take no space; no separator after a trailing newline
+        assert stream.text == "alpha gamma\ndelta"
+        assert [stream.page_at(i) for i in (0, 4, 6, 12)] == [1, 1, 3, 4]
+
+        tail = stream.tail(8)
+        assert tail.text == "mma\ndelta"
+        assert [tail.page_at(0), tail.page_at(4)] == [3, 4]
+
+    def test_sentence_across_page_break_stays_in_one_chunk(self):
+        """Test a sentence split by a page break is not fragmented."""
+        pages = [
+            (1, "Revenue in the last fiscal year grew"),
+            (2, "by 20% driven by widgets. " + "Widget demand stayed strong. " * 30),
+        ]
+
+        chunks, carry = chunk_page_stream(PageText(), pages, 300, 0, final=True)
+
+        text, start_page, end_page, token_count = chunks[0]
+        assert text.startswith("Revenue in the last fiscal year grew by 20% driven by widgets.")
+        assert (start_page, end_page) == (1, 2)
+        assert token_count > 0
+        assert all(chunk[1] == chunk[2] == 2 for chunk in chunks[1:])
+        assert carry.text == ""
+
+    def test_window_tail_is_carried_into_next_window(self):
+        """Test windows chunked separately match chunking the whole text."""
+        pages = [(n, f"Section {n} covers pricing for tier {n}. " * 8) for n in range(1, 7)]
+
+        whole, _ = chunk_page_stream(PageText(), pages, 400, 80, final=True)
+        first, carry = chunk_page_stream(PageText(), pages[:3], 400, 80, final=False)
+        second, carry = chunk_page_stream(carry, pages[3:], 400, 80, final=True)
+
+        assert carry.text == ""
+        assert [chunk[0] for chunk in first + second] == [chunk[0] for chunk in whole]
+        assert [chunk[1:3] for chunk in first + second] == [chunk[1:3] for chunk in whole]
+
+
+@pytest.mark.unit
+class TestSplitPageRanges:
+    """Test suite for split_page_ranges."""
+
+    def test_even_split(self):
+        """Test splitting pages across workers."""
+        assert split_page_ranges(100, 4, 8) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+
+    def test_minimum_pages_per_task(self):
+        """Test that small documents are not over-split."""
+        assert split_page_ranges(10, 4, 8) == [(0, 8), (8, 10)]
+
+    def test_maximum_pages_per_task(self):
+        """Test large documents are split into more ranges than workers."""
+        assert split_page_ranges(100, 2, 8, max_pages=30) == [(0, 30), (30, 60), (60, 90), (90, 100)]
+        assert split_page_ranges(10, 2, 8, max_pages=4) == [(0, 8), (8, 10)]
+
+    def test_empty_document(self):
+        """Test zero pages."""
+        assert split_page_ranges(0, 4, 8) == []
@@ -0,0 +1,67 @@
+"""Unit tests for embedding cache."""
+
+import pytest
+from app.services.embedding_cache import EmbeddingCache, make_cache_key, normalize_text
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """Test suite for EmbeddingCache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create SQLite-backed cache instance."""
+        cache = EmbeddingCache(tmp_path / "embeddings.sqlite3", max_memory_items=2)
+        yield cache
+        cache.close()
+
+    def test_normalize_text(self):
+        """Test whitespace and unicode normalization."""
+        assert normalize_text("  Acme   Corp\n\tAI ") == "Acme Corp AI"
+        assert normalize_text("Café") == normalize_text("Café")
+
+    def test_cache_key_depends_on_model(self):
+        """Test that keys differ per model but not per whitespace."""
+        key = make_cache_key("model-a", "Acme Corp")
+        assert key == make_cache_key("model-a", " Acme  Corp ")
+        assert key != make_cache_key("model-b", "Acme Corp")
+
+    def test_roundtrip_and_counters(self, cache):
+        """Test storing, fetching and hit/miss accounting."""
+        cache.set_many({"a": [0.5, 0.25], "b": [1.0, -1.0]})
+
+        found = cache.get_many(["a", "b", "c"])
+
+        assert found == {"a": [0.5, 0.25], "b": [1.0, -1.0]}
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_lru_eviction_falls_back_to_disk(self, cache):
+        """Test that evicted entries are still served from SQLite."""
+        cache.set_many({"a": [0.1], "b": [0.2], "c": [0.3]})
+
+        assert cache.stats()["memory_items"] == 2
+
+        found = cache.get_many(["a"])
+
+        assert found["a"] == pytest.approx([0.1])
+        assert cache.stats()["disk_hits"] == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that vectors survive reopening the store."""
+        path = tmp_path / "embeddings.sqlite3"
+        first = EmbeddingCache(path)
+        first.set_many({"a": [0.75]})
+        first.close()
+
+        second = EmbeddingCache(path)
+        assert second.get_many(["a"]) == {"a": [0.75]}
+        second.close()
+
+    def test_memory_only_cache(self):
+        """Test cache without a backing file."""
+        cache = EmbeddingCache(None)
+        cache.set_many({"a": [1.0]})
+
+        assert cache.get_many(["a", "b"]) == {"a": [1.0]}
@@ -1,7 +1,11 @@
 """Unit tests for embedding service."""
 
+import asyncio
+
+import httpx
 import pytest
 from unittest.mock import patch, AsyncMock, Mock
+from openai import RateLimitError
 from app.services.embedding import EmbeddingService
 
 
@@ -139,3 +143,136 @@ class TestEmbeddingService:
 
         assert count > 1000  # Should be substantial
         assert count < 10000  # But not unreasonably large
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_only_sends_misses(
+        self, embedding_service, mock_embedding_vector
+    ):
+        """Test that cached texts are not sent to the API again."""
+        first_response = Mock()
+        first_response.data = [Mock(embedding=[0.1] * 3072), Mock(embedding=[0.2] * 3072)]
+
+        second_response = Mock()
+        second_response.data = [Mock(embedding=[0.3] * 3072)]
+
+        with patch.object(
+            embedding_service.client.embeddings,
+            "create",
+            side_effect=[first_response, second_response],
+        ) as mock_create:
+            await embedding_service.embed_batch(["Text A", "Text B"])
+            embeddings = await embedding_service.embed_batch(
+                ["Text B", "Text C", "Text A"]
+            )
+
+            assert mock_create.call_count == 2
+            assert mock_create.call_args.kwargs["input"] == ["Text C"]
+            assert embeddings[0][0] == pytest.approx(0.2)
+            assert embeddings[1][0] == pytest.approx(0.3)
+            assert embeddings[2][0] == pytest.approx(0.1)
+
+    @pytest.mark.asyncio
+    async def test_embed_text_uses_cache(self, embedding_service, mock_openai_response):
+        """Test that repeated single-text embeddings hit the cache."""
+        with patch.object(
+            embedding_service.client.embeddings,
+            "create",
+            return_value=mock_openai_response,
+        ) as mock_create:
+            await embedding_service.embed_text("Who are Acme's competitors?")
+            await embedding_service.embed_text("Who are  Acme's competitors? ")
+
+            assert mock_create.call_count == 1
+            assert embedding_service.cache.stats()["hits"] == 1
+
+    def test_plan_batches_by_tokens(self, embedding_service, monkeypatch):
+        """Test that batches are split on the per-request token limit."""
+        monkeypatch.setattr(
+            embedding_service.settings, "embedding_max_tokens_per_request", 25
+        )
+        texts = ["word " * 10] * 5  # ~10 tokens each
+
+        batches = embedding_service._plan_batches(texts, batch_size=100)
+
+        assert [indices for indices, _ in batches] == [[0, 1], [2, 3], [4]]
+        assert all(tokens <= 25 for _, tokens in batches)
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_concurrent_keeps_order(self, embedding_service):
+        """Test that concurrent batches return results in input order."""
+        texts = [f"Text {i}" for i in range(10)]
+
+        async def fake_create(model, input, encoding_format):
+            # Finish later batches first to exercise reordering
+            await asyncio.sleep(0.01 * (10 - len(input)))
+            response = Mock()
+            response.data = [
+                Mock(embedding=[float(text.split()[1])]) for text in input
+            ]
+            return response
+
+        with patch.object(
+            embedding_service.client.embeddings, "create", side_effect=fake_create
+        ) as mock_create:
+            embeddings = await embedding_service.embed_batch(texts, batch_size=3)
+
+            assert mock_create.call_count == 4
+            assert embeddings == [[float(i)] for i in range(10)]
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_retries_rate_limit(
+        self, embedding_service, mock_openai_response, monkeypatch
+    ):
+        """Test backoff and retry on 429 responses."""
+        monkeypatch.setattr(embedding_service.settings, "embedding_retry_base_delay", 0.001)
+        rate_limit_error = RateLimitError(
+            "Rate limit exceeded",
+            response=httpx.Response(
+                429, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+            ),
+            body=None,
+        )
+
+        with patch.object(
+            embedding_service.client.embeddings,
+            "create",
+            side_effect=[rate_limit_error, rate_limit_error, mock_openai_response],
+        ) as mock_create:
+            embeddings = await embedding_service.embed_batch(["Text 1"])
+
+            assert mock_create.call_count == 3
+            assert len(embeddings) == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_waits_at_least_retry_after(
+        self, embedding_service, mock_openai_response, monkeypatch
+    ):
+        """Test the Retry-After header is the floor of the backoff."""
+        monkeypatch.setattr(embedding_service.settings, "embedding_retry_base_delay", 0.001)
+        rate_limit_error = RateLimitError(
+            "Rate limit exceeded",
+            response=httpx.Response(
+                429, headers={"retry-after": "2"},
+                request=httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+            ),
+            body=None,
+        )
+        delays = []
+
+        async def record_sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr(asyncio, "sleep", record_sleep)
+        with patch.object(
+            embedding_service.client.embeddings,
+            "create",
+            side_effect=[rate_limit_error, mock_openai_response],
+        ):
+            await embedding_service.embed_batch(["Text 1"])
+
+        assert len(delays) == 1
+        assert 2.0 <= delays[0] <= 2.001
+
+    def test_client_does_not_retry_on_its_own(self, embedding_service):
+        """Test the SDK's retries are off so they do not stack with the backoff loop."""
+        assert embedding_service.client.max_retries == 0
@@ -0,0 +1,295 @@
+"""Unit tests for the background ingestion queue."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.models.document import DocumentStatus
+from app.services.document_processor import ChunkBatch
+from app.services.ingestion import (
+    IngestionJob,
+    IngestionQueue,
+    IngestionQueueFull,
+    chunk_fingerprint,
+)
+
+
+@pytest.fixture
+def transitions():
+    """Recorded (document_id, stage, fields) updates."""
+    return []
+
+
+@pytest.fixture
+def make_queue(transitions, mock_document_processor, mock_rag_engine):
+    """Factory for a queue whose database writes are recorded."""
+    mock_rag_engine.upsert_chunks.return_value = {"total_chunks": 1, "upserted": 1}
+    mock_rag_engine.delete_chunks.return_value = 0
+    mock_document_processor.process_text_file.return_value = (
+        mock_document_processor.chunk_pdf_by_pages.return_value
+    )
+
+    def factory(**kwargs):
+        queue = IngestionQueue(mock_document_processor, mock_rag_engine, **kwargs)
+
+        async def record(document_id, progress, fields, metadata_updates=None, **chunk_changes):
+            transitions.append(
+                (document_id, progress["stage"], {**fields, **(metadata_updates or {}), **chunk_changes})
+            )
+
+        async def no_previous_index(document_id):
+            return {}
+
+        queue._update_document = record
+        queue._load_chunk_fingerprints = no_previous_index
+        return queue
+
+    return factory
+
+
+@pytest.mark.unit
+class TestIngestionQueue:
+    """Test suite for IngestionQueue."""
+
+    @pytest.mark.asyncio
+    async def test_job_transitions(self, make_queue, transitions, mock_document_processor):
+        """Test a job moves through processing to completed."""
+        queue = make_queue(workers=1, max_size=4)
+
+        queue.enqueue(IngestionJob(document_id="doc_1", file_path="/tmp/doc_1.pdf", title="Report"))
+        await queue.join()
+        await queue.stop()
+
+        assert [stage for _, stage, _ in transitions] == ["parsing", "embedding", "completed"]
+        assert transitions[0][2]["status"] == DocumentStatus.PROCESSING.value
+
+        embedding = transitions[1][2]
+        assert [row["id"] for row in embedding["chunk_rows"]] == ["doc_test_chunk_0"]
+        assert embedding["chunk_rows"][0]["token_count"] == 10
+        assert embedding["chunk_rows"][0]["chunk_metadata"]["source"] == "test.pdf"
+
+        final = transitions[-1][2]
+        assert final["status"] == DocumentStatus.COMPLETED.value
+        assert final["chunk_count"] == 1
+        assert final["total_pages"] == 1
+        assert final["total_tokens"] == 10
+        assert final["processed_at"] is not None
+
+        assert queue.progress("doc_1") == {"stage": "completed", "progress": 1.0}
+        mock_document_processor.stream_pdf_chunks.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_worker_survives_failed_status_write(self, make_queue, transitions):
+        """Test a worker keeps processing jobs when recording a failure raises."""
+        queue = make_queue(workers=1, max_size=4)
+        record = queue._update_document
+
+        async def flaky(document_id, progress, fields, metadata_updates=None, **chunk_changes):
+            if document_id == "doc_bad":
+                raise ConnectionError("database unavailable")
+            await record(document_id, progress, fields, metadata_updates, **chunk_changes)
+
+        queue._update_document = flaky
+
+        queue.enqueue(IngestionJob(document_id="doc_bad", file_path="/tmp/bad.pdf"))
+        queue.enqueue(IngestionJob(document_id="doc_ok", file_path="/tmp/ok.pdf"))
+        await asyncio.wait_for(queue.join(), timeout=5)
+        await queue.stop()
+
+        assert transitions[-1][:2] == ("doc_ok", "completed")
+
+    @pytest.mark.asyncio
+    async def test_text_files_use_text_processor(self, make_queue, mock_document_processor):
+        """Test non-PDF files are chunked as text."""
+        queue = make_queue(workers=1, max_size=4)
+
+        queue.enqueue(IngestionJob(document_id="doc_2", file_path="/tmp/doc_2.md"))
+        await queue.join()
+        await queue.stop()
+
+        mock_document_processor.process_text_file.assert_awaited_once()
+        mock_document_processor.stream_pdf_chunks.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_revision_reindexes_only_changed_chunks(
+        self, make_queue, transitions, mock_document_processor, mock_rag_engine
+    ):
+        """Test chunk-level diffing against the previously indexed fingerprints."""
+        chunks, doc_metadata = mock_document_processor.chunk_pdf_by_pages.return_value
+        unchanged = chunks[0]
+        added = unchanged.model_copy(update={
+            "chunk_id": "doc_test_added", "chunk_index": 1, "text": "Revised pricing"
+        })
+        moved = unchanged.model_copy(update={
+            "chunk_id": "doc_test_moved", "chunk_index": 2, "text": "Appendix",
+            "page_number": 3, "metadata": {"source": "test.pdf", "page": 3},
+        })
+        mock_document_processor.chunk_pdf_by_pages.return_value = (
+            [unchanged, added, moved], doc_metadata
+        )
+        mock_rag_engine.upsert_chunks.return_value = {"upserted": 2}
+        mock_rag_engine.delete_chunks.return_value = 1
+
+        queue = make_queue(workers=1, max_size=4)
+
+        async def previous_index(document_id):
+            return {
+                "doc_test_chunk_0": chunk_fingerprint(unchanged.text, 1, None),
+                "doc_test_moved": chunk_fingerprint("Appendix", 2, None),
+                "doc_test_removed": chunk_fingerprint("Old pricing", 1, None),
+            }
+
+        queue._load_chunk_fingerprints = previous_index
+
+        queue.enqueue(IngestionJob(document_id="doc_test", file_path="/tmp/rev.pdf"))
+        await queue.join()
+        await queue.stop()
+
+        upserted = mock_rag_engine.upsert_chunks.call_args.args[0]
+        assert [c["chunk_id"] for c in upserted] == ["doc_test_added", "doc_test_moved"]
+        mock_rag_engine.delete_chunks.assert_awaited_once_with("doc_test", ["doc_test_removed"])
+
+        final = transitions[-1][2]
+        assert final["chunk_count"] == 3
+        assert final["last_index"] == {"upserted": 2, "unchanged": 1, "deleted": 1}
+        # Moved rows are replaced with their batch, stale rows at the end
+        embedding = transitions[1][2]
+        assert [row["id"] for row in embedding["chunk_rows"]] == ["doc_test_added", "doc_test_moved"]
+        assert embedding["chunk_rows"][1]["page_number"] == 3
+        assert embedding["removed_chunk_ids"] == ["doc_test_moved"]
+        assert final["removed_chunk_ids"] == ["doc_test_removed"]
+
+    @pytest.mark.asyncio
+    async def test_batches_indexed_as_they_arrive(
+        self, make_queue, transitions, mock_document_processor, mock_rag_engine
+    ):
+        """Test each streamed batch is embedded before the next one is produced."""
+        chunks, _ = mock_document_processor.chunk_pdf_by_pages.return_value
+        produced = []
+
+        async def stream_pdf_chunks(file_path, document_id):
+            for window in range(3):
+                produced.append(window)
+                chunk = chunks[0].model_copy(update={
+                    "chunk_id": f"doc_big_chunk_{window}", "chunk_index": window
+                })
+                yield ChunkBatch(chunks=[chunk], pages_done=(window + 1) * 10, total_pages=30)
+
+        async def upsert(batch):
+            # Nothing beyond this batch's window has been read yet
+            assert len(produced) == batch[0]["chunk_index"] + 1
+            return {"upserted": len(batch)}
+
+        mock_document_processor.stream_pdf_chunks.side_effect = stream_pdf_chunks
+        mock_rag_engine.upsert_chunks.side_effect = upsert
+        queue = make_queue(workers=1, max_size=4)
+
+        queue.enqueue(IngestionJob(document_id="doc_big", file_path="/tmp/big.pdf"))
+        await queue.join()
+        await queue.stop()
+
+        assert mock_rag_engine.upsert_chunks.await_count == 3
+        assert [stage for _, stage, _ in transitions] == [
+            "parsing", "embedding", "embedding", "embedding", "completed"
+        ]
+        assert transitions[-1][2]["chunk_count"] == 3
+        assert transitions[-1][2]["total_tokens"] == 30
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self, make_queue, transitions, mock_rag_engine):
+        """Test a failing job is marked failed and the worker keeps running."""
+        queue = make_queue(workers=1, max_size=4)
+        mock_rag_engine.upsert_chunks.side_effect = [RuntimeError("pinecone down"), {"upserted": 1}]
+
+        queue.enqueue(IngestionJob(document_id="doc_bad", file_path="/tmp/bad.pdf"))
+        queue.enqueue(IngestionJob(document_id="doc_ok", file_path="/tmp/ok.pdf"))
+        await queue.join()
+        await queue.stop()
+
+        failed = [t for t in transitions if t[0] == "doc_bad"][-1]
+        assert failed[1] == "failed"
+        assert failed[2]["status"] == DocumentStatus.FAILED.value
+        assert queue.progress("doc_bad")["error"] == "pinecone down"
+        assert queue.progress("doc_ok")["stage"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_is_bounded(self, make_queue, mock_rag_engine):
+        """Test no more than `workers` jobs run at once."""
+        queue = make_queue(workers=2, max_size=10)
+        running = 0
+        peak = 0
+
+        async def slow_upsert(chunks):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"upserted": len(chunks)}
+
+        mock_rag_engine.upsert_chunks.side_effect = slow_upsert
+
+        for i in range(6):
+            queue.enqueue(IngestionJob(document_id=f"doc_{i}", file_path=f"/tmp/{i}.pdf"))
+        await queue.join()
+        await queue.stop()
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_enqueue_raises_when_full(self, make_queue):
+        """Test the queue rejects jobs beyond its capacity."""
+        queue = make_queue(workers=1, max_size=1)
+        # Occupy the only worker so queued jobs stay queued
+        async def busy(job):
+            await asyncio.sleep(1)
+
+        queue._process = busy
+
+        queue.enqueue(IngestionJob(document_id="doc_a", file_path="/tmp/a.pdf"))
+        await asyncio.sleep(0)
+        queue.enqueue(IngestionJob(document_id="doc_b", file_path="/tmp/b.pdf"))
+
+        assert queue.is_full()
+        with pytest.raises(IngestionQueueFull):
+            queue.enqueue(IngestionJob(document_id="doc_c", file_path="/tmp/c.pdf"))
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_mark_failed(self, make_queue, transitions):
+        """Test a document that could not be queued is recorded as failed."""
+        queue = make_queue(workers=1, max_size=1)
+
+        await queue.mark_failed("doc_c", "Ingestion queue is full (1 jobs)")
+
+        document_id, stage, fields = transitions[-1]
+        assert (document_id, stage) == ("doc_c", "failed")
+        assert fields["status"] == DocumentStatus.FAILED.value
+        assert queue.progress("doc_c")["error"] == "Ingestion queue is full (1 jobs)"
+
+    @pytest.mark.asyncio
+    async def test_resume_requeues_unfinished_documents(self, make_queue, transitions):
+        """Test pending/processing rows are picked up again at startup."""
+        queue = make_queue(workers=1, max_size=4)
+        rows = [
+            Mock(id="doc_pending", file_path="/tmp/p.pdf", title="Pending"),
+            Mock(id="doc_processing", file_path="/tmp/q.txt", title="Interrupted"),
+        ]
+
+        with patch("app.services.ingestion.get_db") as mock_db:
+            mock_session = AsyncMock()
+            mock_result = Mock()
+            mock_result.all.return_value = rows
+            mock_session.execute.return_value = mock_result
+            mock_db.return_value.session.return_value.__aenter__.return_value = mock_session
+
+            resumed = await queue.resume()
+
+        await queue.join()
+        await queue.stop()
+
+        assert resumed == 2
+        completed = {doc_id for doc_id, stage, _ in transitions if stage == "completed"}
+        assert completed == {"doc_pending", "doc_processing"}
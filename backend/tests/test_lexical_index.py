@@ -0,0 +1,141 @@
+"""Unit tests for BM25 lexical index and rank fusion."""
+
+import pytest
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture
+def index():
+    """BM25 index with a small corpus."""
+    index = BM25Index()
+    index.add_chunks([
+        {
+            "chunk_id": "doc_a_chunk_0",
+            "document_id": "doc_a",
+            "text": "Appel d'offres SP701857 pour produits sanitaires.",
+            "metadata": {"source": "rfp.pdf", "page": 1, "source_type": "pdf"},
+        },
+        {
+            "chunk_id": "doc_a_chunk_1",
+            "document_id": "doc_a",
+            "text": "Acme Corporation competes with TechCorp on price.",
+            "metadata": {"source": "rfp.pdf", "page": 2, "source_type": "pdf"},
+        },
+        {
+            "chunk_id": "doc_b_chunk_0",
+            "document_id": "doc_b",
+            "text": "TechCorp launched a new analytics product.",
+            "metadata": {"source": "news", "source_type": "web_page"},
+        },
+    ])
+    return index
+
+
+@pytest.mark.unit
+class TestBM25Index:
+    """Test suite for BM25Index."""
+
+    def test_tokenize(self):
+        """Test lowercasing, accent folding and SKU tokens."""
+        assert tokenize("Numéro SP701857, Acme's") == ["numero", "sp701857", "acme", "s"]
+
+    def test_exact_identifier_ranks_first(self, index):
+        """Test that an exact SKU/RFP number is found."""
+        results = index.search("sp701857", top_k=3)
+
+        assert results[0]["chunk_id"] == "doc_a_chunk_0"
+        assert results[0]["page"] == 1
+        assert len(results) == 1
+
+    def test_filters(self, index):
+        """Test Pinecone-style metadata filters."""
+        results = index.search("TechCorp", top_k=5, filter_dict={"source_type": "web_page"})
+
+        assert [r["chunk_id"] for r in results] == ["doc_b_chunk_0"]
+
+    def test_remove_document(self, index):
+        """Test incremental removal."""
+        removed = index.remove_document("doc_a")
+
+        assert removed == 2
+        assert len(index) == 1
+        assert index.search("SP701857") == []
+
+    def test_replace_chunk(self, index):
+        """Test that re-adding a chunk replaces its postings."""
+        index.add_chunk("doc_b_chunk_0", "doc_b", "Completely different text.")
+
+        assert [r["chunk_id"] for r in index.search("TechCorp", top_k=5)] == ["doc_a_chunk_1"]
+        assert len(index) == 3
+
+    def test_stopwords_ignored(self, index):
+        """Test that function words alone match nothing."""
+        assert index.search("the with on for") == []
+        assert [r["chunk_id"] for r in index.search("the SP701857")] == ["doc_a_chunk_0"]
+
+    def test_common_terms_pruned(self):
+        """Test that terms in most chunks are skipped when rarer terms remain."""
+        index = BM25Index()
+        for i in range(4):
+            index.add_chunk(f"doc_chunk_{i}", "doc", f"quarterly report section {i}")
+        index.add_chunk("doc_chunk_4", "doc", "quarterly report pricing appendix")
+
+        assert [r["chunk_id"] for r in index.search("quarterly pricing", top_k=5)] == ["doc_chunk_4"]
+        assert len(index.search("quarterly", top_k=5)) == 5
+
+    def test_relevance(self, index):
+        """Test that relevance reflects how much of the query a chunk covers."""
+        full = index.search("TechCorp analytics")[0]
+        partial = index.search("TechCorp bakery sourdough")[0]
+
+        assert full["chunk_id"] == "doc_b_chunk_0"
+        assert full["relevance"] > 0.8
+        assert partial["relevance"] < 0.3
+
+    @pytest.mark.asyncio
+    async def test_async_methods(self, index):
+        """Test querying and updating on the index thread."""
+        await index.upsert([{
+            "chunk_id": "doc_c_chunk_0",
+            "document_id": "doc_c",
+            "text": "TechCorp pricing sheet.",
+            "metadata": {},
+        }])
+
+        results = await index.query("pricing", top_k=3)
+        assert [r["chunk_id"] for r in results] == ["doc_c_chunk_0"]
+
+        assert await index.delete(ids=["doc_c_chunk_0", "missing"], document_id="doc_a") == 3
+        assert len(index) == 1
+
+
+@pytest.mark.unit
+class TestReciprocalRankFusion:
+    """Test suite for reciprocal_rank_fusion."""
+
+    def test_fusion_combines_lists(self):
+        """Test that documents found by both lists rank first."""
+        dense = [
+            {"chunk_id": "a", "score": 0.9},
+            {"chunk_id": "b", "score": 0.8},
+        ]
+        lexical = [
+            {"chunk_id": "c", "score": 12.0},
+            {"chunk_id": "b", "score": 7.0},
+        ]
+
+        fused = reciprocal_rank_fusion([(dense, 0.5), (lexical, 0.5)], top_k=3)
+
+        assert fused[0]["chunk_id"] == "b"
+        assert fused[0]["vector_score"] == 0.8
+        assert fused[0]["lexical_score"] == 7.0
+        assert {doc["chunk_id"] for doc in fused} == {"a", "b", "c"}
+        assert all(0 < doc["score"] <= 1 for doc in fused)
+
+    def test_weight_controls_order(self):
+        """Test that weights shift the ranking."""
+        dense = [{"chunk_id": "a", "score": 0.9}]
+        lexical = [{"chunk_id": "c", "score": 12.0}]
+
+        assert reciprocal_rank_fusion([(dense, 0.8), (lexical, 0.2)], top_k=2)[0]["chunk_id"] == "a"
+        assert reciprocal_rank_fusion([(dense, 0.2), (lexical, 0.8)], top_k=2)[0]["chunk_id"] == "c"
@@ -0,0 +1,181 @@
+"""Unit tests for MCPClient rate limiting, retries and batch requests."""
+
+import asyncio
+import json
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.services.mcp_client import retry_after_seconds
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays without waiting."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def record_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr("app.services.mcp_client.asyncio.sleep", record_sleep)
+    return delays
+
+
+@pytest.mark.unit
+class TestRetryAfter:
+    """Test suite for Retry-After parsing."""
+
+    def test_seconds_and_http_date(self):
+        """Test both header forms are understood and bad values ignored."""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+        assert 25 < retry_after_seconds(
+            httpx.Response(429, headers={"Retry-After": format_datetime(retry_at, usegmt=True)})
+        ) <= 30
+        assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+        assert retry_after_seconds(httpx.Response(429)) is None
+
+
+@pytest.mark.unit
+class TestMCPClientRequests:
+    """Test suite for MCPClient retries and limits."""
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limited_request_after_retry_after(self, make_mcp_client, sleeps):
+        """Test a 429 is retried after the server's Retry-After."""
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "2"}),
+            httpx.Response(200, json={"web": {"results": []}}),
+        ]
+        client = make_mcp_client(lambda request: responses.pop(0))
+
+        result = await client.brave_search("acme")
+
+        assert result["web"] == {"results": []}
+        assert sleeps == [2.0]
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_backs_off_exponentially_and_caps_delay(self, make_mcp_client, sleeps):
+        """Test server errors back off, Retry-After is capped and the last error raised."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(503, headers={"Retry-After": "3600"})
+            return httpx.Response(502)
+
+        client = make_mcp_client(handler, mcp_max_retries=3, mcp_retry_max_delay=5.0)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.firecrawl_crawl_status("job_1")
+
+        assert len(calls) == 4
+        assert sleeps[0] == 5.0
+        assert 0 <= sleeps[1] <= 0.02 and 0 <= sleeps[2] <= 0.04
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, make_mcp_client, sleeps):
+        """Test a 4xx other than 429 fails immediately."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(401)
+
+        client = make_mcp_client(handler)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.firecrawl_crawl_status("job_1")
+
+        assert len(calls) == 1 and sleeps == []
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_are_retried(self, make_mcp_client, sleeps):
+        """Test transport failures are retried like server errors."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"status": "completed", "data": []})
+
+        client = make_mcp_client(handler)
+
+        assert (await client.firecrawl_crawl_status("job_1"))["status"] == "completed"
+        assert len(calls) == 2 and len(sleeps) == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_requests(self, make_mcp_client):
+        """Test requests beyond the burst wait for the provider's rate."""
+        client = make_mcp_client(
+            lambda request: httpx.Response(200, json={"status": "scraping", "data": []}),
+            firecrawl_requests_per_second=20.0
+        )
+        loop = asyncio.get_running_loop()
+
+        start = loop.time()
+        await asyncio.gather(*(client.firecrawl_crawl_status(f"job_{i}") for i in range(25)))
+
+        # 20 requests fit in the burst, the remaining 5 take 1/20s each
+        assert loop.time() - start >= 0.2
+        await client.close()
+
+
+@pytest.mark.unit
+class TestMCPClientBatches:
+    """Test suite for gather_scrapes and gather_searches."""
+
+    @pytest.mark.asyncio
+    async def test_gather_scrapes_bounded_and_deduplicated(self, make_mcp_client):
+        """Test batch scrapes respect the concurrency limit and fetch duplicates once."""
+        in_flight = 0
+        peak = 0
+        scraped = []
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            url = json.loads(request.content)["url"]
+            scraped.append(url)
+            if "broken" in url:
+                return httpx.Response(404)
+            return httpx.Response(200, json={"data": {"markdown": url}})
+
+        client = make_mcp_client(handler, firecrawl_max_concurrency=2)
+        urls = [f"https://acme.test/p{i}" for i in range(6)]
+
+        results = await client.gather_scrapes(urls + [urls[0], "https://acme.test/broken"])
+
+        assert peak == 2
+        assert len(scraped) == 7
+        assert results[6] is results[0]
+        assert isinstance(results[7], httpx.HTTPStatusError)
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_gather_searches_preserves_order(self, make_mcp_client):
+        """Test batch search results line up with their queries."""
+        def handler(request):
+            return httpx.Response(200, json={"query": {"original": request.url.params["q"]}})
+
+        client = make_mcp_client(handler)
+        queries = ["acme pricing", "acme funding", "acme pricing"]
+
+        results = await client.gather_searches(queries, count=5)
+
+        assert [r["query"]["original"] for r in results] == queries
+        await client.close()
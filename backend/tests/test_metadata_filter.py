@@ -0,0 +1,35 @@
+"""Unit tests for metadata filter evaluation."""
+
+import pytest
+from app.services.metadata_filter import matches_filter
+
+
+@pytest.mark.unit
+class TestMatchesFilter:
+    """Test suite for matches_filter."""
+
+    metadata = {"source_type": "pdf", "page": 3, "competitor": "Acme"}
+
+    @pytest.mark.parametrize(
+        "filter_dict, expected",
+        [
+            (None, True),
+            ({"source_type": "pdf"}, True),
+            ({"source_type": "web_page"}, False),
+            ({"page": {"$gte": 2, "$lt": 4}}, True),
+            ({"page": {"$gt": 3}}, False),
+            ({"competitor": {"$in": ["Acme", "TechCorp"]}}, True),
+            ({"competitor": {"$nin": ["Acme"]}}, False),
+            ({"missing": {"$exists": False}}, True),
+            ({"$or": [{"page": 1}, {"competitor": "Acme"}]}, True),
+            ({"$and": [{"page": 3}, {"source_type": "web_page"}]}, False),
+        ],
+    )
+    def test_matches_filter(self, filter_dict, expected):
+        """Test supported operators."""
+        assert matches_filter(self.metadata, filter_dict) is expected
+
+    def test_unsupported_operator(self):
+        """Test that unknown operators are rejected."""
+        with pytest.raises(ValueError):
+            matches_filter(self.metadata, {"page": {"$regex": "3"}})
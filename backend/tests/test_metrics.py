@@ -0,0 +1,157 @@
+"""Tests for Prometheus metrics."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from app.db.postgres import _record_statement, _record_statement_error, _start_statement_timer
+from app.main import app
+from app.metrics import (
+    current_endpoint,
+    record_cache,
+    record_tokens,
+    register_gauges,
+    render,
+    track_stage,
+)
+
+
+def sample(name: str, **labels: str) -> float:
+    """Current value of one sample in the default registry (0 if absent)."""
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """Test suite for gauge export and text exposition."""
+
+    def test_gauges_read_at_render_time(self):
+        """Test gauge callbacks export numeric values only."""
+        register_gauges("test_pool", "Pool.", lambda: {"size": 5, "name": "x", "ok": True})
+
+        body, content_type = render()
+        text_body = body.decode()
+
+        assert content_type.startswith("text/plain")
+        assert "# TYPE test_pool_size gauge" in text_body
+        assert "test_pool_size 5.0" in text_body
+        assert "test_pool_name" not in text_body and "test_pool_ok" not in text_body
+
+    def test_gauges_replaced_by_prefix(self):
+        """Test registering a prefix again swaps its callback."""
+        register_gauges("test_swap", "Swap.", lambda: {"value": 1})
+        register_gauges("test_swap", "Swap.", lambda: {"value": 2})
+
+        assert sample("test_swap_value") == 2
+
+    def test_failing_gauge_callback_skipped(self):
+        """Test a raising callback does not break the scrape."""
+        register_gauges("test_broken", "Broken.", lambda: 1 / 0)
+
+        body, _ = render()
+
+        assert b"test_broken" not in body
+
+
+@pytest.mark.unit
+class TestPipelineMetrics:
+    """Test suite for stage, token and cache helpers."""
+
+    def test_track_stage_labels_current_endpoint(self):
+        """Test stage timings carry the endpoint set for the request."""
+        labels = {"stage": "embed", "endpoint": "/test/stage"}
+        before = sample("rag_stage_duration_seconds_count", **labels)
+        token = current_endpoint.set("/test/stage")
+        try:
+            with track_stage("embed"):
+                pass
+        finally:
+            current_endpoint.reset(token)
+
+        assert sample("rag_stage_duration_seconds_count", **labels) == before + 1
+
+    def test_track_stage_counts_only_selected_errors(self):
+        """Test failures are counted for the configured exception types."""
+        token = current_endpoint.set("/test/errors")
+        try:
+            with pytest.raises(RuntimeError):
+                with track_stage("db", errors=RuntimeError):
+                    raise RuntimeError("boom")
+            with pytest.raises(KeyError):
+                with track_stage("db", errors=RuntimeError):
+                    raise KeyError("other")
+        finally:
+            current_endpoint.reset(token)
+
+        labels = {"stage": "db", "endpoint": "/test/errors"}
+        assert sample("rag_errors_total", **labels) == 1
+        assert sample("rag_stage_duration_seconds_count", **labels) == 2
+
+    def test_record_tokens_and_cache(self):
+        """Test token usage and cache lookups are counted by kind."""
+        token = current_endpoint.set("/test/tokens")
+        try:
+            record_tokens({
+                "input_tokens": 100, "output_tokens": 20,
+                "cache_read_input_tokens": 80, "cache_creation_input_tokens": 0,
+            })
+            record_cache("embedding", hits=3, misses=1)
+        finally:
+            current_endpoint.reset(token)
+
+        endpoint = "/test/tokens"
+        assert sample("rag_tokens_total", kind="input", endpoint=endpoint) == 100
+        assert sample("rag_tokens_total", kind="output", endpoint=endpoint) == 20
+        assert sample("rag_tokens_total", kind="cache_read", endpoint=endpoint) == 80
+        assert sample("rag_tokens_total", kind="cache_creation", endpoint=endpoint) == 0
+        assert sample("rag_cache_requests_total", cache="embedding", result="hit", endpoint=endpoint) == 3
+        assert sample("rag_cache_requests_total", cache="embedding", result="miss", endpoint=endpoint) == 1
+
+    def test_db_stage_times_statements_only(self):
+        """Test the statement events record each execution, failures included."""
+        engine = create_engine("sqlite://")
+        event.listen(engine, "before_cursor_execute", _start_statement_timer)
+        event.listen(engine, "after_cursor_execute", _record_statement)
+        event.listen(engine, "handle_error", _record_statement_error)
+        labels = {"stage": "db", "endpoint": "/test/db"}
+
+        token = current_endpoint.set("/test/db")
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+        finally:
+            current_endpoint.reset(token)
+
+        assert sample("rag_stage_duration_seconds_count", **labels) == 3
+        assert sample("rag_errors_total", **labels) == 1
+
+
+@pytest.mark.integration
+class TestMetricsAPI:
+    """Test suite for the /metrics endpoint."""
+
+    @pytest.fixture
+    async def client(self, services):
+        """Create async test client."""
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            yield ac
+
+    @pytest.mark.asyncio
+    async def test_requests_labelled_by_route_template(self, client):
+        """Test requests are counted per route and exposed for scraping."""
+        await client.get("/health")
+        await client.get("/no/such/route")
+
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == prometheus_client.CONTENT_TYPE_LATEST
+        assert 'http_requests_total{endpoint="/health",method="GET",status="200"}' in response.text
+        assert 'http_requests_total{endpoint="unmatched",method="GET",status="404"}' in response.text
+        assert "http_request_duration_seconds_bucket" in response.text
@@ -0,0 +1,66 @@
+"""Unit tests for keyset pagination helpers."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.pagination import decode_cursor, encode_cursor, page_result, paginate
+from app.db.postgres import Document
+
+
+def compile_sql(stmt) -> str:
+    """Render a statement as PostgreSQL SQL."""
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.unit
+class TestPagination:
+    """Test suite for the pagination helpers."""
+
+    def test_cursor_round_trip(self):
+        """Test cursors decode to the encoded sort key."""
+        timestamp = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+        assert decode_cursor(encode_cursor(timestamp, "doc_a")) == (timestamp, "doc_a")
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGpzb24=", encode_cursor(datetime.now(), "x")[:-4]])
+    def test_invalid_cursor(self, cursor):
+        """Test malformed cursors are rejected with 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor)
+
+        assert exc_info.value.status_code == 400
+
+    def test_cursor_page_uses_keyset_predicate(self):
+        """Test a cursor page filters on the sort key instead of using OFFSET."""
+        cursor = encode_cursor(datetime(2024, 1, 1), "doc_x")
+
+        sql = compile_sql(paginate(select(Document.id), Document.created_at, Document.id, 10, cursor, offset=20))
+
+        assert "(documents.created_at, documents.id) <" in sql
+        assert "ORDER BY documents.created_at DESC, documents.id DESC" in sql
+        assert "OFFSET" not in sql
+
+    def test_offset_without_cursor(self):
+        """Test legacy offset pagination still works without a cursor."""
+        sql = compile_sql(paginate(select(Document.id), Document.created_at, Document.id, 10, offset=20))
+
+        assert "OFFSET" in sql
+        assert "<" not in sql
+
+    def test_page_result_builds_next_cursor(self):
+        """Test the extra row is dropped and the cursor points at the last kept row."""
+        rows = [
+            SimpleNamespace(id=f"doc_{i}", created_at=datetime(2024, 1, 10 - i))
+            for i in range(4)
+        ]
+
+        page, next_cursor = page_result(rows, 3, "created_at")
+
+        assert [r.id for r in page] == ["doc_0", "doc_1", "doc_2"]
+        assert decode_cursor(next_cursor) == (datetime(2024, 1, 8), "doc_2")
+        assert page_result(rows[:3], 3, "created_at") == (rows[:3], None)
@@ -0,0 +1,105 @@
+"""Unit tests for the async Pinecone index adapter."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from app.db.pinecone_client import AsyncPineconeIndex
+
+
+@pytest.fixture
+def index():
+    """Synchronous index mock."""
+    return Mock()
+
+
+@pytest.fixture
+def async_index(index):
+    """Adapter over the mock index."""
+    adapter = AsyncPineconeIndex(index, max_workers=4, timeout=1.0)
+    yield adapter
+    adapter.close()
+
+
+@pytest.mark.unit
+class TestAsyncPineconeIndex:
+    """Test suite for AsyncPineconeIndex."""
+
+    @pytest.mark.asyncio
+    async def test_query_passes_request_timeout(self, async_index, index):
+        """Test queries are forwarded with the per-call timeout."""
+        index.query.return_value = "matches"
+
+        result = await async_index.query(vector=[0.1], top_k=3, include_metadata=True)
+
+        assert result == "matches"
+        index.query.assert_called_once_with(
+            vector=[0.1], top_k=3, include_metadata=True, _request_timeout=1.0
+        )
+
+    @pytest.mark.asyncio
+    async def test_query_does_not_block_event_loop(self, async_index, index):
+        """Test a slow round trip runs off the event loop."""
+        index.query.side_effect = lambda **kwargs: time.sleep(0.2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await async_index.query(vector=[0.1], top_k=1)
+        task.cancel()
+
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, index):
+        """Test calls exceeding the timeout raise."""
+        index.query.side_effect = lambda **kwargs: time.sleep(0.3)
+        adapter = AsyncPineconeIndex(index, max_workers=1, timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await adapter.query(vector=[0.1], top_k=1)
+
+        adapter.close()
+
+    @pytest.mark.asyncio
+    async def test_upsert_batches_in_parallel(self, async_index, index):
+        """Test upsert batches are in flight at the same time."""
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def upsert(vectors, _request_timeout):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+
+        index.upsert.side_effect = upsert
+        vectors = [{"id": f"v{i}", "values": [0.0]} for i in range(10)]
+
+        upserted = await async_index.upsert(vectors, batch_size=3)
+
+        assert upserted == 10
+        assert index.upsert.call_count == 4
+        assert peak > 1
+
+    @pytest.mark.asyncio
+    async def test_delete_by_ids_and_filter(self, async_index, index):
+        """Test deletes by ID are batched and filters are sent once."""
+        await async_index.delete(ids=["a", "b", "c"], batch_size=2)
+        await async_index.delete(filter={"document_id": "doc_a"})
+
+        calls = [c.kwargs for c in index.delete.call_args_list]
+        assert sorted(c.get("ids", []) for c in calls[:2]) == [["a", "b"], ["c"]]
+        assert calls[2] == {"filter": {"document_id": "doc_a"}, "_request_timeout": 1.0}
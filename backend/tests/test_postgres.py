@@ -0,0 +1,169 @@
+"""Unit tests for PostgreSQL helpers."""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db.postgres import (
+    CHUNK_COPY_COLUMNS,
+    SCHEMA_UPGRADES,
+    Base,
+    DatabaseSession,
+    bulk_insert_chunks,
+)
+
+
+@pytest.fixture
+def chunk_rows():
+    """Chunk rows as written by the ingestion worker."""
+    return [
+        {
+            "id": f"doc_a_chunk_{i}",
+            "document_id": "doc_a",
+            "text": f"Chunk {i}",
+            "chunk_index": i,
+            "page_number": 1,
+            "token_count": 2,
+            "chunk_metadata": {"page": 1, "source": "rfp.pdf"},
+        }
+        for i in range(3)
+    ]
+
+
+def make_session(driver: str):
+    """Session whose connection reports the given DBAPI driver."""
+    connection = AsyncMock()
+    connection.dialect = Mock(driver=driver)
+    session = AsyncMock()
+    session.connection.return_value = connection
+    return session, connection
+
+
+@pytest.mark.unit
+class TestBulkInsertChunks:
+    """Test suite for bulk_insert_chunks."""
+
+    @pytest.mark.asyncio
+    async def test_uses_copy_on_asyncpg(self, chunk_rows):
+        """Test rows are copied through asyncpg in column order."""
+        session, connection = make_session("asyncpg")
+        raw_connection = Mock()
+        raw_connection.driver_connection.copy_records_to_table = AsyncMock()
+        connection.get_raw_connection.return_value = raw_connection
+
+        inserted = await bulk_insert_chunks(session, chunk_rows)
+
+        assert inserted == 3
+        copy = raw_connection.driver_connection.copy_records_to_table
+        copy.assert_awaited_once()
+        assert copy.call_args.args == ("chunks",)
+        assert copy.call_args.kwargs["columns"] == CHUNK_COPY_COLUMNS
+
+        record = copy.call_args.kwargs["records"][0]
+        assert record[:6] == ("doc_a_chunk_0", "doc_a", "Chunk 0", 0, 1, 2)
+        assert json.loads(record[6]) == {"page": 1, "source": "rfp.pdf"}
+        assert isinstance(record[7], datetime)
+        session.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_executemany(self, chunk_rows):
+        """Test other drivers get a multi-row INSERT."""
+        session, _ = make_session("psycopg")
+
+        inserted = await bulk_insert_chunks(session, chunk_rows)
+
+        assert inserted == 3
+        statement, params = session.execute.call_args.args
+        assert statement.table.name == "chunks"
+        assert params == chunk_rows
+
+    @pytest.mark.asyncio
+    async def test_no_rows(self):
+        """Test an empty batch does not touch the connection."""
+        session, _ = make_session("asyncpg")
+
+        assert await bulk_insert_chunks(session, []) == 0
+        session.connection.assert_not_called()
+
+
+@pytest.mark.unit
+class TestDatabaseSessionPool:
+    """Test suite for DatabaseSession pool configuration and stats."""
+
+    def test_pool_uses_settings(self):
+        """Test pool sizing and pre-ping come from settings."""
+        db = DatabaseSession()
+
+        stats = db.pool_stats()
+
+        assert stats["pool_size"] == 10
+        assert stats["max_overflow"] == 20
+        assert stats["checked_out"] == 0
+        assert db.engine.pool._pre_ping is True
+        assert db.engine.pool._recycle == 1800
+
+    @pytest.mark.asyncio
+    async def test_acquire_records_wait_and_timeouts(self):
+        """Test connection checkouts update the wait-time counters."""
+        db = DatabaseSession()
+
+        async def slow_checkout():
+            await asyncio.sleep(0.02)
+
+        session = AsyncMock()
+        session.connection.side_effect = slow_checkout
+        await db._acquire(session)
+
+        session.connection.side_effect = PoolTimeoutError("pool exhausted")
+        with pytest.raises(PoolTimeoutError):
+            await db._acquire(session)
+
+        stats = db.pool_stats()
+        assert stats["acquisitions"] == 1
+        assert stats["acquire_timeouts"] == 1
+        assert stats["acquire_wait_ms_max"] >= 15
+        assert stats["acquire_wait_ms_avg"] == stats["acquire_wait_ms_max"]
+
+
+@pytest.mark.unit
+class TestSchemaUpgrades:
+    """Test suite for the startup schema upgrades."""
+
+    def test_upgrade_indexes_match_models(self):
+        """Test upgrades create exactly the indexes create_all gives new databases."""
+        model_indexes = {
+            index.name for table in Base.metadata.tables.values() for index in table.indexes
+        }
+        upgraded = [
+            statement.split("IF NOT EXISTS ")[1].split()[0]
+            for statement in SCHEMA_UPGRADES
+            if statement.startswith("CREATE INDEX")
+        ]
+
+        # Every index declared on the models reaches existing databases too
+        assert set(upgraded) == model_indexes
+
+    @pytest.mark.asyncio
+    async def test_init_db_applies_upgrades_outside_a_transaction(self):
+        """Test upgrades run after create_all on an autocommit connection."""
+        db = DatabaseSession()
+        ddl_conn = AsyncMock()
+        upgrade_conn = AsyncMock()
+        upgrade_conn.execution_options.return_value = upgrade_conn
+        db.engine = Mock()
+        db.engine.begin.return_value.__aenter__ = AsyncMock(return_value=ddl_conn)
+        db.engine.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+        db.engine.connect.return_value.__aenter__ = AsyncMock(return_value=upgrade_conn)
+        db.engine.connect.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        await db.init_db()
+
+        ddl_conn.run_sync.assert_awaited_once_with(Base.metadata.create_all)
+        upgrade_conn.execution_options.assert_awaited_once_with(isolation_level="AUTOCOMMIT")
+        executed = [call.args[0].text for call in upgrade_conn.execute.await_args_list]
+        assert executed == SCHEMA_UPGRADES
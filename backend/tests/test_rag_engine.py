@@ -2,6 +2,7 @@
 
 import pytest
 from unittest.mock import patch, Mock, AsyncMock
+from app.db.pinecone_client import AsyncPineconeIndex
 from app.services.rag_engine import RAGEngine
 
 
@@ -12,11 +13,9 @@ class TestRAGEngine:
     @pytest.fixture
     async def rag_engine(self, mock_pinecone_index):
         """Create RAG engine with mocked Pinecone."""
-        with patch("app.services.rag_engine.Pinecone") as mock_pc:
-            mock_pc.return_value.Index.return_value = mock_pinecone_index
-            engine = RAGEngine()
-            engine.index = mock_pinecone_index
-            yield engine
+        vector_store = AsyncPineconeIndex(mock_pinecone_index, max_workers=4, timeout=5.0)
+        yield RAGEngine(vector_store=vector_store)
+        vector_store.close()
 
     @pytest.mark.asyncio
     async def test_retrieve_basic(
@@ -106,6 +105,67 @@ class TestRAGEngine:
             assert len(results) == 1
             assert results[0]["score"] >= 0.7
 
+    @pytest.mark.asyncio
+    async def test_retrieve_hybrid_finds_exact_identifier(
+        self, rag_engine, mock_pinecone_query_result, mock_embedding_vector
+    ):
+        """Test that BM25 matches are fused with dense results."""
+        rag_engine.lexical_index.add_chunk(
+            "doc_rfp_chunk_3",
+            "doc_rfp",
+            "Bordereau de prix pour l'appel d'offres SP701857.",
+            {"source": "rfp.pdf", "page": 4},
+        )
+
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ):
+            rag_engine.index.query.return_value = mock_pinecone_query_result
+
+            results = await rag_engine.retrieve("SP701857", top_k=3, lexical_weight=0.5)
+            dense_only = await rag_engine.retrieve("SP701857", top_k=3, lexical_weight=0)
+
+            assert "doc_rfp_chunk_3" in [doc["chunk_id"] for doc in results]
+            assert "doc_rfp_chunk_3" not in [doc["chunk_id"] for doc in dense_only]
+
+    @pytest.mark.asyncio
+    async def test_retrieve_hybrid_drops_weak_lexical_matches(self, rag_engine, mock_embedding_vector):
+        """Test that keyword-only matches below the relevance floor are not fused."""
+        rag_engine.lexical_index.add_chunk("doc_a_chunk_0", "doc_a", "Acme pricing update for Q3.")
+        rag_engine.lexical_index.add_chunk("doc_b_chunk_0", "doc_b", "TechCorp hiring news.")
+
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ):
+            rag_engine.index.query.return_value = Mock(matches=[])
+
+            off_topic = await rag_engine.retrieve("sourdough bread pricing tips", lexical_weight=0.5)
+            on_topic = await rag_engine.retrieve("Acme pricing", lexical_weight=0.5)
+
+        assert off_topic == []
+        assert [doc["chunk_id"] for doc in on_topic] == ["doc_a_chunk_0"]
+
+    @pytest.mark.asyncio
+    async def test_upsert_and_delete_update_lexical_index(self, rag_engine, sample_chunks):
+        """Test that the lexical index follows upserts and deletions."""
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_documents",
+            return_value=[{**chunk, "embedding": [0.1] * 3072} for chunk in sample_chunks],
+        ):
+            await rag_engine.upsert_chunks(sample_chunks)
+
+        assert len(rag_engine.lexical_index) == len(sample_chunks)
+        assert rag_engine.lexical_index.search("Analytics")[0]["chunk_id"] == "doc_test_chunk_1"
+
+        await rag_engine.delete_document("doc_test")
+
+        assert len(rag_engine.lexical_index) == 0
+
     @pytest.mark.asyncio
     async def test_synthesize_basic(
         self, rag_engine, sample_chunks, mock_anthropic_response
@@ -169,6 +229,35 @@ class TestRAGEngine:
             messages = call_args.kwargs["messages"]
             assert len(messages) >= len(history) + 1  # History + new query
 
+    @pytest.mark.asyncio
+    async def test_synthesize_marks_prompt_cache_breakpoints(
+        self, rag_engine, sample_chunks, mock_anthropic_response
+    ):
+        """Test the instructions and history prefix are cacheable and cache usage is recorded."""
+        context_docs = [
+            {"text": chunk["text"], "source": chunk["metadata"]["source"], "score": 0.9}
+            for chunk in sample_chunks
+        ]
+        history = [
+            {"role": "user", "content": "Tell me about Acme"},
+            {"role": "assistant", "content": "Acme is a tech company"},
+        ]
+        mock_anthropic_response.usage.cache_read_input_tokens = 1200
+
+        mock_create = AsyncMock(return_value=mock_anthropic_response)
+        with patch.object(rag_engine.claude.messages, "create", new=mock_create):
+            _, metadata = await rag_engine.synthesize("What are their products?", context_docs, history)
+
+        kwargs = mock_create.call_args.kwargs
+        assert kwargs["system"][0]["cache_control"] == {"type": "ephemeral"}
+        messages = kwargs["messages"]
+        assert messages[0] == history[0]
+        assert messages[1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert messages[1]["content"][0]["text"] == history[1]["content"]
+        assert "What are their products?" in messages[2]["content"]
+        assert metadata["cache_read_input_tokens"] == 1200
+        assert metadata["cache_creation_input_tokens"] == 0
+
     @pytest.mark.asyncio
     async def test_query_full_pipeline(
         self,
@@ -200,6 +289,122 @@ class TestRAGEngine:
             assert len(result["sources"]) > 0
             assert result["retrieved_doc_count"] == 2
 
+    @pytest.mark.asyncio
+    async def test_query_answer_cache_hit(
+        self,
+        rag_engine,
+        mock_pinecone_query_result,
+        mock_embedding_vector,
+        mock_anthropic_response,
+    ):
+        """Test that a repeated question skips retrieval and Claude."""
+        mock_create = AsyncMock(return_value=mock_anthropic_response)
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ), patch.object(rag_engine.claude.messages, "create", new=mock_create):
+            rag_engine.index.query.return_value = mock_pinecone_query_result
+
+            first = await rag_engine.query("Who are Acme's competitors?")
+            second = await rag_engine.query("Who are Acme competitors?")
+
+            assert first["metadata"]["cache"]["hit"] is False
+            assert second["metadata"]["cache"]["hit"] is True
+            assert second["answer"] == first["answer"]
+            assert mock_create.call_count == 1
+            assert rag_engine.index.query.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_query_cache_invalidated_on_delete(
+        self,
+        rag_engine,
+        mock_pinecone_query_result,
+        mock_embedding_vector,
+        mock_anthropic_response,
+    ):
+        """Test that deleting a cited document invalidates cached answers."""
+        mock_create = AsyncMock(return_value=mock_anthropic_response)
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ), patch.object(rag_engine.claude.messages, "create", new=mock_create):
+            rag_engine.index.query.return_value = mock_pinecone_query_result
+
+            await rag_engine.query("What is Acme Corp?")
+            await rag_engine.delete_document("doc_test")
+            result = await rag_engine.query("What is Acme Corp?")
+
+            assert result["metadata"]["cache"]["hit"] is False
+            assert mock_create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_query_with_history_bypasses_cache(
+        self,
+        rag_engine,
+        mock_pinecone_query_result,
+        mock_embedding_vector,
+        mock_anthropic_response,
+    ):
+        """Test that follow-up questions are never served from cache."""
+        history = [{"role": "user", "content": "Tell me about Acme"}]
+        mock_create = AsyncMock(return_value=mock_anthropic_response)
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ), patch.object(rag_engine.claude.messages, "create", new=mock_create):
+            rag_engine.index.query.return_value = mock_pinecone_query_result
+
+            await rag_engine.query("What are their products?", conversation_history=history)
+            await rag_engine.query("What are their products?", conversation_history=history)
+
+            assert mock_create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_query_stream(
+        self,
+        rag_engine,
+        mock_pinecone_query_result,
+        mock_embedding_vector,
+        mock_anthropic_response,
+    ):
+        """Test streaming pipeline emits sources, tokens, then the result."""
+
+        class FakeStream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            @property
+            async def text_stream(self):
+                for text in ["Acme is ", "a tech company."]:
+                    yield text
+
+            async def get_final_message(self):
+                return mock_anthropic_response
+
+        with patch.object(
+            rag_engine.embedding_service,
+            "embed_text",
+            return_value=mock_embedding_vector,
+        ), patch.object(
+            rag_engine.claude.messages, "stream", return_value=FakeStream()
+        ):
+            rag_engine.index.query.return_value = mock_pinecone_query_result
+
+            events = [event async for event in rag_engine.query_stream("What is Acme Corp?")]
+
+            assert [e["type"] for e in events] == ["sources", "token", "token", "done"]
+            assert len(events[0]["sources"]) == 2
+            result = events[-1]["result"]
+            assert result["answer"] == "Acme is a tech company."
+            assert result["tokens_used"] == 150
+            assert result["metadata"]["time_to_first_token_ms"] is not None
+
     @pytest.mark.asyncio
     async def test_query_no_results(self, rag_engine, mock_embedding_vector):
         """Test query when no documents are found."""
@@ -288,6 +493,23 @@ class TestRAGEngine:
         call_kwargs = rag_engine.index.delete.call_args.kwargs
         assert call_kwargs["filter"] == {"document_id": document_id}
 
+    @pytest.mark.asyncio
+    async def test_delete_chunks(self, rag_engine):
+        """Test deleting specific chunk IDs in batches."""
+        rag_engine.lexical_index.add_chunk("doc_a_chunk_0", "doc_a", "kept text")
+        rag_engine.lexical_index.add_chunk("doc_a_chunk_1", "doc_a", "stale text")
+
+        deleted = await rag_engine.delete_chunks(
+            "doc_a", ["doc_a_chunk_1", "doc_a_chunk_2", "doc_a_chunk_3"], batch_size=2
+        )
+
+        assert deleted == 3
+        assert [c.kwargs["ids"] for c in rag_engine.index.delete.call_args_list] == [
+            ["doc_a_chunk_1", "doc_a_chunk_2"],
+            ["doc_a_chunk_3"],
+        ]
+        assert len(rag_engine.lexical_index) == 1
+
     @pytest.mark.asyncio
     async def test_delete_document_error(self, rag_engine):
         """Test error handling during document deletion."""
@@ -0,0 +1,48 @@
+"""Unit tests for rate limiting primitives."""
+
+import asyncio
+import time
+
+import pytest
+from app.services.rate_limiter import AsyncTokenBucket
+
+
+@pytest.mark.unit
+class TestAsyncTokenBucket:
+    """Test suite for AsyncTokenBucket."""
+
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity(self):
+        """Test that a full bucket serves a burst without waiting."""
+        bucket = AsyncTokenBucket(rate=1.0, capacity=10)
+
+        start = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+
+        assert time.monotonic() - start < 0.05
+
+    @pytest.mark.asyncio
+    async def test_waits_for_refill(self):
+        """Test that acquiring beyond capacity waits for refill."""
+        bucket = AsyncTokenBucket(rate=100.0, capacity=5)
+        await bucket.acquire(5)
+
+        start = time.monotonic()
+        await bucket.acquire(5)
+
+        assert time.monotonic() - start >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_oversized_request_is_clamped(self):
+        """Test that requests larger than capacity still complete."""
+        bucket = AsyncTokenBucket(rate=1000.0, capacity=10)
+
+        await asyncio.wait_for(bucket.acquire(50), timeout=1.0)
+
+    def test_per_minute(self):
+        """Test per-minute constructor."""
+        bucket = AsyncTokenBucket.per_minute(600)
+
+        assert bucket.capacity == 600
+        assert bucket.rate == pytest.approx(10.0)
@@ -0,0 +1,110 @@
+"""Unit tests for the cross-encoder reranker."""
+
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from app.services.rag_engine import RAGEngine
+from app.services.reranker import Reranker
+
+
+def make_docs(count: int) -> list[dict]:
+    """Candidates whose text encodes their true relevance."""
+    return [
+        {"chunk_id": f"c{i}", "text": f"relevance {i}", "score": 1.0 - i / 100,
+         "source": "doc.pdf", "document_id": "doc_a"}
+        for i in range(count)
+    ]
+
+
+def score_by_text(query: str, passages: list[str]) -> list[float]:
+    """Score passages by the number in their text."""
+    return [float(p.split()[-1]) for p in passages]
+
+
+@pytest.mark.unit
+class TestReranker:
+    """Test suite for Reranker."""
+
+    @pytest.mark.asyncio
+    async def test_rerank_keeps_best_in_batches(self):
+        """Test candidates are scored in batches and the top_k kept."""
+        score_fn = Mock(side_effect=score_by_text)
+        reranker = Reranker(score_fn, batch_size=4, timeout_ms=1000)
+
+        docs, info = await reranker.rerank("q", make_docs(10), top_k=3)
+        reranker.close()
+
+        assert [d["chunk_id"] for d in docs] == ["c9", "c8", "c7"]
+        assert docs[0]["rerank_score"] == 9.0
+        assert docs[0]["score"] == pytest.approx(0.91)
+        assert score_fn.call_count == 3
+        assert info["applied"] is True
+        assert info["candidates"] == 10
+
+    @pytest.mark.asyncio
+    async def test_timeout_falls_back_to_retrieval_order(self):
+        """Test exceeding the budget returns candidates in original order."""
+        def slow_score(query, passages):
+            time.sleep(0.1)
+            return score_by_text(query, passages)
+
+        reranker = Reranker(slow_score, batch_size=2, timeout_ms=50)
+
+        docs, info = await reranker.rerank("q", make_docs(6), top_k=3)
+        reranker.close()
+
+        assert [d["chunk_id"] for d in docs] == ["c0", "c1", "c2"]
+        assert "rerank_score" not in docs[0]
+        assert info["applied"] is False
+
+    @pytest.mark.asyncio
+    async def test_back_to_back_timeouts_do_not_starve_later_queries(self):
+        """Test an overrunning batch stops its query's work and does not block the next query."""
+        calls = []
+
+        def score(query, passages):
+            calls.append(query)
+            if query == "slow":
+                time.sleep(0.2)
+            return score_by_text(query, passages)
+
+        reranker = Reranker(score, batch_size=2, timeout_ms=50)
+
+        _, info = await reranker.rerank("slow", make_docs(6), top_k=3)
+        assert info["applied"] is False
+
+        # The overrunning batch is still running; later queries use the other thread
+        for _ in range(2):
+            docs, info = await reranker.rerank("fast", make_docs(6), top_k=3)
+            assert info["applied"] is True
+            assert docs[0]["chunk_id"] == "c5"
+
+        time.sleep(0.3)
+        reranker.close()
+
+        # The timed-out query scored only the batch in progress at its deadline
+        assert calls.count("slow") == 1
+
+    @pytest.mark.asyncio
+    async def test_rag_engine_overfetches_and_reranks(self, monkeypatch):
+        """Test the RAG engine retrieves rerank_candidates and reranks to top_k."""
+        reranker = Reranker(score_by_text, batch_size=8, timeout_ms=1000)
+        rag = RAGEngine(vector_store=Mock(), claude=Mock(), reranker=reranker)
+        monkeypatch.setattr(rag.settings, "rerank_candidates", 20)
+        rag.answer_cache = None
+        rag.embedding_service = Mock(embed_text=AsyncMock(return_value=[0.1]))
+        rag.retrieve = AsyncMock(return_value=make_docs(20))
+        rag.synthesize = AsyncMock(return_value=(
+            "answer",
+            {"model": "claude", "tokens_used": 10, "processing_time_ms": 1.0}
+        ))
+
+        result = await rag.query("question", top_k=2)
+        reranker.close()
+
+        assert rag.retrieve.call_args.kwargs["top_k"] == 20
+        context = rag.synthesize.call_args.kwargs["context_docs"]
+        assert [d["chunk_id"] for d in context] == ["c19", "c18"]
+        assert result["metadata"]["rerank"]["applied"] is True
@@ -0,0 +1,107 @@
+"""Unit tests for the response cache and cached MCPClient calls."""
+
+import json
+import time
+
+import httpx
+import pytest
+
+from app.services.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    content_hash,
+    make_request_key,
+)
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Test suite for ResponseCache."""
+
+    def test_keys_depend_on_kind_target_and_params(self):
+        """Test identical requests share a key and different ones do not."""
+        key = make_request_key("scrape", "https://acme.test", {"formats": ["markdown"]})
+
+        assert key == make_request_key("scrape", "https://acme.test ", {"formats": ["markdown"]})
+        assert key != make_request_key("scrape", "https://acme.test", {"formats": ["html"]})
+        assert key != make_request_key("search", "https://acme.test", {"formats": ["markdown"]})
+
+    def test_content_hash_ignores_whitespace_changes(self):
+        """Test reflowed content hashes the same."""
+        assert content_hash("Acme  pricing\n page") == content_hash("Acme pricing page")
+        assert content_hash("Acme pricing page") != content_hash("Acme pricing page v2")
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test responses survive a restart through SQLite."""
+        path = tmp_path / "responses.sqlite3"
+        cache = ResponseCache(path)
+        cache.set("k", CachedResponse({"data": {"markdown": "hi"}}, "abc", 123.0))
+        cache.close()
+
+        reopened = ResponseCache(path)
+        cached = reopened.get("k")
+        reopened.close()
+
+        assert cached == CachedResponse({"data": {"markdown": "hi"}}, "abc", 123.0)
+        assert ResponseCache(None).get("k") is None
+
+
+@pytest.mark.unit
+class TestMCPClientCache:
+    """Test suite for MCPClient response caching."""
+
+    @pytest.mark.asyncio
+    async def test_scrape_served_from_cache_within_ttl(self, make_mcp_client):
+        """Test a repeated scrape makes no request until the TTL expires."""
+        requests = []
+        markdown = {"text": "Acme pricing"}
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return httpx.Response(200, json={"data": {"markdown": markdown["text"]}})
+
+        client = make_mcp_client(handler)
+
+        first = await client.firecrawl_scrape("https://acme.test/pricing")
+        second = await client.firecrawl_scrape("https://acme.test/pricing")
+
+        assert len(requests) == 1
+        assert first["cache"]["hit"] is False and first["cache"]["changed"] is True
+        assert second["cache"]["hit"] is True
+        assert second["data"] == first["data"]
+
+        # Expired: re-fetched, and reported unchanged while the content is the same
+        refreshed = await client.firecrawl_scrape("https://acme.test/pricing", max_age=0)
+        assert len(requests) == 2
+        assert refreshed["cache"] == {**first["cache"], "changed": False}
+
+        markdown["text"] = "Acme pricing, now with a free tier"
+        changed = await client.firecrawl_scrape("https://acme.test/pricing", max_age=0)
+        assert changed["cache"]["changed"] is True
+        assert changed["cache"]["content_hash"] != first["cache"]["content_hash"]
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_search_ttl_and_params(self, make_mcp_client, monkeypatch):
+        """Test searches expire after their own TTL and are keyed on parameters."""
+        requests = []
+
+        def handler(request):
+            requests.append(dict(request.url.params))
+            return httpx.Response(200, json={"web": {"results": [{"url": "https://acme.test"}]}})
+
+        client = make_mcp_client(handler, mcp_cache_search_ttl_seconds=60.0)
+
+        await client.brave_search("acme news")
+        await client.brave_search("acme news")
+        await client.brave_search("acme news", count=5)
+        assert len(requests) == 2
+
+        now = time.time()
+        monkeypatch.setattr("app.services.mcp_client.time.time", lambda: now + 61)
+        result = await client.brave_search("acme news")
+        assert len(requests) == 3
+        assert result["cache"]["changed"] is False
+
+        await client.close()
@@ -0,0 +1,274 @@
+"""Unit tests for the local vector store."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.config import get_settings
+from app.services import vector_store
+from app.services.rag_engine import RAGEngine
+from app.services.vector_store import (
+    HNSW_FILE,
+    INITIAL_CAPACITY,
+    VECTORS_FILE,
+    LocalVectorIndex,
+    get_vector_store,
+    hnswlib,
+)
+
+
+def make_vectors():
+    """Three orthogonal-ish vectors across two documents."""
+    return [
+        {"id": "doc_a_chunk_0", "values": [1.0, 0.0, 0.0],
+         "metadata": {"document_id": "doc_a", "page": 1, "text": "alpha"}},
+        {"id": "doc_a_chunk_1", "values": [0.0, 2.0, 0.0],
+         "metadata": {"document_id": "doc_a", "page": 2, "text": "beta"}},
+        {"id": "doc_b_chunk_0", "values": [0.7, 0.7, 0.0],
+         "metadata": {"document_id": "doc_b", "page": 1, "text": "gamma"}},
+    ]
+
+
+def random_vectors(count: int, dimension: int = 16, documents: int = 4, seed: int = 0) -> list[dict]:
+    """Random vectors spread across `documents` documents."""
+    rng = np.random.default_rng(seed)
+    return [
+        {"id": f"chunk_{i}", "values": rng.standard_normal(dimension).tolist(),
+         "metadata": {"document_id": f"doc_{i % documents}", "page": i % 7, "text": f"text {i}"}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def local_index(tmp_path):
+    """Local index persisted under a temporary directory."""
+    index = LocalVectorIndex(tmp_path / "vectors")
+    yield index
+    index.close()
+
+
+@pytest.mark.unit
+class TestLocalVectorIndex:
+    """Test suite for LocalVectorIndex."""
+
+    @pytest.mark.asyncio
+    async def test_query_orders_by_cosine(self, local_index):
+        """Test matches come back by descending cosine similarity."""
+        assert await local_index.upsert(make_vectors()) == 3
+
+        result = await local_index.query(vector=[1.0, 0.1, 0.0], top_k=2, include_metadata=True)
+
+        assert [m.id for m in result.matches] == ["doc_a_chunk_0", "doc_b_chunk_0"]
+        assert result.matches[0].score == pytest.approx(0.995, abs=1e-3)
+        assert result.matches[0].metadata["text"] == "alpha"
+
+    @pytest.mark.asyncio
+    async def test_query_applies_filter(self, local_index):
+        """Test metadata filters use the Pinecone filter semantics."""
+        await local_index.upsert(make_vectors())
+
+        result = await local_index.query(
+            vector=[1.0, 0.0, 0.0],
+            top_k=5,
+            filter={"document_id": "doc_a", "page": {"$gte": 2}}
+        )
+
+        assert [m.id for m in result.matches] == ["doc_a_chunk_1"]
+
+    @pytest.mark.asyncio
+    async def test_upsert_replaces_existing_id(self, local_index):
+        """Test upserting an existing ID overwrites its vector and metadata."""
+        await local_index.upsert(make_vectors())
+        await local_index.upsert([
+            {"id": "doc_a_chunk_0", "values": [0.0, 0.0, 1.0], "metadata": {"document_id": "doc_a"}}
+        ])
+
+        result = await local_index.query(vector=[0.0, 0.0, 1.0], top_k=1)
+
+        assert len(local_index) == 3
+        assert result.matches[0].id == "doc_a_chunk_0"
+        assert result.matches[0].score == pytest.approx(1.0)
+
+    @pytest.mark.asyncio
+    async def test_delete_by_ids_and_filter(self, local_index):
+        """Test deleting by ID and by filter keeps remaining rows searchable."""
+        await local_index.upsert(make_vectors())
+
+        await local_index.delete(ids=["doc_a_chunk_0", "missing"])
+        result = await local_index.query(vector=[0.7, 0.7, 0.0], top_k=5)
+        assert [m.id for m in result.matches] == ["doc_b_chunk_0", "doc_a_chunk_1"]
+
+        await local_index.delete(filter={"document_id": "doc_b"})
+        result = await local_index.query(vector=[0.7, 0.7, 0.0], top_k=5)
+        assert [m.id for m in result.matches] == ["doc_a_chunk_1"]
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path):
+        """Test a new instance reloads the persisted vectors."""
+        first = LocalVectorIndex(tmp_path / "vectors")
+        await first.upsert(make_vectors())
+        await first.delete(ids=["doc_a_chunk_1"])
+        first.close()
+
+        second = LocalVectorIndex(tmp_path / "vectors")
+        result = await second.query(vector=[0.0, 1.0, 0.0], top_k=5)
+        second.close()
+
+        assert len(second) == 2
+        assert [m.id for m in result.matches] == ["doc_b_chunk_0", "doc_a_chunk_0"]
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch(self, local_index):
+        """Test vectors of the wrong dimension are rejected."""
+        await local_index.upsert(make_vectors())
+
+        with pytest.raises(ValueError):
+            await local_index.upsert([{"id": "bad", "values": [1.0, 0.0]}])
+        with pytest.raises(ValueError):
+            await local_index.query(vector=[1.0, 0.0], top_k=1)
+
+    @pytest.mark.asyncio
+    async def test_rag_engine_retrieves_from_local_index(self, local_index):
+        """Test the RAG engine works unchanged on the local backend."""
+        await local_index.upsert(make_vectors())
+        rag = RAGEngine(vector_store=local_index)
+
+        docs = await rag.retrieve(
+            "alpha", top_k=1, min_score=0.5, query_embedding=[1.0, 0.0, 0.0], lexical_weight=0
+        )
+
+        assert docs[0]["chunk_id"] == "doc_a_chunk_0"
+        assert docs[0]["document_id"] == "doc_a"
+
+    def test_backend_setting_selects_local_index(self, tmp_path, monkeypatch):
+        """Test `vector_store_backend=local` returns the local index."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "vector_store_backend", "local")
+        monkeypatch.setattr(settings, "local_vector_store_path", str(tmp_path / "vectors"))
+        monkeypatch.setattr(vector_store, "_local_index", None)
+
+        store = get_vector_store()
+
+        assert isinstance(store, LocalVectorIndex)
+        assert get_vector_store() is store
+        store.close()
+
+
+@pytest.mark.unit
+class TestLocalVectorIndexStorage:
+    """Test suite for incremental persistence, compaction and HNSW search."""
+
+    @pytest.mark.asyncio
+    async def test_writes_are_appended_and_durable_per_batch(self, tmp_path):
+        """Test each batch is readable by a new instance without a flush."""
+        first = LocalVectorIndex(tmp_path / "vectors", ann=False)
+        await first.upsert(make_vectors())
+        size = (tmp_path / "vectors" / VECTORS_FILE).stat().st_size
+        await first.upsert([
+            {"id": "doc_a_chunk_0", "values": [0.0, 0.0, 1.0], "metadata": {"document_id": "doc_a"}}
+        ])
+
+        # Replacing appends a row within the preallocated file
+        assert (tmp_path / "vectors" / VECTORS_FILE).stat().st_size == size
+        assert first._used == 4 and len(first) == 3
+
+        # Opened while the first instance is still running (as after a crash)
+        second = LocalVectorIndex(tmp_path / "vectors", ann=False)
+        result = await second.query(vector=[0.0, 0.0, 1.0], top_k=1)
+        second.close()
+        first.close()
+
+        assert len(second) == 3
+        assert result.matches[0].id == "doc_a_chunk_0"
+        assert result.matches[0].metadata == {"document_id": "doc_a"}
+
+    @pytest.mark.asyncio
+    async def test_filters_narrow_candidates(self, local_index):
+        """Test document postings and residual conditions select the candidate rows."""
+        await local_index.upsert(random_vectors(40))
+
+        rows = local_index._candidates({"document_id": {"$in": ["doc_1", "doc_2"]}, "page": {"$lt": 3}})
+        expected = [i for i in range(40) if i % 4 in (1, 2) and i % 7 < 3]
+        assert rows.tolist() == expected
+
+        result = await local_index.query(
+            vector=random_vectors(1, seed=9)[0]["values"], top_k=40,
+            filter={"document_id": {"$in": ["doc_1", "doc_2"]}, "page": {"$lt": 3}}
+        )
+        assert sorted(int(m.id.split("_")[1]) for m in result.matches) == expected
+        # Chunk text is not kept in memory, but is returned with matches
+        assert "text" not in local_index._filter_metadata[0]
+        assert result.matches[0].metadata["text"].startswith("text ")
+
+    @pytest.mark.asyncio
+    async def test_dead_rows_are_compacted(self, tmp_path):
+        """Test deleted and replaced rows are reclaimed once they outnumber live ones."""
+        index = LocalVectorIndex(tmp_path / "vectors", ann=False)
+        vectors = random_vectors(INITIAL_CAPACITY * 2 + 10, dimension=4)
+        await index.upsert(vectors)
+
+        await index.delete(filter={"document_id": {"$in": ["doc_0", "doc_1", "doc_2"]}})
+
+        survivors = [v for v in vectors if v["metadata"]["document_id"] == "doc_3"]
+        assert index._used == len(index) == len(survivors)
+        probe = survivors[-1]
+        result = await index.query(vector=probe["values"], top_k=1)
+        assert result.matches[0].id == probe["id"]
+        index.close()
+
+        reopened = LocalVectorIndex(tmp_path / "vectors", ann=False)
+        result = await reopened.query(vector=probe["values"], top_k=1, filter={"document_id": "doc_3"})
+        reopened.close()
+        assert result.matches[0].id == probe["id"]
+        assert result.matches[0].score == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(hnswlib is None, reason="hnswlib not installed")
+class TestLocalVectorIndexHNSW:
+    """Test suite for approximate search through the HNSW graph."""
+
+    @pytest.mark.asyncio
+    async def test_hnsw_finds_stored_vectors(self, tmp_path):
+        """Test graph search, with and without a filter, finds each vector itself."""
+        vectors = random_vectors(300)
+        index = LocalVectorIndex(tmp_path / "vectors", ann=True, exact_scan_max_rows=0)
+        await index.upsert(vectors)
+
+        for probe in vectors[:20]:
+            result = await index.query(vector=probe["values"], top_k=3)
+            assert result.matches[0].id == probe["id"]
+            assert result.matches[0].score == pytest.approx(1.0, abs=1e-4)
+
+        result = await index.query(
+            vector=vectors[5]["values"], top_k=5, filter={"document_id": "doc_2"}
+        )
+        assert len(result.matches) == 5
+        assert all(m.metadata["document_id"] == "doc_2" for m in result.matches)
+
+        await index.delete(ids=[vectors[0]["id"]])
+        result = await index.query(vector=vectors[0]["values"], top_k=3)
+        assert vectors[0]["id"] not in [m.id for m in result.matches]
+        index.close()
+
+    @pytest.mark.asyncio
+    async def test_graph_saved_on_close_and_caught_up_after_crash(self, tmp_path):
+        """Test a saved graph is reused and rows written after the save are added on load."""
+        vectors = random_vectors(200)
+        index = LocalVectorIndex(tmp_path / "vectors", ann=True, exact_scan_max_rows=0)
+        await index.upsert(vectors[:150])
+        await index.flush()
+        assert (tmp_path / "vectors" / HNSW_FILE).exists()
+
+        # Written after the save and never flushed
+        await index.upsert(vectors[150:])
+        await index.delete(ids=[vectors[3]["id"]])
+
+        reopened = LocalVectorIndex(tmp_path / "vectors", ann=True, exact_scan_max_rows=0)
+        latest = await reopened.query(vector=vectors[180]["values"], top_k=1)
+        deleted = await reopened.query(vector=vectors[3]["values"], top_k=3)
+        reopened.close()
+        index.close()
+
+        assert latest.matches[0].id == vectors[180]["id"]
+        assert vectors[3]["id"] not in [m.id for m in deleted.matches]